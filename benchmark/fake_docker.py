@@ -0,0 +1,307 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+# Stand-in for the Docker daemon, which serves the part of the Docker Engine API used by DockMon on a unix socket.
+# It simulates a number of running containers with DockMon labels, which write log lines at a fixed rate.
+# Every error_every-th line of a container is an error line, which carries the time it was written, so the alert
+# latency can be measured at the Slack stand-in.
+#
+#     python benchmark/fake_docker.py --socket /tmp/fake_docker.sock --containers 500 --rate 10
+#
+# DockMon can be run against it with DOCKMON_CONFIG_DOCKER_SOCKET=/tmp/fake_docker.sock. GET /_stats returns the
+# number of requests per endpoint.
+
+import argparse
+import json
+import math
+import os
+import re
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeContainers:
+    """Synthetic containers and their logs. The logs are not stored, but generated for the requested time range."""
+
+    def __init__(
+        self, count: int, rate: float, error_every: int, labels: Dict[str, str], busy: Optional[int] = None
+    ):
+        """
+        Args:
+            count (int): Number of containers
+            rate (float): Log lines per second and container
+            error_every (int): Every n-th line is an error line, 0 disables them
+            labels (Dict[str, str]): Labels of all containers
+            busy (Optional[int], optional): Only the first containers write logs, the others are idle.
+                                            Defaults to all.
+        """
+        self.rate = rate
+        self.error_every = error_every
+        self.labels = labels
+        self.busy = count if busy is None else busy
+        self.start = time.time_ns()
+
+        self.containers: List[Dict[str, Any]] = [
+            {"Id": "%064x" % (i + 1), "Name": "bench_%d" % i, "Index": i} for i in range(count)
+        ]
+        self._lookup: Dict[str, Dict[str, Any]] = {}
+        for container in self.containers:
+            self._lookup[container["Id"]] = container
+            self._lookup[container["Name"]] = container
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._lookup.get(key)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "Id": c["Id"],
+                "Names": ["/" + c["Name"]],
+                "Image": "bench",
+                "State": "running",
+                "Status": "Up",
+                "Labels": self.labels,
+            }
+            for c in self.containers
+        ]
+
+    def inspect(self, container: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "Id": container["Id"],
+            "Name": "/" + container["Name"],
+            "State": {"Status": "running", "Running": True},
+            "Config": {"Tty": False, "Labels": self.labels, "Image": "bench"},
+            "HostConfig": {"LogConfig": {"Type": "json-file"}},
+        }
+
+    def logs(self, container: Dict[str, Any], since: float, timestamps: bool) -> bytes:
+        """Generates the log lines written since the timestamp
+
+        Args:
+            container (Dict[str, Any]): Container
+            since (float): Unix timestamp
+            timestamps (bool): Prefix each line with its timestamp
+
+        Returns:
+            bytes: Log lines
+        """
+        if container["Index"] >= self.busy or self.rate <= 0:
+            return b""
+
+        now = time.time_ns()
+        first = max(0, math.ceil((since * 1e9 - self.start) * self.rate / 1e9))
+        last = int((now - self.start) * self.rate / 1e9)
+
+        lines: List[bytes] = []
+        for k in range(first, last + 1):
+            written = self.start + int(k * 1e9 / self.rate)
+            if self.error_every and (k + container["Index"]) % self.error_every == 0:
+                line = b"ERROR request %d failed emitted=%d\n" % (k, written)
+            else:
+                line = b"INFO GET /api/items/%d HTTP/1.1 200 %dms\n" % (k, k % 97)
+
+            if timestamps:
+                seconds, nanoseconds = divmod(written, 1000000000)
+                line = b"%s.%09dZ %s" % (
+                    time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)).encode(),
+                    nanoseconds,
+                    line,
+                )
+            lines.append(line)
+
+        return b"".join(lines)
+
+    def stats(self, container: Dict[str, Any]) -> Dict[str, Any]:
+        """Generates a sample of the stats in the format of cgroup v2. The n-th container uses n % 10 * 10 percent
+        of one core and of its memory limit.
+
+        Args:
+            container (Dict[str, Any]): Container
+
+        Returns:
+            Dict[str, Any]: Stats like /containers/{id}/stats?stream=0&one-shot=1
+        """
+        load = container["Index"] % 10 / 10
+        elapsed = time.time_ns() - self.start
+        limit = 1024 ** 3
+        return {
+            "read": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": int(elapsed * load)},
+                "system_cpu_usage": elapsed * 2,
+                "online_cpus": 2,
+            },
+            "memory_stats": {
+                "usage": int(limit * load) + 4096,
+                "limit": limit,
+                "stats": {"inactive_file": 4096},
+            },
+        }
+
+
+class FakeDockerRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Strips the API version of the path
+    _version_prefix = re.compile(r"^/v[0-9.]+")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str = "application/json", status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data: Any, status: int = 200):
+        self._send(json.dumps(data).encode(), status=status)
+
+    def do_GET(self):
+        server: FakeDockerServer = self.server  # type: ignore
+        url = urlparse(self.path)
+        path = self._version_prefix.sub("", url.path)
+        query = parse_qs(url.query)
+        parts = path.strip("/").split("/")
+
+        if path != "/_stats":
+            server.count("/containers/{id}/" + parts[2] if parts[0] == "containers" and len(parts) == 3 else path)
+
+        if path == "/_ping":
+            self._send(b"OK", "text/plain")
+        elif path == "/_stats":
+            self._send_json(server.get_stats())
+        elif path == "/version":
+            self._send_json({"ApiVersion": "1.41", "Version": "20.10.0", "MinAPIVersion": "1.12"})
+        elif path == "/info":
+            self._send_json({"Name": "fake-docker", "Containers": len(server.containers.containers)})
+        elif path == "/containers/json":
+            self._send_json(server.containers.list())
+        elif path == "/events":
+            self._stream_events()
+        elif parts[0] == "containers" and len(parts) == 3:
+            if not (container := server.containers.get(parts[1])):
+                self._send_json({"message": "No such container: %s" % parts[1]}, 404)
+            elif parts[2] == "json":
+                self._send_json(server.containers.inspect(container))
+            elif parts[2] == "logs":
+                logs = server.containers.logs(
+                    container,
+                    float(query.get("since", ["0"])[0]),
+                    query.get("timestamps", ["0"])[0] in ("1", "true", "True"),
+                )
+                # Containers without TTY send a multiplexed stream, here as a single stdout frame
+                self._send(struct.pack(">BxxxL", 1, len(logs)) + logs, "application/vnd.docker.raw-stream")
+            elif parts[2] == "stats":
+                self._send_json(server.containers.stats(container))
+            else:
+                self._send_json({"message": "page not found"}, 404)
+        else:
+            self._send_json({"message": "page not found"}, 404)
+
+    def _stream_events(self):
+        """Keeps the event stream open without events, until the server stops"""
+        server: FakeDockerServer = self.server  # type: ignore
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+        server.stopped.wait()
+        self.close_connection = True
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Concurrent requests of the asyncio clients, like the backlog of the Docker daemon
+    request_queue_size = 1024
+
+    def __init__(self, path: str, containers: FakeContainers):
+        self.containers = containers
+        self.stopped = threading.Event()
+        self._requests: Dict[str, int] = {}
+        self._requests_lock = threading.Lock()
+        super().__init__(path, FakeDockerRequestHandler)
+
+    def count(self, endpoint: str):
+        with self._requests_lock:
+            self._requests[endpoint] = self._requests.get(endpoint, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._requests_lock:
+            return {"requests": dict(self._requests)}
+
+
+def parse_labels(items: List[str], interval: int) -> Dict[str, str]:
+    """
+    Args:
+        items (List[str]): Additional labels as key=value
+        interval (int): Check interval of the containers
+
+    Returns:
+        Dict[str, str]: Labels of the synthetic containers
+    """
+    labels = {
+        "io.smclab.dockmon.enabled": "True",
+        "io.smclab.dockmon.monitoring.logs": "true",
+        "io.smclab.dockmon.monitoring.logs.include": "ERROR, FATAL",
+        "io.smclab.dockmon.monitoring.logs.exclude": "healthcheck",
+        "io.smclab.dockmon.monitoring.checkinterval": str(interval),
+    }
+    for item in items:
+        key, _sep, value = item.partition("=")
+        labels[key] = value
+    return labels
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in for the Docker daemon")
+    parser.add_argument("--socket", default="/tmp/fake_docker.sock", help="Path of the unix socket")
+    parser.add_argument("--containers", type=int, default=100, help="Number of containers")
+    parser.add_argument("--rate", type=float, default=10.0, help="Log lines per second and container")
+    parser.add_argument("--error-every", type=int, default=1000, help="Every n-th line is an error, 0 for none")
+    parser.add_argument("--interval", type=int, default=10, help="Check interval label of the containers")
+    parser.add_argument("--busy", type=int, default=None, help="Number of containers writing logs, defaults to all")
+    parser.add_argument("--label", action="append", default=[], help="Additional label as key=value")
+    args = parser.parse_args()
+
+    try:
+        os.unlink(args.socket)
+    except FileNotFoundError:
+        pass
+
+    server = FakeDockerServer(
+        args.socket,
+        FakeContainers(
+            args.containers, args.rate, args.error_every, parse_labels(args.label, args.interval), args.busy
+        ),
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopped.set()
+        server.server_close()
+        os.unlink(args.socket)
@@ -0,0 +1,108 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+# Stand-in for the Slack API, which accepts chat.postMessage requests on a local port and measures the alert latency:
+# the time from the first error line of an alert (see fake_docker.py) until the alert arrives.
+#
+#     python benchmark/fake_slack.py --port 8089
+#
+# DockMon can be run against it with DOCKMON_CONFIG_SLACK_API_URL=http://127.0.0.1:8089/. GET /_stats returns the
+# number of messages and alerts and the latency of all alerts in milliseconds.
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+
+class FakeSlackRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Written by fake_docker.py into every error line
+    _emitted = re.compile(r"emitted=(\d+)")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data: Any):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server: FakeSlackServer = self.server  # type: ignore
+        self._send_json(server.get_stats())
+
+    def do_POST(self):
+        server: FakeSlackServer = self.server  # type: ignore
+        received = time.time_ns()
+        form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+
+        latencies: List[float] = []
+        for attachment in json.loads(form.get("attachments", ["[]"])[0]):
+            emitted = [int(x) for f in attachment.get("fields", []) for x in self._emitted.findall(f.get("value", ""))]
+            if emitted:
+                latencies.append((received - min(emitted)) / 1e6)
+
+        server.record(len(json.loads(form.get("attachments", ["[]"])[0])), latencies)
+        self._send_json({"ok": True})
+
+
+class FakeSlackServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int):
+        self._lock = threading.Lock()
+        self._messages = 0
+        self._alerts = 0
+        self._latencies: List[float] = []
+        super().__init__(("127.0.0.1", port), FakeSlackRequestHandler)
+
+    def record(self, alerts: int, latencies: List[float]):
+        with self._lock:
+            self._messages += 1
+            self._alerts += alerts
+            self._latencies.extend(latencies)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"messages": self._messages, "alerts": self._alerts, "latencies_ms": list(self._latencies)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in for the Slack API")
+    parser.add_argument("--port", type=int, default=0, help="Port, 0 picks a free port")
+    args = parser.parse_args()
+
+    server = FakeSlackServer(args.port)
+
+    # The benchmark reads the port of the server from the first line
+    print(server.server_address[1], flush=True)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
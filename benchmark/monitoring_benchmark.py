@@ -0,0 +1,235 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+# End to end benchmark of the monitoring: starts the Docker stand-in (fake_docker.py) and the Slack stand-in
+# (fake_slack.py) in their own processes, runs MonitorScheduler with MonitorLogfile against them and reports
+#
+#   - the latency percentiles of the checks,
+#   - the log lines scanned per second,
+#   - the requests to the Docker daemon per check interval,
+#   - the resident memory of DockMon,
+#   - the latency of the alerts, from the error line until it arrives at Slack.
+#
+#     python benchmark/monitoring_benchmark.py --containers 500 --interval 10 --rate 10 --duration 60
+#
+# DockMon is configured by the usual environment variables, e.g. DOCKMON_CONFIG_ENGINE=asyncio.
+
+import argparse
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "src")
+
+
+def get_docker_stats(socket_path: str) -> Dict[str, Any]:
+    """
+    Args:
+        socket_path (str): Unix socket of the Docker stand-in
+
+    Returns:
+        Dict[str, Any]: Statistics of the Docker stand-in
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socket_path)
+        s.sendall(b"GET /_stats HTTP/1.0\r\nHost: docker\r\n\r\n")
+        response = b""
+        while chunk := s.recv(65536):
+            response += chunk
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+def get_slack_stats(port: int) -> Dict[str, Any]:
+    """
+    Args:
+        port (int): Port of the Slack stand-in
+
+    Returns:
+        Dict[str, Any]: Statistics of the Slack stand-in
+    """
+    with socket.create_connection(("127.0.0.1", port)) as s:
+        s.sendall(b"GET /_stats HTTP/1.0\r\nHost: slack\r\n\r\n")
+        response = b""
+        while chunk := s.recv(65536):
+            response += chunk
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+def get_rss_mb() -> float:
+    """
+    Returns:
+        float: Current resident memory of this process in MiB
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentiles(values: List[float]) -> str:
+    """
+    Args:
+        values (List[float]): Measured values
+
+    Returns:
+        str: 50th, 90th, 99th percentile and maximum
+    """
+    if not values:
+        return "-"
+    values = sorted(values)
+    return "p50 %.1f  p90 %.1f  p99 %.1f  max %.1f" % (
+        values[int(len(values) * 0.5)],
+        values[int(len(values) * 0.9)],
+        values[int(len(values) * 0.99)],
+        values[-1],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End to end benchmark of the log monitoring")
+    parser.add_argument("--containers", type=int, default=100, help="Number of containers")
+    parser.add_argument("--interval", type=int, default=10, help="Check interval of the containers in seconds")
+    parser.add_argument("--rate", type=float, default=10.0, help="Log lines per second and container")
+    parser.add_argument("--error-every", type=int, default=1000, help="Every n-th line is an error, 0 for none")
+    parser.add_argument("--busy", type=int, default=None, help="Number of containers writing logs, defaults to all")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to measure")
+    parser.add_argument("--label", action="append", default=[], help="Additional label as key=value")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dockmon_benchmark_")
+    docker_socket = os.path.join(workdir, "docker.sock")
+
+    docker = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARK_DIR, "fake_docker.py"), "--socket", docker_socket]
+        + ["--containers", str(args.containers), "--rate", str(args.rate)]
+        + ["--error-every", str(args.error_every), "--interval", str(args.interval)]
+        + (["--busy", str(args.busy)] if args.busy is not None else [])
+        + [x for label in args.label for x in ("--label", label)]
+    )
+    slack = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARK_DIR, "fake_slack.py")], stdout=subprocess.PIPE, text=True
+    )
+    slack_port = int(slack.stdout.readline())
+    while not os.path.exists(docker_socket):
+        time.sleep(0.1)
+
+    # DockMon reads its configuration on import
+    os.environ["DOCKMON_CONFIG_DOCKER_SOCKET"] = docker_socket
+    os.environ["DOCKMON_CONFIG_SLACK_API_URL"] = "http://127.0.0.1:%d/" % slack_port
+    os.environ.setdefault("DOCKMON_CONFIG_GRACEPERIOD", "0")
+    os.environ.setdefault("DOCKMON_CONFIG_CHECKPOINT_FILE", "")
+    sys.path.insert(0, SRC_DIR)
+
+    from handler.DockerEventHandler import DockerEventHandler
+    from handler.SlackReporting import SlackReport
+    from monitoring.MatchingPool import MatchingPool
+    from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+    from monitoring.MonitorScheduler import MonitorScheduler
+
+    # Measure the checks and the scanned lines
+    measuring = threading.Event()
+    check_latencies: List[float] = []
+    scanned_lines = [0]
+    stats_lock = threading.Lock()
+
+    check = MonitorLogfile.check
+    check_async = MonitorLogfile.check_async
+    consume_new_lines = MonitorLogfile._consume_new_lines
+
+    def timed_check(self):
+        start = time.perf_counter()
+        try:
+            return check(self)
+        finally:
+            if measuring.is_set():
+                with stats_lock:
+                    check_latencies.append((time.perf_counter() - start) * 1000)
+
+    async def timed_check_async(self, client):
+        start = time.perf_counter()
+        try:
+            return await check_async(self, client)
+        finally:
+            if measuring.is_set():
+                with stats_lock:
+                    check_latencies.append((time.perf_counter() - start) * 1000)
+
+    def counted_consume_new_lines(self, container_id, logs):
+        new_lines = consume_new_lines(self, container_id, logs)
+        if measuring.is_set():
+            with stats_lock:
+                scanned_lines[0] += new_lines.count(b"\n")
+        return new_lines
+
+    MonitorLogfile.check = timed_check
+    MonitorLogfile.check_async = timed_check_async
+    MonitorLogfile._consume_new_lines = counted_consume_new_lines
+
+    scheduler = MonitorScheduler.getInstance()
+    try:
+        scheduler.init_monitoring_threads()
+
+        # All containers are discovered and checked once, before the measurement starts
+        time.sleep(args.interval + 2)
+        docker_before = get_docker_stats(docker_socket)["requests"]
+        slack_before = get_slack_stats(slack_port)
+        measuring.set()
+        start = time.monotonic()
+        time.sleep(args.duration)
+        measuring.clear()
+        elapsed = time.monotonic() - start
+        docker_after = get_docker_stats(docker_socket)["requests"]
+        slack_after = get_slack_stats(slack_port)
+        rss = get_rss_mb()
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    finally:
+        scheduler.stop_log_streams()
+        DockerEventHandler.getInstance().stop()
+        SlackReport.getInstance().stop(timeout=1)
+        MatchingPool.getInstance().stop()
+        docker.terminate()
+        slack.terminate()
+
+    ticks = elapsed / args.interval
+    requests = {k: v - docker_before.get(k, 0) for k, v in docker_after.items() if v - docker_before.get(k, 0)}
+    alert_latencies = slack_after["latencies_ms"][len(slack_before["latencies_ms"]) :]
+
+    print("containers      %d, interval %ds, %.0f lines/s per container" % (args.containers, args.interval, args.rate))
+    print("checks          %d in %.0fs" % (len(check_latencies), elapsed))
+    print("check latency   %s ms" % percentiles(check_latencies))
+    print("lines scanned   %.0f/s" % (scanned_lines[0] / elapsed))
+    print("docker requests %.1f per interval" % (sum(requests.values()) / ticks))
+    for endpoint, count in sorted(requests.items()):
+        print("                %-28s %.1f per interval" % (endpoint, count / ticks))
+    print("rss             %.1f MiB, max %.1f MiB" % (rss, max_rss))
+    print(
+        "slack           %d messages, %d alerts"
+        % (slack_after["messages"] - slack_before["messages"], slack_after["alerts"] - slack_before["alerts"])
+    )
+    print("alert latency   %s ms" % percentiles(alert_latencies))
+
+    os._exit(0)
@@ -0,0 +1,139 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+# Measures the overhead of the scheduler per job run with the memory and the SQLite job store.
+#
+# Runs a number of no-op interval jobs, like the monitoring jobs of DockMon, and reports the CPU time of the process
+# and the delay between the scheduled and the actual run time per job run.
+#
+#     python benchmark/scheduler_overhead.py --jobs 500 --interval 1 --duration 20
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from apscheduler.events import EVENT_JOB_EXECUTED, JobExecutionEvent
+from apscheduler.schedulers.background import BackgroundScheduler
+from typing import Dict, List
+
+
+class NoopMonitor:
+    """Stands in for a monitor: the job is a bound method of an object with labels, which is pickled by the
+    SQLite job store on every run."""
+
+    def __init__(self, container_name: str):
+        self._container_name = container_name
+        self._container_labels = {
+            "io.smclab.dockmon.enabled": "true",
+            "io.smclab.dockmon.monitoring.logs": "true",
+            "io.smclab.dockmon.monitoring.logs.include": "error, fatal, exception, panic",
+            "io.smclab.dockmon.monitoring.logs.exclude": "test",
+        }
+
+    def check(self) -> bool:
+        return False
+
+
+def run(jobstore: str, jobs: int, interval: int, duration: float) -> Dict[str, float]:
+    """Runs the jobs with one job store
+
+    Args:
+        jobstore (str): "memory" or "sqlite"
+        jobs (int): Number of jobs
+        interval (int): Interval of the jobs in seconds
+        duration (float): Seconds to measure
+
+    Returns:
+        Dict[str, float]: Results
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store: Dict[str, str] = {"type": "memory"}
+        if jobstore == "sqlite":
+            store = {"type": "sqlalchemy", "url": "sqlite:///" + os.path.join(directory, "MonitoringJobs.sqlite")}
+
+        scheduler = BackgroundScheduler(
+            {
+                "apscheduler.jobstores.default": store,
+                "apscheduler.executors.default": {
+                    "class": "apscheduler.executors.pool:ThreadPoolExecutor",
+                    "max_workers": "30",
+                },
+                "apscheduler.job_defaults.coalesce": "true",
+                "apscheduler.job_defaults.max_instances": "3",
+                "apscheduler.timezone": "UTC",
+            }
+        )
+
+        delays: List[float] = []
+        lock = threading.Lock()
+        measuring = threading.Event()
+
+        def listener(event: JobExecutionEvent):
+            if measuring.is_set():
+                delay = time.time() - event.scheduled_run_time.timestamp()
+                with lock:
+                    delays.append(delay)
+
+        scheduler.add_listener(listener, EVENT_JOB_EXECUTED)
+        scheduler.start()
+        for i in range(jobs):
+            scheduler.add_job(NoopMonitor("container_%d" % i).check, trigger="interval", seconds=interval, id=str(i))
+
+        # Let all jobs run once before measuring
+        time.sleep(interval + 1)
+        measuring.set()
+        cpu = time.process_time()
+        time.sleep(duration)
+        measuring.clear()
+        cpu = time.process_time() - cpu
+        scheduler.shutdown()
+
+    runs = len(delays)
+    delays.sort()
+    return {
+        "runs": runs,
+        "cpu_per_run_us": cpu / runs * 1e6 if runs else 0.0,
+        "cpu_share": cpu / duration,
+        "delay_mean_ms": statistics.mean(delays) * 1000 if runs else 0.0,
+        "delay_p99_ms": delays[int(runs * 0.99)] * 1000 if runs else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scheduler overhead per job run with both job stores")
+    parser.add_argument("--jobs", type=int, default=500, help="Number of interval jobs")
+    parser.add_argument("--interval", type=int, default=1, help="Interval of the jobs in seconds")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to measure per job store")
+    args = parser.parse_args()
+
+    print("%-8s %8s %14s %10s %14s %13s" % ("store", "runs", "cpu/run (us)", "cpu share", "delay (ms)", "p99 (ms)"))
+    for jobstore in ("memory", "sqlite"):
+        result = run(jobstore, args.jobs, args.interval, args.duration)
+        print(
+            "%-8s %8d %14.1f %9.1f%% %14.1f %13.1f"
+            % (
+                jobstore,
+                result["runs"],
+                result["cpu_per_run_us"],
+                result["cpu_share"] * 100,
+                result["delay_mean_ms"],
+                result["delay_p99_ms"],
+            )
+        )
@@ -47,3 +47,77 @@ _REQUIRED_ENV: List[str] = [
 DOCKMON_CONFIG_GRACEPERIOD = os.environ.get("DOCKMON_CONFIG_GRACEPERIOD", 3600)
 DOCKMON_CONFIG_SLACK_TOKEN = os.environ.get("DOCKMON_CONFIG_SLACK_TOKEN", "")
 DOCKMON_CONFIG_SLACK_CHANNEL = os.environ.get("DOCKMON_CONFIG_SLACK_CHANNEL", "")
+
+# Endpoint of chat.postMessage, e.g. to test the delivery against a local stand-in for the Slack API
+DOCKMON_CONFIG_SLACK_API_URL = os.environ.get(
+    "DOCKMON_CONFIG_SLACK_API_URL", "https://slack.com/api/chat.postMessage"
+)
+
+# Maximum number of alerts waiting to be sent to Slack. Further alerts are dropped.
+DOCKMON_CONFIG_SLACK_QUEUE_SIZE = os.environ.get("DOCKMON_CONFIG_SLACK_QUEUE_SIZE", 1000)
+
+# Seconds the sender waits for further alerts, which are sent together as one digest message. 0 sends an alert at
+# once and only batches the alerts, which arrive while the sender waits for the rate limit of Slack.
+DOCKMON_CONFIG_SLACK_DIGEST_WINDOW = os.environ.get("DOCKMON_CONFIG_SLACK_DIGEST_WINDOW", 0)
+
+# Seconds between two full discovery runs. New and removed containers are picked up from the Docker events
+# immediately, the discovery only catches events that were missed.
+DOCKMON_CONFIG_DISCOVERY_INTERVAL = os.environ.get("DOCKMON_CONFIG_DISCOVERY_INTERVAL", 300)
+
+# Seconds the snapshot of all monitored containers is reused, before it is refreshed by a single list call
+DOCKMON_CONFIG_SNAPSHOT_TTL = os.environ.get("DOCKMON_CONFIG_SNAPSHOT_TTL", 5)
+
+# Path of the Docker socket
+DOCKMON_CONFIG_DOCKER_SOCKET = os.environ.get("DOCKMON_CONFIG_DOCKER_SOCKET", "/var/run/docker.sock")
+
+# Root directory of Docker, the log files of the json-file log driver are read from its containers directory
+DOCKMON_CONFIG_DOCKER_ROOT = os.environ.get("DOCKMON_CONFIG_DOCKER_ROOT", "/var/lib/docker")
+
+# Engine which runs the interval checks: "threads" runs them as scheduler jobs in the thread pool,
+# "asyncio" runs them as coroutines on a single event loop with at most DOCKMON_CONFIG_ASYNC_CONCURRENCY at once
+DOCKMON_CONFIG_ENGINE = os.environ.get("DOCKMON_CONFIG_ENGINE", "threads")
+DOCKMON_CONFIG_ASYNC_CONCURRENCY = os.environ.get("DOCKMON_CONFIG_ASYNC_CONCURRENCY", 50)
+
+# "spread" checks each container at a fixed phase of its interval, derived from its name, so the checks of
+# containers started together are spread evenly over the interval. "fixed" checks them every interval after they were
+# added.
+DOCKMON_CONFIG_SCHEDULE = os.environ.get("DOCKMON_CONFIG_SCHEDULE", "spread")
+
+# Seconds between two samples of the CPU and memory usage of the containers with the label stats
+DOCKMON_CONFIG_STATS_INTERVAL = os.environ.get("DOCKMON_CONFIG_STATS_INTERVAL", 10)
+
+# Job store of the scheduler: "memory" keeps the jobs in memory, "sqlite" pickles them into MonitoringJobs.sqlite
+# on every run. The stored jobs are never reused after a restart, so "memory" is the default.
+DOCKMON_CONFIG_JOBSTORE = os.environ.get("DOCKMON_CONFIG_JOBSTORE", "memory")
+
+# File of the log checkpoints, so the log checks resume where they stopped after a restart. Empty disables it.
+# The default is in the volume of the image, so the file is not lost with the container.
+DOCKMON_CONFIG_CHECKPOINT_FILE = os.environ.get(
+    "DOCKMON_CONFIG_CHECKPOINT_FILE", "/var/lib/dockmon/LogCheckpoints.dat"
+)
+
+# Seconds between two writes of the checkpoint file
+DOCKMON_CONFIG_CHECKPOINT_INTERVAL = os.environ.get("DOCKMON_CONFIG_CHECKPOINT_INTERVAL", 60)
+
+# Seconds of logs, which are checked at most after a restart. Older checkpoints resume at this limit.
+DOCKMON_CONFIG_CHECKPOINT_MAX_CATCHUP = os.environ.get("DOCKMON_CONFIG_CHECKPOINT_MAX_CATCHUP", 3600)
+
+# Port of the Prometheus metrics endpoint /metrics. Empty disables it.
+DOCKMON_CONFIG_METRICS_PORT = os.environ.get("DOCKMON_CONFIG_METRICS_PORT", "")
+
+# Directory of the profiles, which are recorded after SIGUSR1, and their duration in seconds
+DOCKMON_CONFIG_PROFILE_DIR = os.environ.get("DOCKMON_CONFIG_PROFILE_DIR", "/tmp/dockmon")
+DOCKMON_CONFIG_PROFILE_DURATION = os.environ.get("DOCKMON_CONFIG_PROFILE_DURATION", 30)
+
+# Worker threads of the scheduler, which run the interval jobs
+DOCKMON_CONFIG_THREADPOOL_WORKERS = os.environ.get("DOCKMON_CONFIG_THREADPOOL_WORKERS", 30)
+
+# Worker processes, which match the logs of containers with the label io.smclab.dockmon.monitoring.logs.highvolume.
+# 0 matches them in the threads like all other logs.
+DOCKMON_CONFIG_PROCESSPOOL_WORKERS = os.environ.get("DOCKMON_CONFIG_PROCESSPOOL_WORKERS", 5)
+
+# Keep-alive connections to the Docker socket per process. Defaults to one per worker thread plus some spare
+# connections for the discovery and the main loop.
+DOCKMON_CONFIG_DOCKER_POOL_SIZE = os.environ.get(
+    "DOCKMON_CONFIG_DOCKER_POOL_SIZE", int(DOCKMON_CONFIG_THREADPOOL_WORKERS) + 5
+)
@@ -18,10 +18,18 @@
 
 import logging
 import os
+import signal
 import sys
 import time
-from Config import _, _REQUIRED_ENV
+from Config import _, _REQUIRED_ENV, DOCKMON_CONFIG_ENGINE
+from handler.DockerEventHandler import DockerEventHandler
 from handler.DockerHandler import DockerHandler
+from handler.Metrics import Metrics
+from handler.Profiler import Profiler
+from handler.SlackReporting import SlackReport
+from monitoring.AsyncMonitorEngine import AsyncMonitorEngine
+from monitoring.MatchingPool import MatchingPool
+from monitoring.Modules.MonitorLogFiles import MonitorLogfile
 from monitoring.MonitorScheduler import MonitorScheduler
 
 logging.basicConfig(
@@ -51,6 +59,15 @@ if __name__ == "__main__":
     _scheduler = MonitorScheduler.getInstance()
     _scheduler.init_monitoring_threads()
 
+    # Serve the metrics, if a port is configured
+    Metrics.getInstance().start()
+
+    # SIGUSR1 records a profile of all threads
+    Profiler.getInstance().install()
+
+    # docker stop sends SIGTERM, which shuts down like an interrupt
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     # Starting the Main loop
     try:
         while _scheduler.check_scheduler_status():
@@ -58,4 +75,12 @@ if __name__ == "__main__":
         logging.error(_("CORE_SCHEDULER_NOT_RUNNING_EXIT"))
         sys.exit(1)
     except (KeyboardInterrupt, SystemExit):
+        _scheduler.stop_log_streams()
+        if DOCKMON_CONFIG_ENGINE == "asyncio":
+            AsyncMonitorEngine.getInstance().stop()
+        DockerEventHandler.getInstance().stop()
+        SlackReport.getInstance().stop()
+        MonitorLogfile.save_log_checkpoint()
+        MatchingPool.getInstance().stop()
+        Metrics.getInstance().stop()
         logging.info("Exiting")
@@ -0,0 +1,211 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import docker
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+
+class AsyncDockerClient:
+    """
+    Minimal asyncio client for the parts of the Docker Engine API used by the monitors. All requests are multiplexed
+    over a bounded number of keep-alive connections to the Docker unix socket, so one event loop can serve all checks.
+
+    Must be created and used inside the event loop.
+    """
+
+    # Same API version as the docker-py client
+    _api_version: str = "1.41"
+
+    def __init__(self, socket_path: str, max_connections: int, timeout: float = 60.0):
+        """
+        Args:
+            socket_path (str): Path of the Docker unix socket
+            max_connections (int): Maximum number of concurrently open connections
+            timeout (float, optional): Seconds until a request is aborted, so a hanging daemon does not hold
+                                       a connection forever. Defaults to 60.0.
+        """
+        self._socket_path = socket_path
+        self._timeout = timeout
+        self._connections = asyncio.Semaphore(max_connections)
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def logs(self, container_id: str, since: int) -> bytes:
+        """Fetches the logs of a container, like docker-py's container.logs(timestamps=True, since=since)
+
+        Args:
+            container_id (str): Container ID
+            since (int): Unix timestamp of the first log line
+
+        Returns:
+            bytes: stdout and stderr of the container, each line prefixed with its timestamp
+        """
+        body = await self.get(
+            "/containers/%s/logs" % container_id,
+            {"stdout": 1, "stderr": 1, "timestamps": 1, "since": since},
+        )
+        return self._demultiplex(body)
+
+    async def info(self) -> bytes:
+        """
+        Returns:
+            bytes: Raw JSON response of /info
+        """
+        return await self.get("/info", {})
+
+    async def get(self, path: str, params: Dict[str, object]) -> bytes:
+        """Sends a GET request to the Docker API. An idle keep-alive connection is reused, if there is one.
+
+        Args:
+            path (str): API path without version, e.g. /info
+            params (Dict[str, object]): Query parameters
+
+        Raises:
+            docker.errors.APIError: if the API returns an error
+            asyncio.TimeoutError: if the response did not arrive within the timeout
+
+        Returns:
+            bytes: Response body
+        """
+        request = (
+            "GET /v%s%s?%s HTTP/1.1\r\nHost: docker\r\n\r\n"
+            % (self._api_version, path, urlencode(params))
+        ).encode()
+
+        async with self._connections:
+            status, body = await asyncio.wait_for(self._request(request), self._timeout)
+
+        if status >= 400:
+            raise docker.errors.APIError("%d %s: %s" % (status, path, body.decode(errors="replace")))
+
+        return body
+
+    async def _request(self, request: bytes) -> Tuple[int, bytes]:
+        """Sends a request on an idle or a new connection and reads the response. A connection, which is
+        interrupted by the timeout, is closed.
+
+        Args:
+            request (bytes): Encoded request
+
+        Returns:
+            Tuple[int, bytes]: Status code and response body
+        """
+        while True:
+            reused = bool(self._idle)
+            if reused:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.open_unix_connection(self._socket_path)
+
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers = await self._read_head(reader)
+                body = await self._read_body(reader, headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # The daemon may have closed the idle connection in the meantime
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            break
+
+        if headers.get("connection", "").lower() == "close" or (
+            "content-length" not in headers and "chunked" not in headers.get("transfer-encoding", "")
+        ):
+            writer.close()
+        else:
+            self._idle.append((reader, writer))
+
+        return status, body
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        """Reads the status line and the headers of a response
+
+        Args:
+            reader (asyncio.StreamReader): Connection
+
+        Returns:
+            Tuple[int, Dict[str, str]]: Status code and headers with lowercase names
+        """
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        headers: Dict[str, str] = {}
+        for line in head[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        return int(head[0].split(" ", 2)[1]), headers
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        """Reads the body of a response, either chunked, with a content length or until the connection is closed
+
+        Args:
+            reader (asyncio.StreamReader): Connection
+            headers (Dict[str, str]): Headers of the response
+
+        Returns:
+            bytes: Response body
+        """
+        if "chunked" in headers.get("transfer-encoding", ""):
+            body = bytearray()
+            while size := int((await reader.readuntil(b"\r\n")).split(b";", 1)[0], 16):
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            # Skip the trailers up to the final empty line
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            return bytes(body)
+
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"]))
+
+        return await reader.read()
+
+    def _demultiplex(self, body: bytes) -> bytes:
+        """Containers without TTY send their logs as multiplexed stream: each frame has an 8 byte header with the
+        stream type (0-2), three zero bytes and the big endian frame size. Since every line starts with its timestamp,
+        a raw TTY stream can never start like a frame header.
+
+        Args:
+            body (bytes): Response body of the logs endpoint
+
+        Returns:
+            bytes: Payload of all frames, or the body itself for TTY containers
+        """
+        if len(body) < 8 or body[0] > 2 or body[1:4] != b"\x00\x00\x00":
+            return body
+
+        payload = bytearray()
+        position = 0
+        while position + 8 <= len(body):
+            size = int.from_bytes(body[position + 4 : position + 8], "big")
+            payload += body[position + 8 : position + 8 + size]
+            position += 8 + size
+
+        return bytes(payload)
+
+    async def close(self):
+        """Closes all idle connections"""
+        while self._idle:
+            _reader, writer = self._idle.pop()
+            writer.close()
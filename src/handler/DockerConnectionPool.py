@@ -0,0 +1,133 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import contextlib
+import docker
+import os
+import threading
+import time
+from Config import DOCKMON_CONFIG_DOCKER_POOL_SIZE, DOCKMON_CONFIG_DOCKER_SOCKET
+from handler.Metrics import Metrics, Sample
+from typing import Dict, Iterator, List
+
+
+class DockerConnectionPool:
+    """
+    A Docker client with a fixed number of keep-alive connections to the Docker socket, shared by all threads of a
+    process. API calls take a slot of the pool first, so there are never more concurrent requests than connections
+    and no connection is discarded and reopened. Waiting for a free slot is counted.
+
+    Long-lived streams, like the event stream and followed logs, keep their connection open for hours. They use a
+    separate client, so they neither hold a slot nor a connection of the pool.
+
+    Each process has its own pool, since connections can not be shared across processes.
+    """
+
+    _pools: Dict[int, "DockerConnectionPool"] = {}
+    _pools_lock = threading.Lock()
+
+    # Connections of the stream client, which are kept open after their stream ended
+    _stream_pool_size: int = 100
+
+    @staticmethod
+    def getProcessPool() -> "DockerConnectionPool":
+        """Returns the pool of the current process, e.g. for DockerHandlers unpickled in the process pool
+
+        Raises:
+            docker.errors.DockerException: if the Docker socket is not accessible
+
+        Returns:
+            DockerConnectionPool: Pool of the current process
+        """
+        with DockerConnectionPool._pools_lock:
+            if (pool := DockerConnectionPool._pools.get(os.getpid())) is None:
+                pool = DockerConnectionPool(int(DOCKMON_CONFIG_DOCKER_POOL_SIZE))
+                DockerConnectionPool._pools[os.getpid()] = pool
+                Metrics.getInstance().add_collector(pool._collect_metrics)
+            return pool
+
+    def __init__(self, size: int):
+        """
+        Args:
+            size (int): Number of connections
+
+        Raises:
+            docker.errors.DockerException: if the Docker socket is not accessible
+        """
+        self.size = size
+        self.client: docker.DockerClient = docker.DockerClient(
+            base_url="unix://" + DOCKMON_CONFIG_DOCKER_SOCKET, max_pool_size=size
+        )
+        self.streams: docker.DockerClient = docker.DockerClient(
+            base_url="unix://" + DOCKMON_CONFIG_DOCKER_SOCKET, max_pool_size=self._stream_pool_size
+        )
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._stats_lock = threading.Lock()
+        self._waits = 0
+        self._wait_seconds = 0.0
+
+    @contextlib.contextmanager
+    def slot(self, call: str) -> Iterator[docker.DockerClient]:
+        """Takes a connection slot for one API call. Blocks, if all connections are in use.
+        The duration of the call, without waiting for the slot, is recorded in the metrics.
+
+        Args:
+            call (str): Name of the API call for the metrics, e.g. containers.list
+
+        Yields:
+            Iterator[docker.DockerClient]: The client of the pool
+        """
+        if not self._slots.acquire(blocking=False):
+            start = time.monotonic()
+            self._slots.acquire()
+            with self._stats_lock:
+                self._waits += 1
+                self._wait_seconds += time.monotonic() - start
+
+        start = time.perf_counter()
+        try:
+            yield self.client
+        except Exception:
+            Metrics.getInstance().inc("dockmon_docker_api_errors_total", call=call)
+            raise
+        finally:
+            self._slots.release()
+            Metrics.getInstance().observe(
+                "dockmon_docker_api_duration_seconds", time.perf_counter() - start, call=call
+            )
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: Pool size, number of API calls that had to wait for a slot and the total waiting time
+        """
+        with self._stats_lock:
+            return {"size": self.size, "waits": self._waits, "wait_seconds": self._wait_seconds}
+
+    def _collect_metrics(self) -> List[Sample]:
+        """
+        Returns:
+            List[Sample]: Statistics of the pool for the metrics
+        """
+        stats = self.get_stats()
+        return [
+            ("dockmon_docker_pool_size", {}, stats["size"]),
+            ("dockmon_docker_pool_waits_total", {}, stats["waits"]),
+            ("dockmon_docker_pool_wait_seconds_total", {}, stats["wait_seconds"]),
+        ]
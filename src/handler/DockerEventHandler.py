@@ -0,0 +1,143 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging
+import threading
+from Config import _
+from handler.DockerHandler import DockerHandler
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class DockerEventHandler:
+    """
+    Keeps a single subscription to the Docker event stream and dispatches the container events of all monitored
+    containers to the registered listeners. The subscription is reconnected if it breaks, events that happened in
+    the meantime are replayed. Docker replays all events of the second of the last event, so the events of that
+    second, which were already dispatched, are skipped.
+    """
+
+    _instance = None
+    _dh: DockerHandler = DockerHandler.getInstance()
+
+    # Seconds to wait before a broken event stream is reconnected
+    _reconnect_delay: int = 5
+
+    @staticmethod
+    def getInstance():
+        if DockerEventHandler._instance == None:
+            DockerEventHandler()
+            return DockerEventHandler._instance
+        else:
+            return DockerEventHandler._instance
+
+    def __init__(self):
+        if DockerEventHandler._instance != None:
+            raise Exception("Singleton!")
+        else:
+            self._listeners: List[Tuple[List[str], Callable[[Dict[str, Any]], None]]] = []
+            self._stop = threading.Event()
+            self._stream = None
+            self._thread: Optional[threading.Thread] = None
+
+            # Second of the last event, and the events of that second: time in nanoseconds, container ID and action
+            self._second: Optional[int] = None
+            self._seen: Set[Tuple[int, str, str]] = set()
+            DockerEventHandler._instance = self
+
+    def subscribe(self, actions: List[str], listener: Callable[[Dict[str, Any]], None]):
+        """Registers a listener for container events
+
+        Args:
+            actions (List[str]): Event actions, e.g. start, die or health_status
+            listener (Callable[[Dict[str, Any]], None]): Will be called with the decoded event from the event thread
+        """
+        self._listeners.append((actions, listener))
+
+    def start(self):
+        """Starts the event thread, if it is not already running"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dockmon_events", daemon=True)
+        self._thread.start()
+        logging.info(_("DOCKEREVENTHANDLER_STARTED_EVENT_THREAD"))
+
+    def stop(self):
+        """Stops the event thread"""
+        self._stop.set()
+        if stream := self._stream:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        """Thread target: reads the event stream and dispatches every event to the listeners"""
+        while not self._stop.is_set():
+            try:
+                self._stream = self._dh.get_container_events(self._second)
+                for event in self._stream:
+                    if not self._is_replayed(event):
+                        self._dispatch(event)
+            except Exception as e:
+                logging.error(_("DOCKEREVENTHANDLER_EXCEPTION_STREAM %s") % str(e))
+            finally:
+                self._stream = None
+
+            self._stop.wait(self._reconnect_delay)
+
+    def _is_replayed(self, event: Dict[str, Any]) -> bool:
+        """Checks, if an event was already dispatched before the stream was reconnected
+
+        Args:
+            event (Dict[str, Any]): Decoded Docker event
+
+        Returns:
+            bool: True, if the event was already dispatched
+        """
+        time_nano = int(event.get("timeNano") or int(event.get("time", 0)) * 1000000000)
+        second = time_nano // 1000000000
+        if self._second is not None and second < self._second:
+            return True
+
+        if second != self._second:
+            self._second = second
+            self._seen = set()
+
+        key = (time_nano, event.get("id") or event.get("Actor", {}).get("ID", ""), event.get("Action", ""))
+        if key in self._seen:
+            return True
+
+        self._seen.add(key)
+        return False
+
+    def _dispatch(self, event: Dict[str, Any]):
+        """Calls all listeners subscribed to the action of the event
+
+        Args:
+            event (Dict[str, Any]): Decoded Docker event
+        """
+        # Some actions carry a detail, e.g. "health_status: unhealthy"
+        action = event.get("Action", "").split(":", 1)[0]
+        for actions, listener in self._listeners:
+            if action in actions:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logging.error(_("DOCKEREVENTHANDLER_EXCEPTION_LISTENER %s %s") % (action, str(e)))
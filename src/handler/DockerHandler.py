@@ -18,8 +18,11 @@
 
 import docker
 import logging
-from Config import _
-from typing import Dict, Any
+import threading
+import time
+from Config import _, DOCKMON_CONFIG_SNAPSHOT_TTL
+from handler.DockerConnectionPool import DockerConnectionPool
+from typing import Dict, Any, Optional
 
 
 class DockerHandler:
@@ -29,6 +32,9 @@ class DockerHandler:
 
     _instance = None
 
+    # Label filter for all containers that are monitored by Dockmon
+    _monitoring_label_filter = "io.smclab.dockmon.enabled=True"
+
     @staticmethod
     def getInstance(storageConnector=None):
         if DockerHandler._instance == None:
@@ -41,33 +47,38 @@ class DockerHandler:
     def __getstate__(self):
         state = self.__dict__.copy()
         del state["_client"]  # remove the unpicklable DockerClient
+        del state["_pool"]
+        del state["_snapshot_lock"]  # Locks and the containers of the snapshot can not be pickled either
+        del state["_snapshot"]
+        del state["_snapshot_time"]
         return state
 
     # will be called on unpickling
     def __setstate__(self, state):
         self.__dict__.update(state)
-        try:
-            self._client: docker.DockerClient = docker.DockerClient(
-                base_url="unix://var/run/docker.sock"
-            )
-        except Exception as e:
-            self._client: None = None
-            logging.error(_("DOCKERHANDLER_EXCEPTION_SOCKET_CONNECT" % str(e)))
+        self._init_snapshot()
+        self._connect()
 
     def __init__(self):
         if DockerHandler._instance != None:
             raise Exception("Singleton!")
         else:
-            try:
-                self._client: docker.DockerClient = docker.DockerClient(
-                    base_url="unix://var/run/docker.sock"
-                )
-            except Exception as e:
-                self._client: None = None
-                logging.error(_("DOCKERHANDLER_EXCEPTION_SOCKET_CONNECT" % str(e)))
-
+            self._init_snapshot()
+            self._connect()
             DockerHandler._instance = self
 
+    def _connect(self):
+        """Takes the Docker client from the connection pool of this process. Unpickled instances in the same
+        process share the pool, instead of opening new connections for every job run.
+        """
+        try:
+            self._pool: Optional[DockerConnectionPool] = DockerConnectionPool.getProcessPool()
+            self._client: Optional[docker.DockerClient] = self._pool.client
+        except Exception as e:
+            self._pool = None
+            self._client = None
+            logging.error(_("DOCKERHANDLER_EXCEPTION_SOCKET_CONNECT %s") % str(e))
+
     def check_connection(self) -> bool:
         """Test the connection to the Docker Socket
 
@@ -79,7 +90,8 @@ class DockerHandler:
             return False
 
         try:
-            self._client.info()
+            with self._pool.slot("info") as client:
+                client.info()
         except docker.errors.APIError:
             logging.error(_("DOCKERHANDLER_EXCEPTION_API_ERROR"))
             return False
@@ -87,6 +99,44 @@ class DockerHandler:
         logging.info(_("DOCKERHANDLER_SOCKET_CONNECTION_ACCEPTED"))
         return True
 
+    def _init_snapshot(self):
+        """Initializes an empty container snapshot"""
+        self._snapshot: Dict[str, docker.models.containers.Container] = {}
+        self._snapshot_time: float = 0.0
+        self._snapshot_lock = threading.Lock()
+
+    def _get_snapshot(self) -> Dict[str, docker.models.containers.Container]:
+        """Returns a snapshot of all containers with the Label io.smclab.dockmon.enabled = true, including stopped ones.
+        The snapshot is refreshed with a single list call, once it is older than DOCKMON_CONFIG_SNAPSHOT_TTL seconds,
+        and shared by all threads. The container objects are sparse, so they only carry the attributes of the list call.
+
+        Returns:
+            Dict[str, docker.models.containers.Container]: Container objects by name and by ID
+        """
+        if time.monotonic() - self._snapshot_time < float(DOCKMON_CONFIG_SNAPSHOT_TTL):
+            return self._snapshot
+
+        with self._snapshot_lock:
+            # Another thread may have refreshed the snapshot while we were waiting
+            if time.monotonic() - self._snapshot_time < float(DOCKMON_CONFIG_SNAPSHOT_TTL):
+                return self._snapshot
+
+            with self._pool.slot("containers.list") as client:
+                containers = client.containers.list(
+                    all=True, sparse=True, filters={"label": [self._monitoring_label_filter]}
+                )
+
+            snapshot: Dict[str, docker.models.containers.Container] = {}
+            for container in containers:
+                snapshot[container.id] = container
+                for name in container.attrs.get("Names") or []:
+                    snapshot[name.lstrip("/")] = container
+
+            self._snapshot = snapshot
+            self._snapshot_time = time.monotonic()
+
+        return snapshot
+
     def get_docker_handle(self) -> docker.DockerClient:
         """Returns the Docker Client handle
 
@@ -104,8 +154,13 @@ class DockerHandler:
         Returns:
             docker.models.containers.Container: Docker Container Object
         """
+        if container := self._get_snapshot().get(container_name):
+            return container
+
+        # Not part of the snapshot yet, e.g. the container was just started
         try:
-            return self._client.containers.get(container_name)
+            with self._pool.slot("containers.get") as client:
+                return client.containers.get(container_name)
         except docker.errors.NotFound:
             logging.error(_("DOCKERHANDLER_EXCEPTION_CONTAINER_NOT_FOUND"))
             return None
@@ -119,12 +174,13 @@ class DockerHandler:
         Returns:
             bool: True, if Container is still running
         """
-        try:
-            container: docker.models.containers.Container = self._client.containers.get(
-                container_name
-            )
-        except docker.errors.NotFound:
-            return False
+        if not (container := self._get_snapshot().get(container_name)):
+            # Not part of the snapshot yet, e.g. the container was just started
+            try:
+                with self._pool.slot("containers.get") as client:
+                    container = client.containers.get(container_name)
+            except docker.errors.NotFound:
+                return False
 
         if container.status == "running":
             return True
@@ -141,10 +197,61 @@ class DockerHandler:
         """
 
         containers: Dict[str, Dict[str, Any]] = {}
-        for container in self._client.containers.list(
-            filters={"label": ["io.smclab.dockmon.enabled=True"], "status": "running"}
-        ):
-            container_name = container.name or container.id
-            containers[container_name] = container.labels
+        for container in set(self._get_snapshot().values()):
+            if container.status == "running":
+                names = container.attrs.get("Names") or []
+                container_name = names[0].lstrip("/") if names else container.id
+                containers[container_name] = container.attrs.get("Labels") or {}
 
         return containers
+
+    def get_container_logs(self, container: docker.models.containers.Container, **kwargs) -> bytes:
+        """Fetches the logs of a container through a slot of the connection pool
+
+        Args:
+            container (docker.models.containers.Container): Docker Container Object
+            **kwargs: Arguments of container.logs(). Use follow_container_logs() for streams.
+
+        Returns:
+            bytes: Logs
+        """
+        with self._pool.slot("container.logs"):
+            return container.logs(**kwargs)
+
+    def follow_container_logs(
+        self, container: docker.models.containers.Container, **kwargs
+    ) -> docker.types.CancellableStream:
+        """Follows the logs of a container. Streams keep their connection open, so they use the stream client
+        instead of a slot of the connection pool.
+
+        Args:
+            container (docker.models.containers.Container): Docker Container Object
+            **kwargs: Arguments of container.logs()
+
+        Returns:
+            docker.types.CancellableStream: Stream of log chunks
+        """
+        return self._pool.streams.api.logs(container.id, stream=True, follow=True, **kwargs)
+
+    def get_pool_stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: Size of the connection pool and the API calls that had to wait for a free connection
+        """
+        return self._pool.get_stats() if self._pool else {}
+
+    def get_container_events(self, since: Optional[int] = None) -> docker.types.CancellableStream:
+        """Subscribes to the Docker event stream for all Containers with the Label io.smclab.dockmon.enabled = true.
+        The stream blocks until the next event arrives and can be closed from another thread.
+
+        Args:
+            since (Optional[int], optional): Replay events since this unix timestamp. Defaults to None.
+
+        Returns:
+            docker.types.CancellableStream: Stream of decoded events
+        """
+        return self._pool.streams.events(
+            since=since,
+            decode=True,
+            filters={"type": "container", "label": [self._monitoring_label_filter]},
+        )
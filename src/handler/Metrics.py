@@ -0,0 +1,246 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import bisect
+import logging
+import threading
+from Config import _, DOCKMON_CONFIG_METRICS_PORT
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Labels of a sample, sorted by name
+Labels = Tuple[Tuple[str, str], ...]
+
+# Sample of a collector: metric name, labels and value
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the metrics in the Prometheus text format on /metrics"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = Metrics.getInstance().render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Metrics:
+    """
+    Counters and histograms of DockMon, served in the Prometheus text format on DOCKMON_CONFIG_METRICS_PORT.
+    Values that are kept elsewhere, like the statistics of the connection pool, are read by collectors on every
+    scrape.
+    """
+
+    _instance = None
+
+    # Type and description of all metrics
+    _metrics: Dict[str, Tuple[str, str]] = {
+        "dockmon_check_duration_seconds": ("histogram", "Duration of the checks per monitor type"),
+        "dockmon_check_seconds_total": ("counter", "Time spent in the checks per container"),
+        "dockmon_check_phase_seconds": (
+            "histogram",
+            "Duration of the phases of the checks, for containers with the label logs.profile",
+        ),
+        "dockmon_check_interval_seconds": (
+            "gauge",
+            "Current check interval of the containers with the label checkinterval.adaptive",
+        ),
+        "dockmon_log_bytes_total": ("counter", "Log bytes scanned per container"),
+        "dockmon_log_lines_total": ("counter", "Log lines scanned per container"),
+        "dockmon_log_templates": ("gauge", "Log templates per container, with the label logs.detector: templates"),
+        "dockmon_container_cpu_percent": ("gauge", "CPU usage in percent of one core, with the label stats"),
+        "dockmon_container_memory_percent": ("gauge", "Memory usage in percent of the limit, with the label stats"),
+        "dockmon_docker_api_duration_seconds": ("histogram", "Duration of the Docker API calls"),
+        "dockmon_docker_api_errors_total": ("counter", "Failed Docker API calls"),
+        "dockmon_docker_pool_size": ("gauge", "Connections of the Docker connection pool"),
+        "dockmon_docker_pool_waits_total": ("counter", "Docker API calls, which waited for a free connection"),
+        "dockmon_docker_pool_wait_seconds_total": ("counter", "Time waited for a free Docker connection"),
+        "dockmon_scheduler_lag_seconds": ("histogram", "Delay between the scheduled run time and the submission"),
+        "dockmon_scheduler_completion_seconds": (
+            "histogram",
+            "Time between the scheduled run time and the end of a job, including the wait for a worker thread",
+        ),
+        "dockmon_scheduler_missed_runs_total": ("counter", "Runs missed by more than the misfire grace time"),
+        "dockmon_scheduler_coalesced_runs_total": ("counter", "Runs merged into a later run"),
+        "dockmon_scheduler_skipped_runs_total": ("counter", "Runs skipped, since max_instances were running"),
+        "dockmon_slack_send_duration_seconds": ("histogram", "Duration of the requests to the Slack API"),
+        "dockmon_slack_messages_total": ("counter", "Messages sent to Slack"),
+        "dockmon_slack_alerts_total": ("counter", "Alerts sent to Slack"),
+        "dockmon_slack_failures_total": ("counter", "Failed requests to the Slack API"),
+        "dockmon_slack_suppressed_total": ("counter", "Alerts suppressed by a grace period per container"),
+        "dockmon_slack_queue_length": ("gauge", "Alerts waiting to be sent to Slack"),
+    }
+
+    # Upper bounds of the histogram buckets in seconds
+    _buckets: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    @staticmethod
+    def getInstance():
+        if Metrics._instance == None:
+            Metrics()
+            return Metrics._instance
+        else:
+            return Metrics._instance
+
+    def __init__(self):
+        if Metrics._instance != None:
+            raise Exception("Singleton!")
+        else:
+            self._lock = threading.Lock()
+            self._counters: Dict[str, Dict[Labels, float]] = {}
+            # Per histogram and labels: count per bucket (the last one is +Inf), sum
+            self._histograms: Dict[str, Dict[Labels, Tuple[List[int], List[float]]]] = {}
+            self._collectors: List[Callable[[], Iterable[Sample]]] = []
+            self._server: Optional[ThreadingHTTPServer] = None
+            Metrics._instance = self
+
+    def inc(self, name: str, value: float = 1.0, **labels: str):
+        """Increments a counter
+
+        Args:
+            name (str): Name of the counter
+            value (float, optional): Increment. Defaults to 1.0.
+            **labels (str): Labels of the sample
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            samples = self._counters.setdefault(name, {})
+            samples[key] = samples.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Adds a value to a histogram
+
+        Args:
+            name (str): Name of the histogram
+            value (float): Observed value in seconds
+            **labels (str): Labels of the sample
+        """
+        key = tuple(sorted(labels.items()))
+        bucket = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            samples = self._histograms.setdefault(name, {})
+            if (sample := samples.get(key)) is None:
+                sample = samples[key] = ([0] * (len(self._buckets) + 1), [0.0])
+            sample[0][bucket] += 1
+            sample[1][0] += value
+
+    def remove(self, **labels: str):
+        """Removes all samples of counters and histograms, which have these labels, e.g. of a removed container
+
+        Args:
+            **labels (str): Labels of the samples
+        """
+        selected = set(labels.items())
+        with self._lock:
+            for samples in list(self._counters.values()) + list(self._histograms.values()):
+                for key in [key for key in samples if selected.issubset(key)]:
+                    del samples[key]
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Adds a function, which returns samples of counters or gauges on every scrape
+
+        Args:
+            collector (Callable[[], Iterable[Sample]]): Returns tuples of name, labels and value
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _format_labels(self, labels: Iterable[Tuple[str, str]]) -> str:
+        """
+        Args:
+            labels (Iterable[Tuple[str, str]]): Labels of a sample
+
+        Returns:
+            str: Labels in the text format, e.g. {container="web"}
+        """
+        formatted = ",".join(
+            '%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in labels
+        )
+        return "{%s}" % formatted if formatted else ""
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: All metrics in the Prometheus text format
+        """
+        collected: Dict[str, Dict[Labels, float]] = {}
+        for collector in list(self._collectors):
+            try:
+                for name, labels, value in collector():
+                    collected.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+            except Exception as e:
+                logging.error(_("METRICS_EXCEPTION_COLLECTOR %s") % str(e))
+
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, description) in self._metrics.items():
+                counters = self._counters.get(name, {})
+                histograms = self._histograms.get(name, {})
+                if not (counters or histograms or name in collected):
+                    continue
+
+                lines.append("# HELP %s %s" % (name, description))
+                lines.append("# TYPE %s %s" % (name, kind))
+
+                for labels, value in list(counters.items()) + list(collected.get(name, {}).items()):
+                    lines.append("%s%s %s" % (name, self._format_labels(labels), repr(float(value))))
+
+                for labels, (buckets, total) in histograms.items():
+                    cumulative = 0
+                    for bound, count in zip(self._buckets + (float("inf"),), buckets):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(
+                            "%s_bucket%s %d" % (name, self._format_labels(labels + (("le", le),)), cumulative)
+                        )
+                    lines.append("%s_sum%s %s" % (name, self._format_labels(labels), repr(total[0])))
+                    lines.append("%s_count%s %d" % (name, self._format_labels(labels), cumulative))
+
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        """Starts serving the metrics, if DOCKMON_CONFIG_METRICS_PORT is set"""
+        if self._server or not DOCKMON_CONFIG_METRICS_PORT:
+            return
+
+        try:
+            self._server = ThreadingHTTPServer(("", int(DOCKMON_CONFIG_METRICS_PORT)), MetricsRequestHandler)
+        except OSError as e:
+            logging.error(_("METRICS_EXCEPTION_START %s") % str(e))
+            return
+
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="dockmon_metrics", daemon=True).start()
+        logging.info(_("METRICS_STARTED %s") % DOCKMON_CONFIG_METRICS_PORT)
+
+    def stop(self):
+        """Stops serving the metrics"""
+        if server := self._server:
+            self._server = None
+            server.shutdown()
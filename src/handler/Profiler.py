@@ -0,0 +1,146 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from Config import _, DOCKMON_CONFIG_PROFILE_DIR, DOCKMON_CONFIG_PROFILE_DURATION
+from typing import Dict, List, Optional
+
+
+class Profiler:
+    """
+    Sampling profiler for all threads of DockMon, toggled by SIGUSR1. While it runs, the stacks of all threads are
+    sampled a hundred times per second. After DOCKMON_CONFIG_PROFILE_DURATION seconds, or on the next SIGUSR1, the
+    samples are written as collapsed stacks to DOCKMON_CONFIG_PROFILE_DIR, which can be rendered by flamegraph.pl
+    or speedscope.
+
+    Nothing runs, until the signal is received.
+    """
+
+    _instance = None
+
+    # Seconds between two samples
+    _sample_interval: float = 0.01
+
+    # Numbers at the end of thread names, so the threads of a pool are merged
+    _thread_number = re.compile(r"[_-]?\d+$")
+
+    @staticmethod
+    def getInstance():
+        if Profiler._instance == None:
+            Profiler()
+            return Profiler._instance
+        else:
+            return Profiler._instance
+
+    def __init__(self):
+        if Profiler._instance != None:
+            raise Exception("Singleton!")
+        else:
+            self._lock = threading.Lock()
+            self._stop: Optional[threading.Event] = None
+            Profiler._instance = self
+
+    def install(self):
+        """Registers the signal handler. Must be called from the main thread."""
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.toggle())
+
+    def toggle(self):
+        """Starts a profiling session, or stops the running one"""
+        with self._lock:
+            if self._stop:
+                self._stop.set()
+                self._stop = None
+                return
+
+            self._stop = threading.Event()
+            threading.Thread(
+                target=self._run, args=(self._stop,), name="dockmon_profiler", daemon=True
+            ).start()
+
+    def _run(self, stop: threading.Event):
+        """Thread target of a profiling session
+
+        Args:
+            stop (threading.Event): Ends the session early, if set
+        """
+        logging.info(_("PROFILER_STARTED %s") % DOCKMON_CONFIG_PROFILE_DURATION)
+
+        started = time.time()
+        samples: Dict[str, int] = {}
+        deadline = time.monotonic() + float(DOCKMON_CONFIG_PROFILE_DURATION)
+        while not stop.wait(self._sample_interval) and time.monotonic() < deadline:
+            self._sample(samples)
+
+        with self._lock:
+            if self._stop is stop:
+                self._stop = None
+
+        self._write(started, samples)
+
+    def _sample(self, samples: Dict[str, int]):
+        """Adds the current stack of every thread to the samples
+
+        Args:
+            samples (Dict[str, int]): Number of samples per collapsed stack
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        current = threading.get_ident()
+
+        for ident, frame in sys._current_frames().items():
+            if ident == current:
+                continue
+
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("%s (%s)" % (code.co_name, os.path.basename(code.co_filename)))
+                frame = frame.f_back
+            stack.append(self._thread_number.sub("", names.get(ident, "unknown")))
+
+            collapsed = ";".join(reversed(stack))
+            samples[collapsed] = samples.get(collapsed, 0) + 1
+
+    def _write(self, started: float, samples: Dict[str, int]):
+        """Writes the samples as collapsed stacks, one stack and its number of samples per line
+
+        Args:
+            started (float): Unix timestamp of the start of the session, which names the file
+            samples (Dict[str, int]): Number of samples per collapsed stack
+        """
+        name = "dockmon-%s-%03d.collapsed" % (
+            time.strftime("%Y%m%d-%H%M%S", time.localtime(started)),
+            int(started * 1000) % 1000,
+        )
+        path = os.path.join(DOCKMON_CONFIG_PROFILE_DIR, name)
+        try:
+            os.makedirs(DOCKMON_CONFIG_PROFILE_DIR, exist_ok=True)
+            with open(path, "w") as f:
+                for stack, count in sorted(samples.items(), key=lambda x: -x[1]):
+                    f.write("%s %d\n" % (stack, count))
+        except OSError as e:
+            logging.error(_("PROFILER_EXCEPTION_WRITE %s") % str(e))
+            return
+
+        logging.info(_("PROFILER_WRITTEN %s") % path)
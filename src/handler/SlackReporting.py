@@ -15,17 +15,24 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
-import datetime
+import heapq
 import json
 import logging
-import os
+import queue
 import requests
+import threading
+import time
 from Config import (
     _,
     DOCKMON_CONFIG_GRACEPERIOD,
+    DOCKMON_CONFIG_SLACK_API_URL,
     DOCKMON_CONFIG_SLACK_CHANNEL,
+    DOCKMON_CONFIG_SLACK_DIGEST_WINDOW,
+    DOCKMON_CONFIG_SLACK_QUEUE_SIZE,
     DOCKMON_CONFIG_SLACK_TOKEN,
 )
+from handler.Metrics import Metrics, Sample
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 # from dotenv import load_dotenv
 # load_dotenv()
@@ -34,10 +41,39 @@ from Config import (
 class SlackReport:
     """
     Automated Slack reporting.
+
+    Reports are put on a bounded queue and sent by a background thread, so a slow Slack API never blocks the
+    scheduler. The sender reuses one HTTP session, sends at most one message per second and coalesces the alerts,
+    which pile up while it waits for the rate limit, into a single digest message. An alert on an idle queue is sent
+    at once.
+
+    The grace period of an alert starts, when it was delivered. Until then, further alerts of the same trigger are
+    suppressed as in flight, and they are sent again, if the delivery failed.
     """
 
     _instance = None
-    _grace_periods: list = []
+
+    # Grace periods of sent alerts: (container, trigger) -> unix timestamp, until the alert is suppressed.
+    # The heap orders the same entries by expiry, so expired entries are removed without scanning all alerts.
+    # Entries of the heap, which were replaced by a newer grace period, are skipped.
+    _grace_periods: Dict[Tuple[str, str], float] = {}
+    _grace_heap: List[Tuple[float, Tuple[str, str]]] = []
+    _grace_lock: threading.Lock = threading.Lock()
+
+    # Alerts, which are queued or being sent: (container, trigger)
+    _in_flight: Set[Tuple[str, str]] = set()
+
+    # Slack allows about one message per second and channel
+    _min_post_interval: float = 1.0
+
+    # Alerts per digest message, Slack accepts at most 100 attachments
+    _max_digest_alerts: int = 20
+
+    # Retries of a message, if Slack is rate limiting or not reachable
+    _max_retries: int = 5
+
+    # Connect and read timeout of the Slack API in seconds
+    _timeout = (5, 30)
 
     @staticmethod
     def getInstance():
@@ -51,86 +87,229 @@ class SlackReport:
         if SlackReport._instance != None:
             raise Exception("Singleton!")
         else:
+            # None stops the sender
+            self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(
+                maxsize=int(DOCKMON_CONFIG_SLACK_QUEUE_SIZE)
+            )
+            self._session = requests.Session()
+            self._session.headers.update({"Content-Type": "application/x-www-form-urlencoded"})
+            self._last_post: float = 0.0
+
+            self._sender = threading.Thread(target=self._run_sender, name="dockmon_slack", daemon=True)
+            self._sender.start()
+
+            Metrics.getInstance().add_collector(self._collect_metrics)
             SlackReport._instance = self
 
-    def _get_unix_time_stamp_for_grace_period(self) -> int:
-        return int(
-            (
-                datetime.datetime.today()
-                + datetime.timedelta(seconds=int(DOCKMON_CONFIG_GRACEPERIOD))
-            ).timestamp()
-        )
+    def _expire_grace_periods(self, now: float):
+        """Removes all expired grace periods. Must be called with the grace lock held.
+
+        Args:
+            now (float): Current unix timestamp
+        """
+        while self._grace_heap and self._grace_heap[0][0] <= now:
+            until, key = heapq.heappop(self._grace_heap)
+            if self._grace_periods.get(key) == until:
+                del self._grace_periods[key]
 
-    def send_slack_info_report(self, container: str, trigger: str, report: str) -> bool:
-        """Sends the Slack Message
+    def send_slack_info_report(
+        self, container: str, trigger: str, report: str, grace_period: Optional[int] = None
+    ) -> bool:
+        """Queues the Slack Message. It is sent by the background sender, possibly together with other alerts.
 
         Args:
             container (str): Container Name / Identifier
             trigger (str): Triggername
             report (str): Report Text
-            action (tuple, optional): _description_. Defaults to ("None", "#ED2525").
+            grace_period (Optional[int], optional): Seconds, in which the same alert is not sent again.
+                                                    Defaults to DOCKMON_CONFIG_GRACEPERIOD.
 
         Returns:
-            bool: True, if report was send successfully
+            bool: True, if report was queued successfully
         """
+        key = (container, trigger)
+        now = time.time()
 
-        # Check if this notification is currently under a grace period and should therefore not be triggered again.
-        for alert in self._grace_periods:
-            if alert.get("container", "") == container and alert.get("trigger", "") == trigger:
-                # We found a Grace Period for this Alert. Check if it is expired, if so remove it.
-                if alert.get("graceUntil") < int(datetime.datetime.today().timestamp()):
-                    self._grace_periods.remove(alert)
-                else:
-                    # Grace Period is still valid, return
-                    logging.info(_("SLACKREPORT_GRACE_PERIOD_NOT_EXPIRED"))
-                    return False
+        # The check and the queueing are one step, so concurrent alerts of the same trigger are sent once
+        with self._grace_lock:
+            self._expire_grace_periods(now)
 
+            # Check if this notification is currently under a grace period or on its way, and should therefore not be
+            # triggered again.
+            if key in self._grace_periods or key in self._in_flight:
+                Metrics.getInstance().inc("dockmon_slack_suppressed_total", container=container)
+                logging.info(_("SLACKREPORT_GRACE_PERIOD_NOT_EXPIRED"))
+                return False
+
+            try:
+                self._queue.put_nowait(
+                    {
+                        "container": container,
+                        "trigger": trigger,
+                        "report": report,
+                        "ts": int(now),
+                        "graceperiod": int(DOCKMON_CONFIG_GRACEPERIOD if grace_period is None else grace_period),
+                    }
+                )
+            except queue.Full:
+                logging.error(_("SLACKREPORT_EXCEPTION_QUEUE_FULL %s") % container)
+                return False
+
+            self._in_flight.add(key)
+
+        return True
+
+    def _delivered(self, batch: List[Dict[str, Any]], ok: bool):
+        """Starts the grace periods of the alerts of a message, if it was delivered. Alerts of a failed message can
+        be sent again.
+
+        Args:
+            batch (List[Dict[str, Any]]): Alerts of the message
+            ok (bool): True, if the message was delivered
+        """
+        now = time.time()
+        with self._grace_lock:
+            for alert in batch:
+                key = (alert["container"], alert["trigger"])
+                self._in_flight.discard(key)
+                if ok:
+                    until = now + alert["graceperiod"]
+                    self._grace_periods[key] = until
+                    heapq.heappush(self._grace_heap, (until, key))
+
+    def _collect_metrics(self) -> List[Sample]:
+        """
+        Returns:
+            List[Sample]: Length of the queue for the metrics
+        """
+        return [("dockmon_slack_queue_length", {}, self._queue.qsize())]
+
+    def stop(self, timeout: float = 10.0):
+        """Sends the queued alerts and stops the sender, e.g. on shutdown
+
+        Args:
+            timeout (float, optional): Seconds to wait for the queued alerts. Defaults to 10.0.
+        """
         try:
-            url = "https://slack.com/api/chat.postMessage"
-            headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
-            data = {
-                "token": DOCKMON_CONFIG_SLACK_TOKEN,
-                "channel": DOCKMON_CONFIG_SLACK_CHANNEL,
-                "attachments": json.dumps(
-                    [
-                        {
-                            "mrkdwn_in": ["text"],
-                            "color": "#ED2525",
-                            "text": _("SLACKREPORT_TRIGGER_MESSAGE %s") % container,
-                            "fields": [
-                                {"type": "divider"},
-                                {
-                                    "title": _("SLACKREPORT_HEADER_TRIGGER"),
-                                    "value": trigger,
-                                    "short": False,
-                                },
-                                {
-                                    "title": _("SLACKREPORT_HEADER_REPORT"),
-                                    "value": "``` %.1500s ```" % report,
-                                    "short": False,
-                                },
-                            ],
-                            "footer": "Docker Monitoring",
-                            "ts": int((datetime.datetime.today()).timestamp()),
-                        }
-                    ]
-                ),
-            }
-
-            res = requests.post(url, data, headers)
-            if not res.json().get("ok"):
-                logging.error(_("SLACKREPORT_EXCEPTION_API_ERROR %s") % str(res.text))
-
-            # Add Grace Period
-            self._grace_periods.append(
-                {
-                    "container": container,
-                    "trigger": trigger,
-                    "graceUntil": self._get_unix_time_stamp_for_grace_period(),
-                }
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._sender.join(timeout)
+
+    def _run_sender(self):
+        """Thread target of the sender. Takes the next alert and collects all further alerts, which arrive until the
+        rate limit allows the next message, or within DOCKMON_CONFIG_SLACK_DIGEST_WINDOW, and sends them as one
+        message. Without a digest window, an alert is sent at once, if the last message is older than a second.
+        """
+        while (alert := self._queue.get()) is not None:
+            batch = [alert]
+            deadline = max(
+                time.monotonic() + float(DOCKMON_CONFIG_SLACK_DIGEST_WINDOW),
+                self._last_post + self._min_post_interval,
             )
-            return True
-        except Exception as e:
-            logging.error(_("SLACKREPORT_EXCEPTION_API_ERROR %s") % str(e))
-            return False
+
+            stopping = False
+            while len(batch) < self._max_digest_alerts:
+                try:
+                    alert = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stopping = True
+                    break
+                batch.append(alert)
+
+            ok = False
+            try:
+                ok = self._post(batch)
+            except Exception as e:
+                logging.error(_("SLACKREPORT_EXCEPTION_API_ERROR %s") % str(e))
+            finally:
+                self._delivered(batch, ok)
+
+            if stopping:
+                break
+
+    def _build_attachment(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Args:
+            alert (Dict[str, Any]): Queued alert
+
+        Returns:
+            Dict[str, Any]: Slack attachment of the alert
+        """
+        return {
+            "mrkdwn_in": ["text"],
+            "color": "#ED2525",
+            "text": _("SLACKREPORT_TRIGGER_MESSAGE %s") % alert["container"],
+            "fields": [
+                {"type": "divider"},
+                {
+                    "title": _("SLACKREPORT_HEADER_TRIGGER"),
+                    "value": alert["trigger"],
+                    "short": False,
+                },
+                {
+                    "title": _("SLACKREPORT_HEADER_REPORT"),
+                    "value": "``` %.1500s ```" % alert["report"],
+                    "short": False,
+                },
+            ],
+            "footer": "Docker Monitoring",
+            "ts": alert["ts"],
+        }
+
+    def _post(self, batch: List[Dict[str, Any]]) -> bool:
+        """Sends one message with all alerts of the batch. Rate limited requests (HTTP 429) are retried after the
+        time requested by Slack, connection errors with an exponential backoff.
+
+        Args:
+            batch (List[Dict[str, Any]]): Queued alerts
+
+        Returns:
+            bool: True, if the message was sent successfully
+        """
+        data = {
+            "token": DOCKMON_CONFIG_SLACK_TOKEN,
+            "channel": DOCKMON_CONFIG_SLACK_CHANNEL,
+            "attachments": json.dumps([self._build_attachment(alert) for alert in batch]),
+        }
+        if len(batch) > 1:
+            data["text"] = _("SLACKREPORT_DIGEST_MESSAGE %d") % len(batch)
+
+        for attempt in range(self._max_retries + 1):
+            if (wait := self._last_post + self._min_post_interval - time.monotonic()) > 0:
+                time.sleep(wait)
+            self._last_post = time.monotonic()
+
+            metrics = Metrics.getInstance()
+            try:
+                res = self._session.post(DOCKMON_CONFIG_SLACK_API_URL, data=data, timeout=self._timeout)
+            except requests.RequestException as e:
+                metrics.inc("dockmon_slack_failures_total")
+                logging.error(_("SLACKREPORT_EXCEPTION_API_ERROR %s") % str(e))
+                delay = 2.0 ** attempt
+            else:
+                metrics.observe("dockmon_slack_send_duration_seconds", time.monotonic() - self._last_post)
+                if res.status_code != 429:
+                    try:
+                        ok = bool(res.json().get("ok"))
+                    except ValueError:
+                        ok = False
+                    if ok:
+                        metrics.inc("dockmon_slack_messages_total")
+                        metrics.inc("dockmon_slack_alerts_total", len(batch))
+                    else:
+                        metrics.inc("dockmon_slack_failures_total")
+                        logging.error(_("SLACKREPORT_EXCEPTION_API_ERROR %s") % str(res.text))
+                    return ok
+
+                metrics.inc("dockmon_slack_failures_total")
+
+                delay = float(res.headers.get("Retry-After", 2.0 ** attempt))
+                logging.warning(_("SLACKREPORT_RATE_LIMITED %s") % delay)
+
+            time.sleep(delay)
+
+        logging.error(_("SLACKREPORT_EXCEPTION_DELIVERY_FAILED %d") % len(batch))
+        return False
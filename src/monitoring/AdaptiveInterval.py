@@ -0,0 +1,100 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class AdaptiveInterval:
+    """
+    Check interval of a container, which follows the rate of its new log bytes. Containers without new logs back off
+    exponentially up to the maximum. Containers with new logs are checked at least every checkinterval, busy ones
+    more often, so each check reads about _target_bytes, but never more often than the minimum.
+
+    The monitors record their new log bytes with record(), the scheduler asks for the next interval after each run.
+    """
+
+    # New log bytes per check, which the interval of busy containers aims for
+    _target_bytes: int = 256 * 1024
+
+    # New log bytes of the last check per container, until the next interval is computed
+    _new_bytes: Dict[str, int] = {}
+    _new_bytes_lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def record(container_name: str, new_bytes: int):
+        """Records the new log bytes of a check
+
+        Args:
+            container_name (str): Container Name
+            new_bytes (int): New log bytes of the check
+        """
+        with AdaptiveInterval._new_bytes_lock:
+            AdaptiveInterval._new_bytes[container_name] = new_bytes
+
+    @staticmethod
+    def forget(container_name: str):
+        """Drops the recorded bytes of a container, which is no longer monitored
+
+        Args:
+            container_name (str): Container Name
+        """
+        with AdaptiveInterval._new_bytes_lock:
+            AdaptiveInterval._new_bytes.pop(container_name, None)
+
+    def __init__(self, container_name: str, interval: int, minimum: int, maximum: int):
+        """
+        Args:
+            container_name (str): Container Name
+            interval (int): Label checkinterval, the longest interval of containers with new logs
+            minimum (int): Shortest interval in seconds
+            maximum (int): Longest interval in seconds, reached by containers without new logs
+        """
+        self.container_name = container_name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.base = min(max(interval, self.minimum), self.maximum)
+        self.interval = self.base
+        self._last = time.monotonic()
+
+    def next_interval(self) -> Optional[int]:
+        """Computes the interval after a check from its recorded new log bytes
+
+        Returns:
+            Optional[int]: The new interval in seconds, or None if it did not change or nothing was recorded
+        """
+        with self._new_bytes_lock:
+            new_bytes = self._new_bytes.pop(self.container_name, None)
+
+        now = time.monotonic()
+        elapsed, self._last = now - self._last, now
+        if new_bytes is None:
+            return None
+
+        if new_bytes == 0:
+            interval = min(self.interval * 2, self.maximum)
+        else:
+            rate = new_bytes / max(elapsed, 1.0)
+            interval = max(min(self.base, int(self._target_bytes / rate)), self.minimum)
+
+        if interval == self.interval:
+            return None
+
+        self.interval = interval
+        return interval
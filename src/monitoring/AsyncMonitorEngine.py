@@ -0,0 +1,212 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import traceback
+from Config import _, DOCKMON_CONFIG_ASYNC_CONCURRENCY, DOCKMON_CONFIG_DOCKER_SOCKET
+from handler.AsyncDockerClient import AsyncDockerClient
+from monitoring.AdaptiveInterval import AdaptiveInterval
+from monitoring.Modules.MonitorBase import Monitor
+from typing import Callable, Dict, List, Optional
+
+
+class AsyncMonitorEngine:
+    """
+    Alternative to the interval jobs of the scheduler: runs the checks of all monitors as coroutines on a single
+    event loop in one thread. The Docker API is accessed over the unix socket with at most
+    DOCKMON_CONFIG_ASYNC_CONCURRENCY concurrent checks, so thousands of containers need neither thousands of threads
+    nor wait for a free worker of the thread pool.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def getInstance():
+        if AsyncMonitorEngine._instance == None:
+            AsyncMonitorEngine()
+            return AsyncMonitorEngine._instance
+        else:
+            return AsyncMonitorEngine._instance
+
+    def __init__(self):
+        if AsyncMonitorEngine._instance != None:
+            raise Exception("Singleton!")
+        else:
+            self._monitors: Dict[str, Monitor] = {}
+            self._monitors_lock = threading.Lock()
+            self._tasks: Dict[str, asyncio.Task] = {}  # Only accessed from the event loop
+            self._report: Optional[Callable[[str, dict], None]] = None
+
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="dockmon_async", daemon=True)
+            self._thread.start()
+
+            # The client and the concurrency limit belong to the event loop, so they are created inside it
+            asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+            AsyncMonitorEngine._instance = self
+
+    async def _setup(self):
+        concurrency = int(DOCKMON_CONFIG_ASYNC_CONCURRENCY)
+        self._client = AsyncDockerClient(DOCKMON_CONFIG_DOCKER_SOCKET, concurrency)
+        self._limit = asyncio.Semaphore(concurrency)
+
+    def set_reporter(self, report: Callable[[str, dict], None]):
+        """Sets the function that reports alerts. It is called in a worker thread, so it may block.
+
+        Args:
+            report (Callable[[str, dict], None]): Will be called with the container name and the alert
+        """
+        self._report = report
+
+    def add(
+        self,
+        container_name: str,
+        monitor: Monitor,
+        interval: int,
+        adaptive: Optional[AdaptiveInterval] = None,
+        phase: Optional[float] = None,
+    ):
+        """Starts checking a monitor every interval seconds
+
+        Args:
+            container_name (str): Container Name
+            monitor (Monitor): Configured Monitor of the container
+            interval (int): Check interval in seconds
+            adaptive (Optional[AdaptiveInterval], optional): Adapts the interval after each check. Defaults to None.
+            phase (Optional[float], optional): Check at this fraction of each interval, counted from the unix
+                                               epoch, instead of every interval after the start. Defaults to None.
+        """
+        with self._monitors_lock:
+            self._monitors[container_name] = monitor
+        self._loop.call_soon_threadsafe(self._start_task, container_name, monitor, interval, adaptive, phase)
+
+    def remove(self, container_name: str):
+        """Stops checking the monitor of a container
+
+        Args:
+            container_name (str): Container Name
+        """
+        with self._monitors_lock:
+            self._monitors.pop(container_name, None)
+        self._loop.call_soon_threadsafe(self._cancel_task, container_name)
+
+    def has(self, container_name: str) -> bool:
+        """
+        Args:
+            container_name (str): Container Name
+
+        Returns:
+            bool: True, if the container is monitored by this engine
+        """
+        with self._monitors_lock:
+            return container_name in self._monitors
+
+    def get_container_names(self) -> List[str]:
+        """
+        Returns:
+            List[str]: Names of all containers monitored by this engine
+        """
+        with self._monitors_lock:
+            return list(self._monitors.keys())
+
+    def _start_task(
+        self,
+        container_name: str,
+        monitor: Monitor,
+        interval: int,
+        adaptive: Optional[AdaptiveInterval],
+        phase: Optional[float],
+    ):
+        self._cancel_task(container_name)
+        self._tasks[container_name] = self._loop.create_task(
+            self._run_monitor(container_name, monitor, interval, adaptive, phase)
+        )
+
+    def _cancel_task(self, container_name: str):
+        if task := self._tasks.pop(container_name, None):
+            task.cancel()
+
+    async def _run_monitor(
+        self,
+        container_name: str,
+        monitor: Monitor,
+        interval: int,
+        adaptive: Optional[AdaptiveInterval],
+        phase: Optional[float],
+    ):
+        """Checks a monitor every interval seconds, like an interval job of the scheduler
+
+        Args:
+            container_name (str): Container Name
+            monitor (Monitor): Configured Monitor of the container
+            interval (int): Check interval in seconds
+            adaptive (Optional[AdaptiveInterval]): Adapts the interval after each check
+            phase (Optional[float]): Fraction of each interval to check at, None checks every interval
+        """
+        while True:
+            await asyncio.sleep(self._get_delay(interval, phase))
+
+            async with self._limit:
+                try:
+                    alert = await monitor.run_check_async(self._client)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logging.error(_("MONITORSCHEDULER_EXCEPTION_THREAD_EXCEPTION %s") % container_name)
+                    logging.error("Traceback %s" % traceback.format_exc())
+                    continue
+
+            if adaptive:
+                interval = adaptive.next_interval() or interval
+
+            # Reporting blocks on the Slack API, so it must not run on the event loop
+            if alert and self._report:
+                await self._loop.run_in_executor(None, self._report, container_name, alert)
+
+    @staticmethod
+    def _get_delay(interval: int, phase: Optional[float]) -> float:
+        """
+        Args:
+            interval (int): Check interval in seconds
+            phase (Optional[float]): Fraction of each interval to check at, None checks every interval
+
+        Returns:
+            float: Seconds until the next check
+        """
+        if phase is None:
+            return interval
+
+        # A check that ends just before the next phase, or a timer that fires early, must not check twice
+        delay = interval - (time.time() - phase * interval) % interval
+        if delay < interval / 10:
+            delay += interval
+        return delay
+
+    def stop(self):
+        """Cancels all checks and stops the event loop"""
+
+        async def shutdown():
+            for task in self._tasks.values():
+                task.cancel()
+            await self._client.close()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
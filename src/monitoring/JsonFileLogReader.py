@@ -0,0 +1,299 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import calendar
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from Config import _, DOCKMON_CONFIG_DOCKER_ROOT
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
+
+
+def parse_docker_timestamp(timestamp: bytes) -> int:
+    """Converts a Docker log timestamp (RFC3339Nano, UTC) into nanoseconds since epoch
+
+    Args:
+        timestamp (bytes): Timestamp as written by Docker, e.g. 2022-04-28T09:45:00.123456789Z
+
+    Returns:
+        int: Nanoseconds since epoch
+    """
+    seconds, _sep, fraction = timestamp.decode("ascii").rstrip("Z").partition(".")
+    return calendar.timegm(time.strptime(seconds, "%Y-%m-%dT%H:%M:%S")) * 1000000000 + int(
+        fraction[:9].ljust(9, "0")
+    )
+
+
+class JsonFileLogReader:
+    """
+    Reads the logs of containers with the json-file log driver directly from their log files, instead of
+    requesting them from the Docker API. Requires the containers directory of Docker to be mounted.
+
+    The files are memory-mapped and only the records after the byte offset of the previous read are parsed.
+    This is not zero-copy: every new record is copied out of the mapping as bytes, and its log line is copied
+    again into the returned logs, together with its timestamp. Rotated (.1, .2, ...) and truncated files are
+    detected by their inode and size. The records are returned in the format of the logs API with
+    timestamps=True, so they can be checked like the logs of the API. Corrupt records, e.g. after a crash of the
+    Docker daemon, are skipped.
+    """
+
+    _instance = None
+
+    # Docker writes every record as {"log":"...","stream":"stdout","time":"..."}
+    _record_prefix = b'{"log":"'
+    _record_stream = b'","stream":"'
+    _record_time = b'"time":"'
+
+    @staticmethod
+    def getInstance():
+        if JsonFileLogReader._instance == None:
+            JsonFileLogReader()
+            return JsonFileLogReader._instance
+        else:
+            return JsonFileLogReader._instance
+
+    def __init__(self):
+        if JsonFileLogReader._instance != None:
+            raise Exception("Singleton!")
+        else:
+            # Container ID -> (inode of the log file, offset after the last complete record)
+            self._positions: Dict[str, Tuple[int, int]] = {}
+            self._locks: Dict[str, threading.Lock] = {}
+            self._locks_lock = threading.Lock()
+
+            # Containers, whose log file could not be read. Only logged once.
+            self._unavailable: Set[str] = set()
+            JsonFileLogReader._instance = self
+
+    def get_path(self, container_id: str) -> str:
+        """
+        Args:
+            container_id (str): Container ID
+
+        Returns:
+            str: Path of the log file of the container
+        """
+        return os.path.join(DOCKMON_CONFIG_DOCKER_ROOT, "containers", container_id, container_id + "-json.log")
+
+    def forget(self, container_id: str):
+        """Removes the read position of a container, after it was removed
+
+        Args:
+            container_id (str): Container ID
+        """
+        with self._locks_lock:
+            self._locks.pop(container_id, None)
+            self._positions.pop(container_id, None)
+            self._unavailable.discard(container_id)
+
+    def read(self, container_id: str, since: int) -> Optional[bytes]:
+        """Reads all new log records of a container
+
+        Args:
+            container_id (str): Container ID
+            since (int): Timestamp in nanoseconds of the first record, only used for the first read of a container
+
+        Returns:
+            Optional[bytes]: New log lines, each prefixed with its timestamp, or None if the log file is not
+                             accessible and the logs must be requested from the API
+        """
+        with self._locks_lock:
+            lock = self._locks.setdefault(container_id, threading.Lock())
+
+        with lock:
+            try:
+                return self._read_new(container_id, since)
+            except OSError as e:
+                if container_id not in self._unavailable:
+                    self._unavailable.add(container_id)
+                    logging.warning(_("JSONFILELOGREADER_FALLBACK_API %s %s") % (container_id, str(e)))
+                return None
+
+    def _read_new(self, container_id: str, since: int) -> bytes:
+        """
+        Args:
+            container_id (str): Container ID
+            since (int): Timestamp in nanoseconds of the first record, only used for the first read of a container
+
+        Raises:
+            OSError: if the log file is not accessible
+
+        Returns:
+            bytes: New log lines, each prefixed with its timestamp
+        """
+        path = self.get_path(container_id)
+        with open(path, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+
+            parts: List[bytes] = []
+            offset: Optional[int] = None
+            if position := self._positions.get(container_id):
+                if position[0] != inode:
+                    # The file was rotated since the last read, the rest of the rotated files comes first
+                    parts.extend(self._read_rotated(path, *position))
+                    offset = 0
+                else:
+                    offset = position[1]
+
+            logs, offset = self._read_records(f, offset, since)
+            parts.append(logs)
+
+        self._positions[container_id] = (inode, offset)
+        return b"".join(parts)
+
+    def _read_rotated(self, path: str, inode: int, offset: int) -> List[bytes]:
+        """Reads the rest of a rotated log file and all files rotated after it
+
+        Args:
+            path (str): Path of the current log file
+            inode (int): Inode of the previously read log file
+            offset (int): Offset of the previous read
+
+        Returns:
+            List[bytes]: Log lines of the rotated files, oldest first
+        """
+        index = 1
+        while os.path.exists("%s.%d" % (path, index)):
+            if os.stat("%s.%d" % (path, index)).st_ino == inode:
+                break
+            index += 1
+        else:
+            # Rotated away, or compressed
+            return []
+
+        parts: List[bytes] = []
+        for i in range(index, 0, -1):
+            with open("%s.%d" % (path, i), "rb") as f:
+                parts.append(self._read_records(f, offset if i == index else 0, 0)[0])
+
+        return parts
+
+    def _read_records(self, f: BinaryIO, offset: Optional[int], since: int) -> Tuple[bytes, int]:
+        """Parses the complete records of a log file after the offset
+
+        Args:
+            f (BinaryIO): Log file
+            offset (Optional[int]): Offset of the first record, or None to start at the first record since
+            since (int): Timestamp in nanoseconds of the first record, if there is no offset
+
+        Returns:
+            Tuple[bytes, int]: Log lines and the offset after the last complete record
+        """
+        size = os.fstat(f.fileno()).st_size
+
+        # The file was truncated
+        if offset is not None and offset > size:
+            offset = 0
+
+        if size == 0 or offset == size:
+            return b"", size
+
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            if offset is None:
+                offset = self._find_offset(mm, size, since)
+
+            lines: List[bytes] = []
+            pending: List[bytes] = []  # Docker splits long lines into several records
+            pending_time = b""
+            position = offset
+            while (end := mm.find(b"\n", position)) != -1:
+                try:
+                    timestamp, log = self._parse_record(mm[position:end])
+                except (ValueError, KeyError) as e:
+                    logging.warning(_("JSONFILELOGREADER_CORRUPT_RECORD %s %d %s") % (f.name, position, str(e)))
+                    position = end + 1
+                    continue
+                position = end + 1
+
+                if not pending:
+                    pending_time = timestamp
+                pending.append(log)
+
+                if log.endswith(b"\n"):
+                    lines.append(pending_time + b" " + b"".join(pending))
+                    pending = []
+                    offset = position
+
+        return b"".join(lines), offset
+
+    def _find_offset(self, mm: mmap.mmap, size: int, since: int) -> int:
+        """Searches the first record at or after since, without parsing the records before it
+
+        Args:
+            mm (mmap.mmap): Mapped log file
+            size (int): Size of the log file
+            since (int): Timestamp in nanoseconds
+
+        Returns:
+            int: Offset of the record
+        """
+        low, high = 0, size
+        while low < high:
+            start = mm.rfind(b"\n", 0, (low + high) // 2) + 1
+            end = mm.find(b"\n", start)
+            if end != -1 and self._parse_time(mm[start:end]) < since:
+                low = end + 1
+            else:
+                high = start
+
+        return low
+
+    def _parse_time(self, record: bytes) -> int:
+        """
+        Args:
+            record (bytes): JSON record without the final newline
+
+        Returns:
+            int: Timestamp of the record in nanoseconds, or 0 if the record is corrupt, so it is skipped
+        """
+        try:
+            return parse_docker_timestamp(self._parse_record(record)[0])
+        except (ValueError, KeyError):
+            return 0
+
+    def _parse_record(self, record: bytes) -> Tuple[bytes, bytes]:
+        """Parses a record of the json-file log driver. Records without escaped characters in the log, except the
+        final newline, are sliced without decoding the JSON. The slices are copies of the record.
+
+        Args:
+            record (bytes): JSON record without the final newline
+
+        Raises:
+            ValueError: if the record is no valid JSON
+            KeyError: if the record has no log or time
+
+        Returns:
+            Tuple[bytes, bytes]: Timestamp and log line
+        """
+        if record.startswith(self._record_prefix) and (
+            end := record.find(self._record_stream, len(self._record_prefix))
+        ) != -1:
+            log = record[len(self._record_prefix) : end]
+            newline = log.endswith(b"\\n")
+            if newline:
+                log = log[:-2]
+
+            if b"\\" not in log:
+                start = record.rfind(self._record_time) + len(self._record_time)
+                return record[start : record.index(b'"', start)], log + b"\n" if newline else log
+
+        decoded = json.loads(record)
+        return decoded["time"].encode(), decoded["log"].encode()
@@ -0,0 +1,148 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+from Config import (
+    _,
+    DOCKMON_CONFIG_CHECKPOINT_FILE,
+    DOCKMON_CONFIG_CHECKPOINT_MAX_CATCHUP,
+)
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class LogCheckpoint:
+    """
+    Keeps the log cursors of all containers in a small file, so DockMon resumes checking the logs where it stopped
+    after a restart. The file consists of fixed size records of the container ID and the timestamp of the last
+    checked log line. It is written at low frequency to a temporary file, which then replaces the old file, so a
+    crash never leaves a partially written checkpoint behind.
+
+    The catch-up after a restart is bounded: a checkpoint never reaches back more than
+    DOCKMON_CONFIG_CHECKPOINT_MAX_CATCHUP seconds.
+    """
+
+    _instance = None
+
+    # Container ID (64 hex characters) and timestamp in nanoseconds
+    _record = struct.Struct("<64sq")
+
+    @staticmethod
+    def getInstance():
+        if LogCheckpoint._instance == None:
+            LogCheckpoint()
+            return LogCheckpoint._instance
+        else:
+            return LogCheckpoint._instance
+
+    def __init__(self):
+        if LogCheckpoint._instance != None:
+            raise Exception("Singleton!")
+        else:
+            self._path: str = DOCKMON_CONFIG_CHECKPOINT_FILE
+            self._lock = threading.Lock()
+            self._records: Dict[str, int] = self._read() if self._path else {}
+            self._written: Dict[str, int] = dict(self._records)
+            LogCheckpoint._instance = self
+
+    def _get_catchup_limit(self) -> int:
+        """
+        Returns:
+            int: Oldest timestamp in nanoseconds, a checkpoint may resume at
+        """
+        return time.time_ns() - int(DOCKMON_CONFIG_CHECKPOINT_MAX_CATCHUP) * 1000000000
+
+    def _read(self) -> Dict[str, int]:
+        """Reads the checkpoint file. A missing or damaged file results in a cold start.
+
+        Returns:
+            Dict[str, int]: Timestamps by container ID
+        """
+        records: Dict[str, int] = {}
+        try:
+            with open(self._path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return records
+        except OSError as e:
+            logging.error(_("LOGCHECKPOINT_EXCEPTION_READ %s") % str(e))
+            return records
+
+        # An incomplete last record is ignored
+        usable = len(data) - len(data) % self._record.size
+        for container_id, timestamp in self._record.iter_unpack(data[:usable]):
+            records[container_id.rstrip(b"\0").decode("ascii", errors="replace")] = timestamp
+
+        logging.info(_("LOGCHECKPOINT_LOADED %d") % len(records))
+        return records
+
+    def get(self, container_id: str) -> Optional[int]:
+        """Returns the checkpoint of a container from a previous run
+
+        Args:
+            container_id (str): Container ID
+
+        Returns:
+            Optional[int]: Timestamp of the last checked log line in nanoseconds, but not older than the catch-up
+                           limit, or None if there is no checkpoint
+        """
+        with self._lock:
+            timestamp = self._records.get(container_id)
+
+        if timestamp is None:
+            return None
+
+        return max(timestamp, self._get_catchup_limit())
+
+    def save(self, cursors: Iterable[Tuple[str, int]]):
+        """Writes the checkpoint file, if any cursor moved since the last write. Checkpoints of containers, which
+        were not checked again, are kept until they are older than the catch-up limit.
+
+        Args:
+            cursors (Iterable[Tuple[str, int]]): Container ID and timestamp of the last checked log line
+        """
+        if not self._path:
+            return
+
+        with self._lock:
+            limit = self._get_catchup_limit()
+            records = {k: v for k, v in self._records.items() if v >= limit}
+            for container_id, timestamp in cursors:
+                if timestamp > records.get(container_id, -1):
+                    records[container_id] = timestamp
+            self._records = records
+
+            if records == self._written:
+                return
+
+            data = b"".join(self._record.pack(k.encode("ascii"), v) for k, v in records.items())
+            try:
+                os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+                with open(self._path + ".tmp", "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(self._path + ".tmp", self._path)
+            except OSError as e:
+                logging.error(_("LOGCHECKPOINT_EXCEPTION_WRITE %s") % str(e))
+                return
+
+            self._written = dict(records)
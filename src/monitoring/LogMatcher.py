@@ -0,0 +1,173 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Pattern, Tuple
+
+
+class LogMatcher:
+    """
+    Compiles the include and exclude wordlists of a monitor once into a single regular expression each.
+    Matching is scoped to lines: an exclude word only suppresses the line it appears on.
+
+    The words are merged into a prefix tree before they are compiled, so the regex engine walks all words at once
+    instead of trying every word on its own at every position of the log. Case insensitive matching is done by the
+    regex engine, so no lowercased copy of the log is needed.
+
+    All patterns are UTF-8 encoded and matched against the raw log bytes, so the logs never need to be decoded.
+    The regex engine folds the case of ASCII letters only, so the common case variants of words with other
+    letters are added to the prefix tree.
+    """
+
+    def __init__(
+        self,
+        includes: List[str],
+        excludes: List[str],
+        regex: Optional[str] = None,
+        case_sensitive: bool = True,
+    ):
+        """
+        Args:
+            includes (List[str]): Words which trigger an alert
+            excludes (List[str]): Words which suppress an alert
+            regex (Optional[str], optional): Additional regular expression which triggers an alert. Defaults to None.
+            case_sensitive (bool, optional): Match case sensitive. Defaults to True.
+
+        Raises:
+            re.error: if the regular expression is invalid
+        """
+        # ^ and $ of the regular expression refer to lines
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+
+        if not case_sensitive:
+            includes = self._get_case_variants(includes)
+            excludes = self._get_case_variants(excludes)
+
+        include_patterns = [self._build_trie_pattern(includes)] if any(includes) else []
+        if regex:
+            include_patterns.append(b"(?:%s)" % regex.encode())
+
+        self._include: Optional[Pattern] = (
+            re.compile(b"|".join(include_patterns), flags) if include_patterns else None
+        )
+        self._exclude: Optional[Pattern] = (
+            re.compile(self._build_trie_pattern(excludes), flags) if any(excludes) else None
+        )
+
+    def _get_case_variants(self, words: List[str]) -> List[str]:
+        """Adds the lower, upper and title case variants of all words with non-ASCII letters
+
+        Args:
+            words (List[str]): Words to match
+
+        Returns:
+            List[str]: Words including their variants
+        """
+        variants = list(words)
+        for word in words:
+            if not word.isascii():
+                variants.extend(v for v in (word.lower(), word.upper(), word.title()) if v not in variants)
+        return variants
+
+    def _build_trie_pattern(self, words: List[str]) -> bytes:
+        """Builds a regular expression from a prefix tree of all words, e.g. "error", "err", "fatal" results
+        in (?:err(?:or)?|fatal)
+
+        Args:
+            words (List[str]): Words to match, empty words are ignored
+
+        Returns:
+            bytes: Regular Expression
+        """
+        trie: Dict[int, dict] = {}
+        for word in words:
+            if not word:
+                continue
+            node = trie
+            for byte in word.encode():
+                node = node.setdefault(byte, {})
+            # -1 marks the end of a word
+            node[-1] = {}
+
+        def build(node: Dict[int, dict]) -> bytes:
+            alternatives = [
+                re.escape(bytes([byte])) + build(child) for byte, child in node.items() if byte >= 0
+            ]
+            if not alternatives:
+                return b""
+
+            pattern = b"|".join(alternatives)
+            if -1 in node:
+                return b"(?:%s)?" % pattern
+            if len(alternatives) > 1:
+                return b"(?:%s)" % pattern
+            return pattern
+
+        return build(trie)
+
+    def match_lines(self, logs: bytes) -> Iterator[Tuple[int, int]]:
+        """Finds all lines, which contain an include word but no exclude word. Only the lines with an include
+        word are looked at for exclude words, the rest of the log is scanned once by the include expression.
+
+        Args:
+            logs (bytes): Raw logs to check
+
+        Yields:
+            Iterator[Tuple[int, int]]: Start and end offset (without newline) of each matching line
+        """
+        if not self._include:
+            return
+
+        position = 0
+        while match := self._include.search(logs, position):
+            start = logs.rfind(b"\n", 0, match.start()) + 1
+            end = logs.find(b"\n", match.start())
+            end = len(logs) if end == -1 else end
+
+            if not (self._exclude and self._exclude.search(logs, start, end)):
+                yield start, end
+
+            position = end + 1
+
+    def matches(self, logs: bytes) -> bool:
+        """
+        Args:
+            logs (bytes): Raw logs to check
+
+        Returns:
+            bool: True, if any line contains an include word and no exclude word
+        """
+        return next(self.match_lines(logs), None) is not None
+
+    def select_lines(self, logs: bytes) -> List[bytes]:
+        """Selects the lines, which contain an include word but no exclude word. Without include words and
+        regular expression, all non-empty lines without an exclude word are selected.
+
+        Args:
+            logs (bytes): Raw logs to check
+
+        Returns:
+            List[bytes]: Selected lines without newlines
+        """
+        if self._include:
+            return [logs[start:end] for start, end in self.match_lines(logs)]
+
+        lines = bytes(logs).split(b"\n")
+        if self._exclude:
+            return [line for line in lines if line and not self._exclude.search(line)]
+        return [line for line in lines if line]
@@ -0,0 +1,153 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from Config import _, DOCKMON_CONFIG_PROCESSPOOL_WORKERS
+from monitoring.LogMatcher import LogMatcher
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+# Configuration of a LogMatcher: includes, excludes, regular expression and case sensitivity
+MatcherConfig = Tuple[Tuple[str, ...], Tuple[str, ...], Optional[str], bool]
+
+# Compiled matchers of a worker process, so every configuration is only compiled once per worker
+_matchers: Dict[MatcherConfig, LogMatcher] = {}
+
+
+def _match_shared_logs(name: str, size: int, config: MatcherConfig, limit: int) -> List[Tuple[int, int]]:
+    """Runs in a worker process: matches the logs in a shared memory block
+
+    Args:
+        name (str): Name of the shared memory block
+        size (int): Size of the logs in the block
+        config (MatcherConfig): Configuration of the LogMatcher
+        limit (int): Maximum number of matching lines
+
+    Returns:
+        List[Tuple[int, int]]: Start and end offset of the matching lines
+    """
+    if (matcher := _matchers.get(config)) is None:
+        matcher = _matchers[config] = LogMatcher(list(config[0]), list(config[1]), config[2], config[3])
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # The mapping of the block has the find methods of bytes, so the logs are matched in place without a copy.
+        # It is exactly as large as the logs, only empty logs get a block of one byte.
+        matches: List[Tuple[int, int]] = []
+        if size:
+            for match in matcher.match_lines(block.buf.obj):
+                matches.append(match)
+                if len(matches) >= limit:
+                    break
+    finally:
+        block.close()
+
+    return matches
+
+
+class MatchingPool:
+    """
+    Pool of worker processes, which match the logs of high-volume containers, so matching is not bound to the
+    single core of the GIL. The logs are fetched in the threads of the scheduler and handed to the workers in a
+    shared memory block, only the offsets of the matching lines are sent back.
+
+    The workers are started with the first logs to match, so DockMon has no worker processes without high-volume
+    containers. They are started by a fork server, since DockMon is multithreaded by then, and are replaced, if
+    a worker died.
+    """
+
+    _instance = None
+
+    @staticmethod
+    def getInstance():
+        if MatchingPool._instance == None:
+            MatchingPool()
+            return MatchingPool._instance
+        else:
+            return MatchingPool._instance
+
+    def __init__(self):
+        if MatchingPool._instance != None:
+            raise Exception("Singleton!")
+        else:
+            self._executor: Optional[ProcessPoolExecutor] = None
+            self._executor_lock = threading.Lock()
+            MatchingPool._instance = self
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Starts the worker processes, if they are not running
+
+        Returns:
+            Optional[ProcessPoolExecutor]: Pool of the workers, None if DOCKMON_CONFIG_PROCESSPOOL_WORKERS is 0
+        """
+        with self._executor_lock:
+            workers = int(DOCKMON_CONFIG_PROCESSPOOL_WORKERS)
+            if not self._executor and workers > 0:
+                # The workers attach to the shared memory blocks, they must report to the same resource tracker
+                resource_tracker.ensure_running()
+                # The fork server preloads nothing, so it stays single-threaded. The workers set up the module path of
+                # DockMon themselves, before they import this module.
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([])
+                self._executor = ProcessPoolExecutor(workers, mp_context=context)
+            return self._executor
+
+    def match_lines(self, logs: bytes, config: MatcherConfig, limit: int) -> Optional[List[Tuple[int, int]]]:
+        """Matches the logs in a worker process
+
+        Args:
+            logs (bytes): Raw logs to check
+            config (MatcherConfig): Configuration of the LogMatcher
+            limit (int): Maximum number of matching lines
+
+        Returns:
+            Optional[List[Tuple[int, int]]]: Start and end offset of the matching lines, or None if the pool is not
+                                             running and the logs must be matched in the calling thread
+        """
+        if not (executor := self._get_executor()):
+            return None
+
+        block = shared_memory.SharedMemory(create=True, size=max(len(logs), 1))
+        try:
+            block.buf[: len(logs)] = logs
+            return executor.submit(_match_shared_logs, block.name, len(logs), config, limit).result()
+        except BrokenProcessPool as e:
+            # A worker died, e.g. killed by the OOM killer. The pool is replaced on the next call.
+            logging.error(_("MATCHINGPOOL_EXCEPTION_WORKER %s") % str(e))
+            with self._executor_lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return None
+        except Exception as e:
+            logging.error(_("MATCHINGPOOL_EXCEPTION_WORKER %s") % str(e))
+            return None
+        finally:
+            block.close()
+            block.unlink()
+
+    def stop(self):
+        """Stops the worker processes"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
@@ -16,10 +16,13 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import asyncio
 import logging
+import time
 from Config import _
 from handler.DockerHandler import DockerHandler
-from typing import Union, Dict, Any
+from handler.Metrics import Metrics
+from typing import Any, Dict, List, Optional, Union
 
 
 class Monitor:
@@ -53,6 +56,44 @@ class Monitor:
 
         return True
 
+    def get_label_bool(self, label: str, default: bool) -> bool:
+        """Reads a boolean label. Docker stores all labels as strings, so "false", "0", "no" and "off" are false.
+
+        Args:
+            label (str): Name of the Label
+            default (bool): Value, if the label is not set
+
+        Returns:
+            bool: Value of the label
+        """
+        return Monitor.parse_label_bool(self._container_labels, label, default)
+
+    @staticmethod
+    def parse_label_bool(labels: Dict[str, Any], label: str, default: bool) -> bool:
+        """Reads a boolean label, before a monitor is created
+
+        Args:
+            labels (Dict[str, Any]): Container Labels
+            label (str): Name of the Label
+            default (bool): Value, if the label is not set
+
+        Returns:
+            bool: Value of the label
+        """
+        value = labels.get(label, default)
+        if isinstance(value, str):
+            return value.strip().lower() not in ("false", "0", "no", "off")
+        return bool(value)
+
+    def get_grace_period(self) -> Optional[int]:
+        """Reads the grace period of the container, which overrides DOCKMON_CONFIG_GRACEPERIOD for its alerts
+
+        Returns:
+            Optional[int]: Grace period in seconds, or None if the label is not set
+        """
+        value = self._container_labels.get("io.smclab.dockmon.monitoring.graceperiod")
+        return None if value in (None, "") else int(value)
+
     def check_general_settings(self):
         """This checks if all needed general configurations for monitoring are accessable and set
 
@@ -77,16 +118,67 @@ class Monitor:
         """
         raise NotImplementedError
 
-    def check(self) -> Union[bool, dict]:
+    def check(self) -> Union[bool, dict, List[dict]]:
         """The actual monitoring function which should be implemented as a background interval job
 
         Raises:
             NotImplementedError: Needs to be implemented in the subclass
 
         Returns:
-            Union[bool, dict]: {
+            Union[bool, dict, List[dict]]: {
                                     "data": Data that caused the alert,
-                                    "trigger": Description of the alert
+                                    "trigger": Description of the alert,
+                                    "graceperiod": Optional grace period of the alert in seconds
                                 }
+                                or a list of such alerts, else False
         """
         raise NotImplementedError
+
+    async def check_async(self, client: Any) -> Union[bool, dict, List[dict]]:
+        """Coroutine variant of check() for the asyncio engine. Subclasses without a native implementation run check()
+        in the default executor of the event loop.
+
+        Args:
+            client (AsyncDockerClient): Async client of the engine
+
+        Returns:
+            Union[bool, dict, List[dict]]: see check()
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.check)
+
+    def _record_check_duration(self, duration: float):
+        """Records the duration of a check in the metrics
+
+        Args:
+            duration (float): Duration in seconds
+        """
+        metrics = Metrics.getInstance()
+        metrics.observe("dockmon_check_duration_seconds", duration, monitor=type(self).__name__)
+        metrics.inc("dockmon_check_seconds_total", duration, container=self._container_name)
+
+    def run_check(self) -> Union[bool, dict, List[dict]]:
+        """Runs check() and records its duration. This is the job function of the scheduler.
+
+        Returns:
+            Union[bool, dict, List[dict]]: see check()
+        """
+        start = time.perf_counter()
+        try:
+            return self.check()
+        finally:
+            self._record_check_duration(time.perf_counter() - start)
+
+    async def run_check_async(self, client: Any) -> Union[bool, dict, List[dict]]:
+        """Runs check_async() and records its duration. Used by the asyncio engine.
+
+        Args:
+            client (AsyncDockerClient): Async client of the engine
+
+        Returns:
+            Union[bool, dict, List[dict]]: see check()
+        """
+        start = time.perf_counter()
+        try:
+            return await self.check_async(client)
+        finally:
+            self._record_check_duration(time.perf_counter() - start)
@@ -0,0 +1,150 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import threading
+import time
+from Config import _
+from monitoring.Modules.MonitorBase import Monitor
+from monitoring.SlidingCounter import SlidingCounter
+from typing import Any, Dict, List, Tuple
+
+
+class MonitorEvents(Monitor):
+    """
+    Monitoring of the lifecycle of containers with the label events. It has no job: the container events arrive
+    through the single subscription of the DockerEventHandler, which already serves the discovery, and are handled as
+    soon as they arrive. An alert is sent, if a process of the container is killed for lack of memory, if the
+    container exits with a non-zero code, if it dies too often within a window, or if it becomes unhealthy.
+
+    Stopping a container with docker stop or docker kill sends a kill event before it dies, so its exit code is
+    neither alerted nor counted as a restart.
+    """
+
+    # Actions of the events, which are handled
+    actions: List[str] = ["oom", "kill", "die", "destroy", "health_status"]
+
+    # State per container, kept on class level, since a monitor is created for every event
+    _restarts: Dict[str, SlidingCounter] = {}  # Counter of the die events
+    _stopped: Dict[str, Tuple[str, float]] = {}  # Last kill or oom event before the container died, and its time
+    _health: Dict[str, str] = {}  # Last health status
+    _lock: threading.Lock = threading.Lock()
+
+    # Seconds, in which a die event is attributed to a preceding kill or oom event, like the stop timeout
+    _stop_timeout: int = 60
+
+    def __init__(self, container_name: str, container_labels: Dict[str, Any]):
+        super().__init__(container_name, container_labels)
+
+        self._restart_limit = int(self._container_labels.get("io.smclab.dockmon.monitoring.events.restarts", 3))
+        self._restart_window = int(
+            self._container_labels.get("io.smclab.dockmon.monitoring.events.restartwindow", 300)
+        )
+
+    def check_config(self) -> bool:
+        """All labels are optional. The container is not looked up, since it may already be gone.
+
+        Returns:
+            bool: true
+        """
+        return True
+
+    @staticmethod
+    def forget(container_name: str):
+        """Removes the state of a container
+
+        Args:
+            container_name (str): Container Name
+        """
+        with MonitorEvents._lock:
+            MonitorEvents._restarts.pop(container_name, None)
+            MonitorEvents._stopped.pop(container_name, None)
+            MonitorEvents._health.pop(container_name, None)
+
+    def handle(self, event: Dict[str, Any]) -> List[dict]:
+        """Handles an event of the container
+
+        Args:
+            event (Dict[str, Any]): Decoded Docker event
+
+        Returns:
+            List[dict]: Alerts as described in Monitor.check()
+        """
+        # Some actions carry a detail, e.g. "health_status: unhealthy"
+        action, _separator, detail = event.get("Action", "").partition(":")
+        attributes: Dict[str, Any] = event.get("Actor", {}).get("Attributes", {})
+        now = event.get("timeNano", time.time_ns()) / 1e9
+        data = _("MONITOREVENTS_IMAGE %s") % attributes.get("image", "")
+
+        if action == "destroy":
+            self.forget(self._container_name)
+            return []
+
+        alerts: List[dict] = []
+        with self._lock:
+            if action == "oom":
+                self._stopped[self._container_name] = (action, now)
+                alerts.append(self._build_alert(_("MONITOREVENTS_TRIGGER_OOM"), data))
+
+            elif action == "kill":
+                self._stopped[self._container_name] = (action, now)
+
+            elif action == "health_status":
+                previous = self._health.get(self._container_name)
+                self._health[self._container_name] = detail.strip()
+                if detail.strip() == "unhealthy" and previous != "unhealthy":
+                    alerts.append(self._build_alert(_("MONITOREVENTS_TRIGGER_UNHEALTHY"), data))
+
+            elif action == "die":
+                cause, stopped = self._stopped.pop(self._container_name, ("", 0.0))
+                if now - stopped > self._stop_timeout:
+                    cause = ""
+                exit_code = int(attributes.get("exitCode") or 0)
+                data += "\n" + _("MONITOREVENTS_EXIT_CODE %d") % exit_code
+
+                # The exit code of an OOM kill was already alerted by the oom event
+                if not cause and exit_code != 0:
+                    alerts.append(self._build_alert(_("MONITOREVENTS_TRIGGER_EXIT %d") % exit_code, data))
+
+                if cause != "kill" and self._restart_limit:
+                    counter = self._restarts.get(self._container_name)
+                    if counter is None or counter.seconds != self._restart_window:
+                        counter = SlidingCounter(self._restart_window)
+                        self._restarts[self._container_name] = counter
+                    counter.add(1, now)
+
+                    # The trigger does not contain the count, so the grace period applies to the whole loop
+                    if (dies := counter.sum(self._restart_window, now)) >= self._restart_limit:
+                        alerts.append(
+                            self._build_alert(
+                                _("MONITOREVENTS_TRIGGER_RESTARTS %d %d") % (self._restart_limit, self._restart_window),
+                                data + "\n" + _("MONITOREVENTS_DIES %d") % dies,
+                            )
+                        )
+
+        return alerts
+
+    def _build_alert(self, trigger: str, data: str) -> dict:
+        """
+        Args:
+            trigger (str): Description of the alert
+            data (str): Details of the event
+
+        Returns:
+            dict: Alert as described in Monitor.check()
+        """
+        return {"data": data, "trigger": trigger, "graceperiod": self.get_grace_period()}
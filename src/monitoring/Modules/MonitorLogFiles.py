@@ -16,37 +16,229 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import asyncio
 import datetime
 import logging
+import re
+import threading
+import time
 from Config import _
+from handler.AsyncDockerClient import AsyncDockerClient
+from handler.Metrics import Metrics
+from monitoring.AdaptiveInterval import AdaptiveInterval
+from monitoring.JsonFileLogReader import JsonFileLogReader, parse_docker_timestamp
+from monitoring.LogCheckpoint import LogCheckpoint
+from monitoring.LogMatcher import LogMatcher
+from monitoring.MatchingPool import MatcherConfig, MatchingPool
 from monitoring.Modules.MonitorBase import Monitor
-from typing import Union, Dict, Any, List
+from typing import Callable, Iterable, Iterator, Union, Dict, Any, List, Optional, Tuple
 
 
 class MonitorLogfile(Monitor):
+
+    # Log cursors are kept on class level, since the scheduler pickles the monitor instance for every job run.
+    # Maps the container name to a tuple of (container id, timestamp of the last seen log line in nanoseconds)
+    _cursors: Dict[str, Tuple[str, int]] = {}
+    _cursors_lock: threading.Lock = threading.Lock()
+
+    # Docker prefixes every line with a RFC3339Nano timestamp, if the logs are requested with timestamps=True
+    _timestamp_prefix = re.compile(rb"^\S+ ", re.MULTILINE)
+
+    # Seconds to wait before a broken log stream is reconnected
+    _stream_reconnect_delay: int = 5
+
+    # Logs of high-volume containers are matched in the process pool, if they are at least this large.
+    # Smaller logs are matched faster in the thread, than they are handed to a worker.
+    _pool_min_size: int = 64 * 1024
+
     def __init__(self, container_name: str, container_labels: Dict[str, Any]):
 
         self._container_name = container_name
         self._container_labels = container_labels
 
+        super().__init__(container_name, container_labels)
+
         # Prepare the Wordlists
-        self._includes: List[str] = self._container_labels.get(
-            "io.smclab.dockmon.monitoring.logs.include", []
-        ).split(",")
-        self._excludes: List[str] = self._container_labels.get(
-            "io.smclab.dockmon.monitoring.logs.exclude", []
-        ).split(",")
-
-        # Check if we should monitor case sensitive or not
-        if not self._container_labels.get("io.smclab.dockmon.monitoring.logs.casesensitive", True):
-            self._includes = [x.lower() for x in self._includes]
-            self._excludes = [x.lower() for x in self._excludes]
+        self._includes: List[str] = [
+            x.strip()
+            for x in self._container_labels.get("io.smclab.dockmon.monitoring.logs.include", "").split(",")
+            if x.strip()
+        ]
+        self._excludes: List[str] = [
+            x.strip()
+            for x in self._container_labels.get("io.smclab.dockmon.monitoring.logs.exclude", "").split(",")
+            if x.strip()
+        ]
 
-        super().__init__(container_name, container_labels)
+        # Compile the Wordlists once, so each check scans the logs in a single pass
+        self._matcher_config: MatcherConfig = (
+            tuple(self._includes),
+            tuple(self._excludes),
+            self._container_labels.get("io.smclab.dockmon.monitoring.logs.regex"),
+            self.get_label_bool("io.smclab.dockmon.monitoring.logs.casesensitive", True),
+        )
+        try:
+            self._matcher: Optional[LogMatcher] = LogMatcher(
+                self._includes, self._excludes, self._matcher_config[2], self._matcher_config[3]
+            )
+        except re.error as e:
+            self._matcher = None
+            logging.error(_("MONITORLOG_EXCEPTION_REGEX %s %s") % (self._container_name, str(e)))
+
+        # Read the logs from the json-file of the log driver instead of the API
+        self._reader: str = self._container_labels.get("io.smclab.dockmon.monitoring.logs.reader", "api")
+
+        # Match the logs in the process pool
+        self._highvolume: bool = self.get_label_bool("io.smclab.dockmon.monitoring.logs.highvolume", False)
+
+        # Record the new log bytes of each check for the adaptive check interval
+        self._adaptive: bool = self.get_label_bool("io.smclab.dockmon.monitoring.checkinterval.adaptive", False)
+
+        # Time the phases of the checks. Read once, so disabled profiling costs nothing per check.
+        self._profile: bool = self.get_label_bool("io.smclab.dockmon.monitoring.logs.profile", False)
+
+        # Currently followed log stream, only used in stream mode
+        self._stream = None
+
+    @staticmethod
+    def save_log_checkpoint():
+        """Writes the log cursors of all containers to the checkpoint file, runs as a low frequency job"""
+        with MonitorLogfile._cursors_lock:
+            cursors = list(MonitorLogfile._cursors.values())
+
+        LogCheckpoint.getInstance().save(cursors)
+
+    @staticmethod
+    def forget(container_name: str):
+        """Removes the log cursor of a container and the position of its log file
+
+        Args:
+            container_name (str): Container Name
+        """
+        with MonitorLogfile._cursors_lock:
+            cursor = MonitorLogfile._cursors.pop(container_name, None)
+
+        if cursor:
+            JsonFileLogReader.getInstance().forget(cursor[0])
 
     def _get_unix_time_stamp_for_interval(self, interval: int) -> int:
         return int((datetime.datetime.today() - datetime.timedelta(seconds=interval)).timestamp())
 
+    def _parse_docker_timestamp(self, timestamp: bytes) -> int:
+        """Converts a Docker log timestamp (RFC3339Nano, UTC) into nanoseconds since epoch
+
+        Args:
+            timestamp (bytes): Timestamp as prefixed by Docker, e.g. 2022-04-28T09:45:00.123456789Z
+
+        Returns:
+            int: Nanoseconds since epoch
+        """
+        return parse_docker_timestamp(timestamp)
+
+    def _get_log_cursor(self, container_id: str) -> Optional[int]:
+        """Returns the timestamp of the last log line seen for this container
+
+        Args:
+            container_id (str): Current ID of the container. A recreated container does not inherit the cursor.
+
+        Returns:
+            Optional[int]: Timestamp in nanoseconds or None, if the container was not checked before
+        """
+        with self._cursors_lock:
+            cursor = self._cursors.get(self._container_name)
+
+        if cursor and cursor[0] == container_id:
+            return cursor[1]
+
+        # Resume where the previous run of DockMon stopped
+        if (timestamp := LogCheckpoint.getInstance().get(container_id)) is not None:
+            self._set_log_cursor(container_id, timestamp)
+            return timestamp
+
+        return None
+
+    def _set_log_cursor(self, container_id: str, timestamp: int):
+        """Moves the log cursor of this container forward. Overlapping job runs can never move it backwards.
+
+        Args:
+            container_id (str): Current ID of the container
+            timestamp (int): Timestamp of the last log line in nanoseconds
+        """
+        with self._cursors_lock:
+            cursor = self._cursors.get(self._container_name)
+            if not cursor or cursor[0] != container_id or cursor[1] < timestamp:
+                self._cursors[self._container_name] = (container_id, timestamp)
+
+        # The container was recreated, the log file of the previous container is gone
+        if cursor and cursor[0] != container_id:
+            JsonFileLogReader.getInstance().forget(cursor[0])
+
+    def _get_logs_since(self, container_id: str) -> int:
+        """Only the logs since the last check are fetched. The first check starts with the configured window.
+
+        Args:
+            container_id (str): Current ID of the container
+
+        Returns:
+            int: Unix timestamp for the since parameter of the logs call
+        """
+        if (cursor := self._get_log_cursor(container_id)) is not None:
+            return cursor // 1000000000
+
+        return self._get_unix_time_stamp_for_interval(
+            int(self._container_labels.get("io.smclab.dockmon.monitoring.logs.since", 60))
+        )
+
+    def _consume_new_lines(self, container_id: str, logs: bytes, fetched: Optional[int] = None) -> bytes:
+        """Drops all lines that have already been seen by a previous check, advances the cursor and
+        removes the Docker timestamps from the remaining lines. The logs stay raw bytes, only the
+        timestamps are decoded.
+
+        Args:
+            container_id (str): Current ID of the container
+            logs (bytes): Logs fetched with timestamps=True
+            fetched (Optional[int], optional): Time of the fetch in nanoseconds. A container without logs gets its
+                                               cursor set to it, so the next check reads everything written since,
+                                               however long the check interval is. Defaults to None.
+
+        Returns:
+            bytes: All new log lines without timestamps
+        """
+        if not logs:
+            if fetched is not None and self._get_log_cursor(container_id) is None:
+                self._set_log_cursor(container_id, fetched)
+            return b""
+
+        # Docker's "since" only has a resolution of seconds, so the first lines may have been seen already
+        start = 0
+        if (cursor := self._get_log_cursor(container_id)) is not None:
+            while start < len(logs):
+                end = logs.find(b"\n", start)
+                end = len(logs) if end == -1 else end + 1
+                if self._parse_docker_timestamp(logs[start : logs.find(b" ", start, end)]) > cursor:
+                    break
+                start = end
+
+            if start >= len(logs):
+                return b""
+
+        last_line = max(logs.rfind(b"\n", start, len(logs) - 1) + 1, start)
+        self._set_log_cursor(
+            container_id, self._parse_docker_timestamp(logs[last_line : logs.find(b" ", last_line)])
+        )
+
+        return self._remove_timestamps(memoryview(logs)[start:])
+
+    def _remove_timestamps(self, logs: memoryview) -> bytes:
+        """
+        Args:
+            logs (memoryview): New log lines with timestamps
+
+        Returns:
+            bytes: Log lines as passed to _evaluate()
+        """
+        return self._timestamp_prefix.sub(b"", logs)
+
     def check_config(self) -> bool:
         """This should check if every parameter that is needed to run the monitoring job is set.
         Also if there are any problems with the container itself.
@@ -59,6 +251,10 @@ class MonitorLogfile(Monitor):
         if not super().check_general_settings():
             return False
 
+        # The regular expression could not be compiled
+        if not self._matcher:
+            return False
+
         # Check module specific Parameters
         if not super().check_required_parameters(
             [
@@ -70,6 +266,16 @@ class MonitorLogfile(Monitor):
 
         return True
 
+    def _get_active_container(self) -> Optional[Any]:
+        """
+        Returns:
+            Optional[Any]: Container object, None if the container is not running anymore
+        """
+        if not self._dh.check_container_still_active(self._container_name):
+            return None
+
+        return self._dh.get_container_obj_by_name(self._container_name)
+
     def check(self) -> Union[bool, dict]:
         """Checks the occurence of a work in the a part of a logfile.
 
@@ -87,39 +293,286 @@ class MonitorLogfile(Monitor):
 
         """
 
-        if not self._dh.check_container_still_active(self._container_name):
-            return False
+        if container := self._get_active_container():
+            phases: Optional[List[float]] = [time.perf_counter()] if self._profile else None
+
+            # Prepare the logs. They are matched as raw bytes, only the reported lines get decoded.
+            try:
+                since = self._get_logs_since(container.id)
+                fetched = time.time_ns()
+                if (raw := self._read_json_file(container.id, since)) is None:
+                    raw = self._dh.get_container_logs(container, timestamps=True, since=since)
+                if phases:
+                    phases.append(time.perf_counter())
+                logs: bytes = self._consume_new_lines(container.id, raw, fetched)
+            except ValueError:
+                logging.error(_("MONITORLOG_EXCEPTION_DECODE"))
+                return False
+
+            if phases:
+                phases.append(time.perf_counter())
 
-        if container := self._dh.get_container_obj_by_name(self._container_name):
+            if self._adaptive:
+                AdaptiveInterval.record(self._container_name, len(logs))
+
+            alert = self._evaluate(logs) if logs else False
+
+            if phases:
+                phases.append(time.perf_counter())
+                self._record_phases(phases, alert)
+
+            return alert
+
+        return False
+
+    async def check_async(self, client: AsyncDockerClient) -> Union[bool, dict]:
+        """Coroutine variant of check() for the asyncio engine. The logs are fetched without blocking a thread.
+
+        Args:
+            client (AsyncDockerClient): Async client of the engine
+
+        Returns:
+            Union[bool, dict]: see check()
+        """
+
+        # The lookup may call the Docker API with docker-py, which must not block the event loop
+        if container := await asyncio.get_running_loop().run_in_executor(None, self._get_active_container):
+            phases: Optional[List[float]] = [time.perf_counter()] if self._profile else None
 
-            # Prepare the logs
             try:
-                logs: str = container.logs(
-                    since=self._get_unix_time_stamp_for_interval(
-                        int(
-                            self._container_labels.get(
-                                "io.smclab.dockmon.monitoring.logs.since", 60
-                            )
-                        )
+                since = self._get_logs_since(container.id)
+                fetched = time.time_ns()
+                raw: Optional[bytes] = None
+                if self._reader == "jsonfile":
+                    raw = await asyncio.get_running_loop().run_in_executor(
+                        None, self._read_json_file, container.id, since
                     )
-                ).decode()
+                if raw is None:
+                    raw = await client.logs(container.id, since)
+                if phases:
+                    phases.append(time.perf_counter())
+                logs: bytes = self._consume_new_lines(container.id, raw, fetched)
             except ValueError:
                 logging.error(_("MONITORLOG_EXCEPTION_DECODE"))
                 return False
 
+            if phases:
+                phases.append(time.perf_counter())
+
+            if self._adaptive:
+                AdaptiveInterval.record(self._container_name, len(logs))
+
+            # Matching in the process pool blocks, so it must not run on the event loop
             if not logs:
-                return False
+                alert: Union[bool, dict] = False
+            elif self._uses_pool(logs):
+                alert = await asyncio.get_running_loop().run_in_executor(None, self._evaluate, logs)
+            else:
+                alert = self._evaluate(logs)
 
-            # Check if we should monitor case sensitive or not
-            if not self._container_labels.get(
-                "io.smclab.dockmon.monitoring.logs.casesensitive", True
-            ):
-                logs = logs.lower()
+            if phases:
+                phases.append(time.perf_counter())
+                self._record_phases(phases, alert)
 
-            # Check the Log file!
-            if any(x in logs for x in self._includes) and not any(
-                x in logs for x in self._excludes
-            ):
-                return {"data": logs, "trigger": _("MONITORLOG_TRIGGER_WORD_INCLUDE")}
+            return alert
 
         return False
+
+    def _read_json_file(self, container_id: str, since: int) -> Optional[bytes]:
+        """Reads the new logs from the log file of the container, if the label logs.reader is jsonfile
+
+        Args:
+            container_id (str): Current ID of the container
+            since (int): Unix timestamp of the first log line, if the file was not read before
+
+        Returns:
+            Optional[bytes]: Logs like the API returns them with timestamps=True, or None if they must be
+                             requested from the API
+        """
+        if self._reader != "jsonfile":
+            return None
+
+        return JsonFileLogReader.getInstance().read(container_id, since * 1000000000)
+
+    def _uses_pool(self, logs: bytes) -> bool:
+        """
+        Args:
+            logs (bytes): New log lines without timestamps
+
+        Returns:
+            bool: True, if the logs are matched in the process pool
+        """
+        return self._highvolume and len(logs) >= self._pool_min_size
+
+    def _record_phases(self, phases: List[float], alert: Union[bool, dict, List[dict]]):
+        """Records the durations of the fetch, decode and match phases of a check in the metrics and the log.
+        Alerts are marked, so the report phase is recorded by the scheduler.
+
+        Args:
+            phases (List[float]): perf_counter() at the start of the check and at the end of each phase
+            alert (Union[bool, dict, List[dict]]): Result of the check
+        """
+        durations = [end - start for start, end in zip(phases, phases[1:])]
+        metrics = Metrics.getInstance()
+        for phase, duration in zip(("fetch", "decode", "match"), durations):
+            metrics.observe("dockmon_check_phase_seconds", duration, container=self._container_name, phase=phase)
+
+        logging.info(
+            _("MONITORLOG_PROFILE %s %.1f %.1f %.1f")
+            % (self._container_name, *(duration * 1000 for duration in durations))
+        )
+
+        for marked in alert if isinstance(alert, list) else [alert] if alert else []:
+            marked["profile"] = True
+
+    def _evaluate(self, logs: bytes) -> Union[bool, dict]:
+        """Checks the include and exclude wordlists against new log lines
+
+        Args:
+            logs (bytes): New log lines without timestamps
+
+        Returns:
+            Union[bool, dict]: see check()
+        """
+
+        if not self._matcher:
+            return False
+
+        metrics = Metrics.getInstance()
+        metrics.inc("dockmon_log_bytes_total", len(logs), container=self._container_name)
+        metrics.inc("dockmon_log_lines_total", logs.count(b"\n"), container=self._container_name)
+
+        context = int(self._container_labels.get("io.smclab.dockmon.monitoring.logs.context", 2))
+        max_lines = int(self._container_labels.get("io.smclab.dockmon.monitoring.logs.maxlines", 50))
+
+        # High-volume logs are matched in the process pool, which only returns the offsets of enough matching
+        # lines to fill the excerpt
+        matches: Optional[Iterable[Tuple[int, int]]] = None
+        if self._uses_pool(logs):
+            matches = MatchingPool.getInstance().match_lines(
+                logs, self._matcher_config, (max_lines + 1) * (2 * context + 1)
+            )
+        if matches is None:
+            matches = self._matcher.match_lines(logs)
+
+        # Check the Log file!
+        if excerpt := self._build_excerpt(logs, iter(matches), context, max_lines):
+            return self._build_alert(_("MONITORLOG_TRIGGER_WORD_INCLUDE"), excerpt)
+
+        return False
+
+    def _build_alert(self, trigger: str, data: str) -> dict:
+        """
+        Args:
+            trigger (str): Trigger of the alert, the grace period applies per container and trigger
+            data (str): Details of the alert
+
+        Returns:
+            dict: Alert as described in check()
+        """
+        return {"data": data, "trigger": trigger, "graceperiod": self.get_grace_period()}
+
+    def _build_excerpt(
+        self, logs: bytes, matches: Iterator[Tuple[int, int]], context: int, max_lines: int
+    ) -> str:
+        """Collects the matching lines and their context lines into a bounded excerpt of the logs.
+        Scanning stops as soon as the excerpt is full. Only the lines of the excerpt are decoded,
+        invalid bytes are replaced.
+
+        Args:
+            logs (bytes): New log lines without timestamps
+            matches (Iterator[Tuple[int, int]]): Start and end offsets of the matching lines
+            context (int): Lines before and after each matching line
+            max_lines (int): Maximum number of lines
+
+        Returns:
+            str: Excerpt, empty if no line matched
+        """
+        excerpt: List[str] = []
+        covered = 0  # End offset of the last line in the excerpt
+        for start, end in matches:
+            if len(excerpt) >= max_lines:
+                excerpt.append("[...]")
+                break
+
+            # Context before the line, but never lines which are already part of the excerpt
+            first = start
+            for _line in range(context):
+                if first <= covered:
+                    break
+                first = logs.rfind(b"\n", 0, first - 1) + 1
+            first = max(first, covered)
+
+            # Context after the line
+            last = end
+            for _line in range(context):
+                if last >= len(logs):
+                    break
+                next_end = logs.find(b"\n", last + 1)
+                last = len(logs) if next_end == -1 else next_end
+
+            # The line may already be part of the context of the previous match
+            if first >= last:
+                continue
+
+            if excerpt and first > covered:
+                excerpt.append("[...]")
+            excerpt.extend(logs[first:last].decode(errors="replace").strip("\n").split("\n"))
+            covered = last + 1
+
+        return "\n".join(excerpt)
+
+    def follow(self, report: Callable[[dict], None], stop: threading.Event):
+        """Stream mode: Follows the logs of the container over one long-lived connection and checks every
+        new line as soon as it arrives. The stream is reconnected if it breaks or the container restarts.
+        Returns, if the container is gone or stop is set.
+
+        Args:
+            report (Callable[[dict], None]): Will be called with the alert, see check()
+            stop (threading.Event): Set this event and call stop_follow() to end following
+        """
+
+        while not stop.is_set():
+            if not self._dh.check_container_still_active(self._container_name):
+                return
+
+            if not (container := self._dh.get_container_obj_by_name(self._container_name)):
+                return
+
+            try:
+                # Resume at the cursor after a reconnect
+                self._stream = self._dh.follow_container_logs(
+                    container, timestamps=True, since=self._get_logs_since(container.id)
+                )
+                buffer = b""
+                for chunk in self._stream:
+                    buffer += chunk
+
+                    # Only complete lines are checked, the rest waits for the next chunk
+                    lines, newline, buffer = buffer.rpartition(b"\n")
+                    if not newline:
+                        continue
+
+                    try:
+                        logs = self._consume_new_lines(container.id, lines + newline)
+                    except ValueError:
+                        logging.error(_("MONITORLOG_EXCEPTION_DECODE"))
+                        continue
+
+                    if logs and (alert := self._evaluate(logs)):
+                        report(alert)
+            except Exception as e:
+                logging.error(_("MONITORLOG_EXCEPTION_STREAM %s %s") % (self._container_name, str(e)))
+            finally:
+                self._stream = None
+
+            # The stream ended - the container stopped, restarted or the connection broke
+            stop.wait(self._stream_reconnect_delay)
+
+    def stop_follow(self):
+        """Closes the currently followed log stream, so follow() can notice its stop event"""
+        if stream := self._stream:
+            try:
+                stream.close()
+            except Exception:
+                pass
@@ -0,0 +1,185 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import threading
+import time
+from Config import _
+from handler.Metrics import Metrics, Sample
+from monitoring.Modules.MonitorBase import Monitor
+from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+from monitoring.TemplateMiner import LogTemplate, TemplateMiner
+from typing import Any, Dict, List, Tuple, Union
+
+
+class MonitorLogTemplates(MonitorLogfile):
+    """
+    Log monitoring, which alerts on new kinds of log lines instead of words: the new lines of each check are mined
+    into templates, see TemplateMiner. An alert is sent for every template, which was never seen before, and for
+    every template, whose rate suddenly spikes. Since each template has its own trigger, the grace period of one
+    template does not suppress the alerts of another.
+
+    The logs are fetched like for MonitorLogfile. If include words or a regular expression are set, only the
+    matching lines are mined, e.g. the error lines. Exclude words drop lines in any case.
+    """
+
+    # Templates per container. Kept on class level like the log cursors, until the monitoring of the container is
+    # removed. A restarted container learns its templates again for the learn period.
+    _miners: Dict[str, TemplateMiner] = {}
+    _miners_lock: threading.Lock = threading.Lock()
+    _collector_added: bool = False
+
+    # Lines of a template in one check, below which a spike is not reported
+    _spike_min_lines: int = 10
+
+    # Checks, which must have seen a template, before its spikes are reported
+    _spike_min_checks: int = 3
+
+    # Lowest rate in lines per second, which spikes are compared to, so rare templates need a burst to spike
+    _spike_min_rate: float = 1 / 3600
+
+    # Maximum number of alerts per check, further templates are summarized in the last alert
+    _max_alerts: int = 10
+
+    def __init__(self, container_name: str, container_labels: Dict[str, Any]):
+        super().__init__(container_name, container_labels)
+
+        self._max_templates = int(
+            self._container_labels.get("io.smclab.dockmon.monitoring.logs.templates.max", 1000)
+        )
+        self._learn = int(self._container_labels.get("io.smclab.dockmon.monitoring.logs.templates.learn", 600))
+        self._spike = float(self._container_labels.get("io.smclab.dockmon.monitoring.logs.templates.spike", 10))
+
+    @staticmethod
+    def forget(container_name: str):
+        """Removes the templates of a container
+
+        Args:
+            container_name (str): Container Name
+        """
+        with MonitorLogTemplates._miners_lock:
+            MonitorLogTemplates._miners.pop(container_name, None)
+
+    def check_config(self) -> bool:
+        """Include and exclude words are optional for templates
+
+        Returns:
+            bool: true, if everything is fine
+        """
+        return Monitor.check_general_settings(self) and self._matcher is not None
+
+    def _uses_pool(self, logs: bytes) -> bool:
+        """Templates are mined in the thread, the process pool only matches words"""
+        return False
+
+    def _get_miner(self) -> TemplateMiner:
+        """
+        Returns:
+            TemplateMiner: Miner of the container
+        """
+        with self._miners_lock:
+            if (miner := self._miners.get(self._container_name)) is None:
+                miner = TemplateMiner(self._max_templates)
+                # The first check covers the window of the label logs.since
+                miner.last_check -= int(self._container_labels.get("io.smclab.dockmon.monitoring.logs.since", 60))
+                self._miners[self._container_name] = miner
+
+            add_collector = not MonitorLogTemplates._collector_added
+            MonitorLogTemplates._collector_added = True
+
+        if add_collector:
+            Metrics.getInstance().add_collector(MonitorLogTemplates._collect_metrics)
+
+        miner.max_templates = self._max_templates
+        return miner
+
+    @staticmethod
+    def _collect_metrics() -> List[Sample]:
+        """
+        Returns:
+            List[Sample]: Number of templates per container
+        """
+        with MonitorLogTemplates._miners_lock:
+            miners = list(MonitorLogTemplates._miners.items())
+
+        return [("dockmon_log_templates", {"container": name}, len(miner)) for name, miner in miners]
+
+    def _evaluate(self, logs: bytes) -> Union[bool, List[dict]]:
+        """Mines the new log lines and reports new templates and spikes
+
+        Args:
+            logs (bytes): New log lines without timestamps
+
+        Returns:
+            Union[bool, List[dict]]: Alerts as described in check(), one per template, or False
+        """
+        if not self._matcher:
+            return False
+
+        metrics = Metrics.getInstance()
+        metrics.inc("dockmon_log_bytes_total", len(logs), container=self._container_name)
+        metrics.inc("dockmon_log_lines_total", logs.count(b"\n"), container=self._container_name)
+
+        lines = self._matcher.select_lines(logs)
+        miner = self._get_miner()
+
+        with miner.lock:
+            now = time.monotonic()
+            elapsed = max(now - miner.last_check, 1.0)
+            miner.last_check = now
+
+            new, counts = miner.mine(lines)
+
+            spikes: List[Tuple[LogTemplate, int, float]] = []
+            for template, count in counts.items():
+                average = miner.update_rate(template, count / elapsed)
+                if (
+                    self._spike > 0
+                    and template.checks > self._spike_min_checks
+                    and count >= self._spike_min_lines
+                    and count / elapsed > self._spike * max(average, self._spike_min_rate)
+                ):
+                    spikes.append((template, count, average))
+
+        # New containers first learn their templates, without reporting them
+        if now - miner.started < self._learn:
+            return False
+
+        alerts: List[dict] = []
+        for template in new:
+            alerts.append(
+                self._build_alert(
+                    _("MONITORTEMPLATES_TRIGGER_NEW %s") % template,
+                    _("MONITORLOG_EXAMPLE %s") % template.example.decode(errors="replace"),
+                )
+            )
+        for template, count, average in spikes:
+            alerts.append(
+                self._build_alert(
+                    _("MONITORTEMPLATES_TRIGGER_SPIKE %s") % template,
+                    _("MONITORTEMPLATES_SPIKE %d %d %.1f") % (count, elapsed, average * 60)
+                    + "\n"
+                    + _("MONITORLOG_EXAMPLE %s") % template.example.decode(errors="replace"),
+                )
+            )
+
+        if len(alerts) > self._max_alerts:
+            summary = "\n".join(alert["trigger"] for alert in alerts[self._max_alerts - 1 :])
+            alerts = alerts[: self._max_alerts - 1]
+            alerts.append(self._build_alert(_("MONITORTEMPLATES_TRIGGER_MORE"), summary))
+
+        return alerts or False
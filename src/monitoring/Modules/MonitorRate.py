@@ -0,0 +1,239 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging
+import re
+import threading
+import time
+from Config import _
+from handler.Metrics import Metrics
+from monitoring.JsonFileLogReader import parse_docker_timestamp
+from monitoring.LogMatcher import LogMatcher
+from monitoring.Modules.MonitorBase import Monitor
+from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+from monitoring.SlidingCounter import SlidingCounter
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple, Union
+
+
+class RateRule(NamedTuple):
+    """A pattern and its thresholds, configured by the labels logs.rate.<name>.*"""
+
+    name: str
+    matcher: LogMatcher
+    window: int  # Seconds
+    threshold: int  # Matches per window, 0 disables it
+    baseline: float  # Factor of the baseline rate, 0 disables it
+    baseline_window: int  # Seconds
+
+
+class MonitorRate(MonitorLogfile):
+    """
+    Log monitoring, which alerts on the rate of matching lines instead of single lines. Every rule counts the lines
+    matching its pattern in a sliding window of per-second buckets, which carries across the checks. An alert is sent,
+    if the number of matches in the window crosses the threshold of the rule, e.g. more than 50 timeouts per minute,
+    or if the rate of the window is a multiple of the baseline rate of the longer baseline window before it.
+
+    The logs are fetched like for MonitorLogfile. Each match is counted at the second of its log line, so the
+    windows do not depend on the check interval.
+    """
+
+    # Counters per container and rule. Kept on class level like the log cursors, since the scheduler may pickle the
+    # monitor for every job run. The lock also guards the counters, since the runs of a job may overlap.
+    _counters: Dict[str, Dict[str, SlidingCounter]] = {}
+    _counters_lock: threading.Lock = threading.Lock()
+
+    # Label prefix of the rules
+    _rule_prefix: str = "io.smclab.dockmon.monitoring.logs.rate."
+
+    # Matches of a window, below which the baseline is not compared, so single lines of rare patterns do not alert
+    _baseline_min_matches: int = 10
+
+    def __init__(self, container_name: str, container_labels: Dict[str, Any]):
+        super().__init__(container_name, container_labels)
+
+        self._rules: List[RateRule] = []
+        names = sorted(
+            label[len(self._rule_prefix) : -len(".pattern")]
+            for label in self._container_labels
+            if label.startswith(self._rule_prefix) and label.endswith(".pattern")
+        )
+        for name in names:
+            prefix = self._rule_prefix + name + "."
+            try:
+                self._rules.append(
+                    RateRule(
+                        name,
+                        LogMatcher(
+                            [],
+                            self._excludes,
+                            self._container_labels[prefix + "pattern"],
+                            self.get_label_bool("io.smclab.dockmon.monitoring.logs.casesensitive", True),
+                        ),
+                        int(self._container_labels.get(prefix + "window", 60)),
+                        int(self._container_labels.get(prefix + "threshold", 0)),
+                        float(self._container_labels.get(prefix + "baseline", 0)),
+                        int(self._container_labels.get(prefix + "baselinewindow", 3600)),
+                    )
+                )
+            except re.error as e:
+                logging.error(_("MONITORLOG_EXCEPTION_REGEX %s %s") % (self._container_name, str(e)))
+
+    @staticmethod
+    def forget(container_name: str):
+        """Removes the counters of a container
+
+        Args:
+            container_name (str): Container Name
+        """
+        with MonitorRate._counters_lock:
+            MonitorRate._counters.pop(container_name, None)
+
+    def check_config(self) -> bool:
+        """At least one rule is needed, include and exclude words are optional
+
+        Returns:
+            bool: true, if everything is fine
+        """
+        if not Monitor.check_general_settings(self):
+            return False
+
+        if not self._rules:
+            logging.error(_("MONITORRATE_EXCEPTION_NO_RULES %s") % self._container_name)
+            return False
+
+        return True
+
+    def _uses_pool(self, logs: bytes) -> bool:
+        """The rules are matched in the thread, the process pool only matches words"""
+        return False
+
+    def _get_counter(self, rule: RateRule) -> SlidingCounter:
+        """Must be called with the lock held
+
+        Args:
+            rule (RateRule): Rule of this container
+
+        Returns:
+            SlidingCounter: Counter of the rule, large enough for its windows
+        """
+        size = max(rule.window, rule.baseline_window if rule.baseline else 0)
+        counters = self._counters.setdefault(self._container_name, {})
+        if (counter := counters.get(rule.name)) is None or counter.seconds != size:
+            counter = SlidingCounter(size, (rule.window,))
+            counters[rule.name] = counter
+        return counter
+
+    def _remove_timestamps(self, logs: memoryview) -> bytes:
+        """The timestamps are kept, so the matches can be counted at the second of their line"""
+        return bytes(logs)
+
+    def _split_seconds(self, logs: bytes) -> Iterator[Tuple[int, bytes]]:
+        """Splits the logs into the lines of each second. The lines are ordered by their timestamps, so the end of
+        a second is found by bisection, without parsing every line.
+
+        Args:
+            logs (bytes): Log lines with timestamps
+
+        Yields:
+            Iterator[Tuple[int, bytes]]: Unix time in seconds and the lines of this second without timestamps
+        """
+        position = 0
+        while position < len(logs):
+            # The timestamp up to the seconds, e.g. 2022-04-28T09:45:00
+            second = logs[position : position + 19]
+
+            low, high = position, len(logs)
+            while low < high:
+                start = logs.rfind(b"\n", 0, (low + high) // 2) + 1
+                end = logs.find(b"\n", start)
+                end = len(logs) if end == -1 else end
+                if logs[start : start + 19] <= second:
+                    low = end + 1
+                else:
+                    high = start
+
+            yield (
+                parse_docker_timestamp(second) // 1000000000,
+                self._timestamp_prefix.sub(b"", logs[position:low]),
+            )
+            position = low
+
+    def _evaluate(self, logs: bytes) -> Union[bool, List[dict]]:
+        """Counts the matches of all rules in the new log lines at the second of their line and checks the
+        thresholds
+
+        Args:
+            logs (bytes): New log lines with timestamps
+
+        Returns:
+            Union[bool, List[dict]]: Alerts as described in check(), one per crossed threshold, or False
+        """
+        seconds = list(self._split_seconds(logs))
+
+        metrics = Metrics.getInstance()
+        size = sum(len(lines) for _second, lines in seconds)
+        metrics.inc("dockmon_log_bytes_total", size, container=self._container_name)
+        metrics.inc("dockmon_log_lines_total", logs.count(b"\n"), container=self._container_name)
+
+        now = time.time()
+        alerts: List[dict] = []
+        for rule in self._rules:
+            matches: List[Tuple[int, int]] = []
+            example = b""
+            for second, lines in seconds:
+                count = 0
+                for start, end in rule.matcher.match_lines(lines):
+                    count += 1
+                    example = lines[start:end]
+                if count:
+                    matches.append((second, count))
+
+            with self._counters_lock:
+                counter = self._get_counter(rule)
+                for second, count in matches:
+                    counter.add(count, second)
+                count = counter.sum(rule.window, now)
+                total = counter.sum(counter.seconds, now)
+                age = counter.age(now)
+
+            if not count:
+                continue
+
+            data = _("MONITORRATE_COUNT %d %d") % (count, rule.window)
+            if matches:
+                data += "\n" + _("MONITORLOG_EXAMPLE %s") % example.decode(errors="replace")
+
+            if rule.threshold and count > rule.threshold:
+                alerts.append(
+                    self._build_alert(_("MONITORRATE_TRIGGER_THRESHOLD %s %d") % (rule.name, rule.threshold), data)
+                )
+
+            # The baseline is the rate of the baseline window before the current window, once there is one window
+            # of history. The counter holds no events before its age, so its total is the sum of both windows.
+            history = min(age, rule.baseline_window) - rule.window
+            if rule.baseline and history >= rule.window and count >= self._baseline_min_matches:
+                baseline = (total - count) / history
+                if count / rule.window > rule.baseline * max(baseline, 1 / history):
+                    alerts.append(
+                        self._build_alert(
+                            _("MONITORRATE_TRIGGER_BASELINE %s") % rule.name,
+                            data + "\n" + _("MONITORRATE_BASELINE %.1f") % (baseline * rule.window),
+                        )
+                    )
+
+        return alerts or False
@@ -0,0 +1,336 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import json
+import logging
+import math
+import threading
+import numpy as np
+from Config import (
+    _,
+    DOCKMON_CONFIG_ASYNC_CONCURRENCY,
+    DOCKMON_CONFIG_DOCKER_SOCKET,
+    DOCKMON_CONFIG_STATS_INTERVAL,
+)
+from handler.AsyncDockerClient import AsyncDockerClient
+from handler.Metrics import Metrics, Sample
+from monitoring.Modules.MonitorBase import Monitor
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MonitorStats(Monitor):
+    """
+    Monitoring of the resource usage of containers with the label stats. There is no job per container: collect()
+    fetches the stats of all registered containers at once every DOCKMON_CONFIG_STATS_INTERVAL seconds, as concurrent
+    requests on a single event loop, so the stats calls of the Docker daemon do not block a thread each.
+
+    The samples are kept in one NumPy array with a fixed-size ring buffer per container, so the moving averages of all
+    containers are compared to their thresholds at once. An alert is sent, if the average CPU or memory usage over
+    the window of a container is above its threshold.
+    """
+
+    # Metrics of the samples: CPU usage in percent of one core, memory usage in percent of the limit
+    _cpu: int = 0
+    _memory: int = 1
+
+    # Samples per container, windows are limited to this many intervals
+    _slots: int = 60
+
+    # All state is kept on class level, since the containers are sampled together
+    _lock: threading.Lock = threading.Lock()
+    _rows: Dict[str, int] = {}  # Container name -> row of the arrays
+    _monitors: List[Optional["MonitorStats"]] = []  # Row -> monitor of the container
+    _samples: np.ndarray = np.full((0, _slots, 2), np.nan)  # Rows x slots x metrics
+    _thresholds: np.ndarray = np.full((0, 2), np.nan)  # Rows x metrics, NaN disables it
+    _windows: np.ndarray = np.zeros(0, dtype=np.int64)  # Rows -> samples per window
+    _usage: np.ndarray = np.full((0, 2), np.nan)  # Rows -> last CPU usage of the container and the system
+    _position: int = 0  # Slot of the next sample, the same for all rows
+
+    # Event loop of the stats requests, started with the first container
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _client: Optional[AsyncDockerClient] = None
+
+    _collector_registered: bool = False
+
+    def __init__(self, container_name: str, container_labels: Dict[str, Any]):
+        super().__init__(container_name, container_labels)
+
+        self._window = int(self._container_labels.get("io.smclab.dockmon.monitoring.stats.window", 60))
+        self._cpu_threshold = self._get_threshold("io.smclab.dockmon.monitoring.stats.cpu")
+        self._memory_threshold = self._get_threshold("io.smclab.dockmon.monitoring.stats.memory")
+
+    def _get_threshold(self, label: str) -> float:
+        """
+        Args:
+            label (str): Name of the Label
+
+        Returns:
+            float: Threshold in percent, NaN if the label is not set
+        """
+        value = self._container_labels.get(label)
+        return np.nan if value in (None, "") else float(value)
+
+    def check_config(self) -> bool:
+        """At least one threshold is needed
+
+        Returns:
+            bool: true, if everything is fine
+        """
+        if not self.check_general_settings():
+            return False
+
+        if math.isnan(self._cpu_threshold) and math.isnan(self._memory_threshold):
+            logging.error(_("MONITORSTATS_EXCEPTION_NO_THRESHOLD %s") % self._container_name)
+            return False
+
+        return True
+
+    def start(self):
+        """Registers the container for the next collection. A container, which is already registered, keeps its
+        samples, if the window did not change.
+        """
+        windows = max(1, min(self._slots, math.ceil(self._window / int(DOCKMON_CONFIG_STATS_INTERVAL))))
+
+        with self._lock:
+            cls = MonitorStats
+            if (row := cls._rows.get(self._container_name)) is None:
+                if None in cls._monitors:
+                    row = cls._monitors.index(None)
+                else:
+                    row = len(cls._monitors)
+                    cls._grow()
+                cls._rows[self._container_name] = row
+                cls._reset(row)
+            elif cls._windows[row] != windows:
+                cls._reset(row)
+
+            cls._monitors[row] = self
+            cls._thresholds[row] = (self._cpu_threshold, self._memory_threshold)
+            cls._windows[row] = windows
+
+            if not cls._collector_registered:
+                Metrics.getInstance().add_collector(cls._collect_metrics)
+                cls._collector_registered = True
+
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(target=cls._loop.run_forever, name="dockmon_stats", daemon=True).start()
+
+    @staticmethod
+    def forget(container_name: str):
+        """Removes a container from the collection. Its row is reused by the next container.
+
+        Args:
+            container_name (str): Container Name
+        """
+        with MonitorStats._lock:
+            if (row := MonitorStats._rows.pop(container_name, None)) is not None:
+                MonitorStats._monitors[row] = None
+                MonitorStats._thresholds[row] = np.nan
+                MonitorStats._windows[row] = 0
+
+    @staticmethod
+    def get_container_names() -> List[str]:
+        """
+        Returns:
+            List[str]: Names of the registered containers
+        """
+        with MonitorStats._lock:
+            return list(MonitorStats._rows)
+
+    @classmethod
+    def _grow(cls):
+        """Doubles the rows of the arrays. Must be called with the lock held."""
+        rows = max(16, 2 * len(cls._monitors))
+        added = rows - len(cls._monitors)
+        cls._monitors.extend([None] * added)
+        cls._samples = np.concatenate((cls._samples, np.full((added, cls._slots, 2), np.nan)))
+        cls._thresholds = np.concatenate((cls._thresholds, np.full((added, 2), np.nan)))
+        cls._windows = np.concatenate((cls._windows, np.zeros(added, dtype=np.int64)))
+        cls._usage = np.concatenate((cls._usage, np.full((added, 2), np.nan)))
+
+    @classmethod
+    def _reset(cls, row: int):
+        """Clears the samples of a row. Must be called with the lock held."""
+        cls._samples[row] = np.nan
+        cls._usage[row] = np.nan
+
+    @classmethod
+    def collect(cls) -> Dict[str, List[dict]]:
+        """Fetches the stats of all registered containers and evaluates their thresholds. This is the job function of
+        the stats job.
+
+        Returns:
+            Dict[str, List[dict]]: Alerts as described in Monitor.check() per container
+        """
+        with cls._lock:
+            names = list(cls._rows)
+            loop = cls._loop
+
+        if not names or loop is None:
+            return {}
+
+        responses = asyncio.run_coroutine_threadsafe(cls._fetch_all(names), loop).result()
+
+        with cls._lock:
+            rows = len(cls._monitors)
+            sample = np.full((rows, 2), np.nan)
+            usage = np.full((rows, 2), np.nan)
+            cpus = np.full(rows, np.nan)
+            for container_name, stats in zip(names, responses):
+                if stats is None or (row := cls._rows.get(container_name)) is None:
+                    continue
+                usage[row], cpus[row], sample[row, cls._memory] = cls._parse(stats)
+
+            # CPU usage is the share of the CPU time of the container in the CPU time of the system since the last
+            # sample, scaled to the number of cores
+            with np.errstate(invalid="ignore", divide="ignore"):
+                delta = usage - cls._usage
+                sample[:, cls._cpu] = np.where(delta[:, 1] > 0, delta[:, 0] / delta[:, 1] * cpus * 100, np.nan)
+            cls._usage = np.where(np.isnan(usage), cls._usage, usage)
+
+            cls._samples[:, cls._position] = sample
+            cls._position = (cls._position + 1) % cls._slots
+
+            return cls._evaluate()
+
+    @classmethod
+    async def _fetch_all(cls, names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Args:
+            names (List[str]): Container names
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: Decoded stats per container, None if they could not be fetched
+        """
+        if cls._client is None:
+            # A sample, which takes longer than the interval, is skipped
+            cls._client = AsyncDockerClient(
+                DOCKMON_CONFIG_DOCKER_SOCKET,
+                int(DOCKMON_CONFIG_ASYNC_CONCURRENCY),
+                int(DOCKMON_CONFIG_STATS_INTERVAL),
+            )
+
+        return await asyncio.gather(*(cls._fetch(cls._client, container_name) for container_name in names))
+
+    @staticmethod
+    async def _fetch(client: AsyncDockerClient, container_name: str) -> Optional[Dict[str, Any]]:
+        """Fetches a single sample of the stats. With one-shot, the daemon answers at once instead of waiting for
+        a second sample, since the CPU usage is calculated from the previous sample anyway.
+
+        Args:
+            client (AsyncDockerClient): Client of the event loop
+            container_name (str): Container Name
+
+        Returns:
+            Optional[Dict[str, Any]]: Decoded stats, None if they could not be fetched
+        """
+        try:
+            return json.loads(
+                await client.get("/containers/%s/stats" % container_name, {"stream": 0, "one-shot": 1})
+            )
+        except Exception as e:
+            logging.warning(_("MONITORSTATS_EXCEPTION_STATS %s %s") % (container_name, repr(e)))
+            return None
+
+    @staticmethod
+    def _parse(stats: Dict[str, Any]) -> Tuple[Tuple[float, float], float, float]:
+        """Reads the usage from the stats of a container, like docker stats does
+
+        Args:
+            stats (Dict[str, Any]): Decoded stats
+
+        Returns:
+            Tuple[Tuple[float, float], float, float]: CPU time of the container and the system, number of cores,
+                                                      memory usage in percent of the limit
+        """
+        cpu_stats = stats.get("cpu_stats") or {}
+        container_cpu = cpu_stats.get("cpu_usage", {}).get("total_usage")
+        system_cpu = cpu_stats.get("system_cpu_usage")
+        cpus = cpu_stats.get("online_cpus") or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+
+        # The inactive page cache can be reclaimed, so it does not count as usage. cgroup v1 reports it as
+        # total_inactive_file, v2 as inactive_file.
+        memory_stats = stats.get("memory_stats") or {}
+        memory, limit = memory_stats.get("usage"), memory_stats.get("limit")
+        details = memory_stats.get("stats") or {}
+        cache = details.get("total_inactive_file", details.get("inactive_file", 0))
+
+        return (
+            (
+                np.nan if container_cpu is None or system_cpu is None else container_cpu,
+                np.nan if container_cpu is None or system_cpu is None else system_cpu,
+            ),
+            cpus,
+            (memory - cache if cache < memory else memory) / limit * 100 if memory and limit else np.nan,
+        )
+
+    @classmethod
+    def _evaluate(cls) -> Dict[str, List[dict]]:
+        """Compares the moving averages of all containers with their thresholds. The average is calculated over the
+        samples of the window of each container. Missing samples are left out, but at least half of the window
+        is needed. Must be called with the lock held.
+
+        Returns:
+            Dict[str, List[dict]]: Alerts per container
+        """
+        # Age of the slots, 0 is the newest sample
+        ages = (cls._position - 1 - np.arange(cls._slots)) % cls._slots
+        samples = np.where((ages[None, :] < cls._windows[:, None])[:, :, None], cls._samples, np.nan)
+
+        counts = np.count_nonzero(~np.isnan(samples), axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = np.nansum(samples, axis=1) / counts
+            alerting = (counts >= (cls._windows[:, None] + 1) // 2) & (averages > cls._thresholds)
+
+        alerts: Dict[str, List[dict]] = {}
+        for row, metric in zip(*np.nonzero(alerting)):
+            if not (monitor := cls._monitors[row]):
+                continue
+            trigger = (
+                _("MONITORSTATS_TRIGGER_CPU %d") if metric == cls._cpu else _("MONITORSTATS_TRIGGER_MEMORY %d")
+            ) % cls._thresholds[row, metric]
+            alerts.setdefault(monitor._container_name, []).append(
+                {
+                    "data": _("MONITORSTATS_AVERAGE %.1f %d")
+                    % (averages[row, metric], cls._windows[row] * int(DOCKMON_CONFIG_STATS_INTERVAL)),
+                    "trigger": trigger,
+                    "graceperiod": monitor.get_grace_period(),
+                }
+            )
+
+        return alerts
+
+    @classmethod
+    def _collect_metrics(cls) -> List[Sample]:
+        """
+        Returns:
+            List[Sample]: Last sample of the CPU and memory usage per container
+        """
+        samples: List[Sample] = []
+        with cls._lock:
+            last = cls._samples[:, (cls._position - 1) % cls._slots]
+            for container_name, row in cls._rows.items():
+                for name, metric in (
+                    ("dockmon_container_cpu_percent", cls._cpu),
+                    ("dockmon_container_memory_percent", cls._memory),
+                ):
+                    if not math.isnan(last[row, metric]):
+                        samples.append((name, {"container": container_name}, float(last[row, metric])))
+        return samples
@@ -16,15 +16,49 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import datetime
 import logging
 import os
 import sys
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, JobExecutionEvent
+import threading
+import time
+import zlib
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
-from Config import _
+from apscheduler.triggers.interval import IntervalTrigger
+from Config import (
+    _,
+    DOCKMON_CONFIG_CHECKPOINT_INTERVAL,
+    DOCKMON_CONFIG_DISCOVERY_INTERVAL,
+    DOCKMON_CONFIG_ENGINE,
+    DOCKMON_CONFIG_JOBSTORE,
+    DOCKMON_CONFIG_SCHEDULE,
+    DOCKMON_CONFIG_STATS_INTERVAL,
+    DOCKMON_CONFIG_THREADPOOL_WORKERS,
+)
+from handler.DockerEventHandler import DockerEventHandler
 from handler.DockerHandler import DockerHandler
+from handler.Metrics import Metrics, Sample
 from handler.SlackReporting import SlackReport
+from monitoring.AdaptiveInterval import AdaptiveInterval
+from monitoring.AsyncMonitorEngine import AsyncMonitorEngine
+from monitoring.Modules.MonitorBase import Monitor
+from monitoring.Modules.MonitorEvents import MonitorEvents
 from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+from monitoring.Modules.MonitorLogTemplates import MonitorLogTemplates
+from monitoring.Modules.MonitorRate import MonitorRate
+from monitoring.Modules.MonitorStats import MonitorStats
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
 
 class MonitorScheduler:
@@ -37,8 +71,36 @@ class MonitorScheduler:
 
     _instance = None
     _scheduler: BackgroundScheduler
+
+    # Jobs of DockMon itself, which do not belong to a container
+    _internal_jobs: Tuple[str, ...] = ("dockmon_discovery", "dockmon_checkpoint", "dockmon_stats")
+
     _slack: SlackReport = SlackReport.getInstance()
     _docker: DockerHandler = DockerHandler.getInstance()
+    _events: DockerEventHandler = DockerEventHandler.getInstance()
+
+    # Log streams of containers in stream mode: container name -> (thread, stop event, monitor)
+    _streams: Dict[str, Tuple[threading.Thread, threading.Event, MonitorLogfile]] = {}
+    _streams_lock: threading.Lock = threading.Lock()
+
+    # Adaptive check intervals of the containers with the label checkinterval.adaptive
+    _adaptive: Dict[str, AdaptiveInterval] = {}
+
+    # Log monitors by the label logs.detector
+    _log_detectors: Dict[str, Type[MonitorLogfile]] = {
+        "keywords": MonitorLogfile,
+        "templates": MonitorLogTemplates,
+        "rate": MonitorRate,
+    }
+
+    # Fingerprints of the configured containers: container name -> (container ID, hash of the DockMon labels)
+    _fingerprints: Dict[str, Tuple[str, int]] = {}
+
+    # Serializes adding, reconfiguring and removing containers, which is done by the event thread and the discovery
+    _config_lock: threading.RLock = threading.RLock()
+
+    # Reference time of the phases of the spread schedule
+    _phase_epoch: datetime.datetime = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
 
     @staticmethod
     def getInstance():
@@ -53,25 +115,27 @@ class MonitorScheduler:
             raise Exception("Singleton!")
         else:
 
-            # Clear JobStorage on Startup
-            try:
-                os.remove(sys.path[0] + "/MonitoringJobs.sqlite")
-            except FileNotFoundError:
-                pass
+            # The memory job store keeps the jobs as they are. The SQLite job store pickles every job on every run
+            # and is only imported by APScheduler, if it is configured.
+            jobstore: Dict[str, str] = {"type": "memory"}
+            if DOCKMON_CONFIG_JOBSTORE == "sqlite":
+                # Clear JobStorage on Startup
+                try:
+                    os.remove(sys.path[0] + "/MonitoringJobs.sqlite")
+                except FileNotFoundError:
+                    pass
+
+                jobstore = {
+                    "type": "sqlalchemy",
+                    "url": "sqlite:///" + sys.path[0] + "/MonitoringJobs.sqlite",
+                }
 
             self._scheduler = BackgroundScheduler(
                 {
-                    "apscheduler.jobstores.default": {
-                        "type": "sqlalchemy",
-                        "url": "sqlite:///" + sys.path[0] + "/MonitoringJobs.sqlite",
-                    },
+                    "apscheduler.jobstores.default": jobstore,
                     "apscheduler.executors.default": {
                         "class": "apscheduler.executors.pool:ThreadPoolExecutor",
-                        "max_workers": "30",
-                    },
-                    "apscheduler.executors.processpool": {
-                        "type": "processpool",
-                        "max_workers": "5",
+                        "max_workers": str(DOCKMON_CONFIG_THREADPOOL_WORKERS),
                     },
                     "apscheduler.job_defaults.coalesce": "true",
                     "apscheduler.job_defaults.max_instances": "3",
@@ -79,6 +143,12 @@ class MonitorScheduler:
                 }
             )
 
+            # The asyncio engine replaces the interval jobs of the monitors
+            self._engine: Optional[AsyncMonitorEngine] = None
+            if DOCKMON_CONFIG_ENGINE == "asyncio":
+                self._engine = AsyncMonitorEngine.getInstance()
+                self._engine.set_reporter(self.report_alert)
+
             # Remove APScheduler INFO Logs, only log on WARNING or ERROR
             logging.getLogger("apscheduler").setLevel(logging.WARNING)
 
@@ -97,26 +167,419 @@ class MonitorScheduler:
 
         # We know that the discovery event.retval is a Dict - So we iterate over it to configure monitoring jobs.
         for container_name, labels in event.retval.items():
+            try:
+                self._add_container_monitoring(container_name, labels)
+            except Exception as e:
+                # A single container must not abort the rest of the discovery
+                logging.error(_("MONITORSCHEDULER_EXCEPTION_CONFIGURE %s %s") % (container_name, str(e)))
+
+    def _handle_container_event(self, event: Dict[str, Any]):
+        """Handles the container events of the Docker event stream, so monitoring jobs are added and removed
+        as soon as a container starts or stops. The discovery job only remains as a safety net.
+
+        Args:
+            event (Dict[str, Any]): Decoded Docker event of a container with the Label io.smclab.dockmon.enabled
+        """
+        attributes: Dict[str, Any] = event.get("Actor", {}).get("Attributes", {})
+        container_name: str = attributes.get("name") or event.get("id", "")
+
+        if event["Action"] == "start":
+            labels = {k: v for k, v in attributes.items() if k.startswith("io.smclab.dockmon.")}
+            self._add_container_monitoring(container_name, labels, event.get("id"))
+
+        elif event["Action"] == "die":
+            # The state is kept, so the checks resume where they stopped, if the container is started again
+            self._remove_container_monitoring(container_name, forget=False)
+
+        elif event["Action"] == "destroy":
+            self._remove_container_monitoring(container_name)
+
+        elif event["Action"] == "rename":
+            self._remove_container_monitoring(attributes.get("oldName", "").lstrip("/"))
+            if self._docker.check_container_still_active(container_name):
+                labels = {k: v for k, v in attributes.items() if k.startswith("io.smclab.dockmon.")}
+                self._add_container_monitoring(container_name, labels, event.get("id"))
+
+    def _handle_lifecycle_event(self, event: Dict[str, Any]):
+        """Reports the alerts of the events of containers with the label events right away
+
+        Args:
+            event (Dict[str, Any]): Decoded Docker event of a container with the Label io.smclab.dockmon.enabled
+        """
+        attributes: Dict[str, Any] = event.get("Actor", {}).get("Attributes", {})
+        container_name: str = attributes.get("name") or event.get("id", "")
+
+        monitor = MonitorEvents(
+            container_name, {k: v for k, v in attributes.items() if k.startswith("io.smclab.dockmon.")}
+        )
+        if not monitor.get_label_bool("io.smclab.dockmon.monitoring.events", False):
+            MonitorEvents.forget(container_name)
+            return
+
+        if alerts := monitor.handle(event):
+            self.report_alert(container_name, alerts)
+
+    def _get_fingerprint(
+        self, container_name: str, labels: Dict[str, Any], container_id: Optional[str] = None
+    ) -> Tuple[str, int]:
+        """Returns the fingerprint of the configuration of a container. It changes, if the container is recreated
+        or its DockMon labels change.
+
+        Args:
+            container_name (str): Container Name
+            labels (Dict[str, Any]): Container Labels
+            container_id (Optional[str], optional): Container ID, if known. Defaults to None.
+
+        Returns:
+            Tuple[str, int]: Container ID and hash of the DockMon labels
+        """
+        if container_id is None:
+            container = self._docker.get_container_obj_by_name(container_name)
+            container_id = container.id if container else ""
+
+        return (
+            container_id,
+            hash(frozenset((k, str(v)) for k, v in labels.items() if k.startswith("io.smclab.dockmon."))),
+        )
+
+    def _add_container_monitoring(
+        self, container_name: str, labels: Dict[str, Any], container_id: Optional[str] = None
+    ):
+        """Configures the monitoring of a container. Containers with the same fingerprint as before are skipped
+        without parsing their labels again. The monitoring of a recreated container or of changed labels is
+        replaced in place. The fingerprint of a container, whose configuration failed, is not kept, so the next
+        discovery or event tries again.
+
+        Args:
+            container_name (str): Container Name
+            labels (Dict[str, Any]): Container Labels
+            container_id (Optional[str], optional): Container ID, if known. Defaults to None.
+        """
+        with self._config_lock:
+            fingerprint = self._get_fingerprint(container_name, labels, container_id)
+            if self._fingerprints.get(container_name) == fingerprint:
+                return
+
+            if container_name in self._fingerprints:
+                logging.info(_("MONITORSCHEDULER_RECONFIGURE %s") % container_name)
+
+            # The resource usage of all containers is collected together by the stats job
+            configured = True
+            _stats: Optional[MonitorStats] = None
+            if Monitor.parse_label_bool(labels, "io.smclab.dockmon.monitoring.stats", False):
+                _stats = MonitorStats(container_name, labels)
+                if not _stats.check_config():
+                    _stats = None
+                    configured = False
+
+            if _stats:
+                _stats.start()
+            else:
+                MonitorStats.forget(container_name)
 
             # Check for Logfile Monitoring
+            _mon: Optional[MonitorLogfile] = None
             if labels.get("io.smclab.dockmon.monitoring.logs", False):
-
-                _mon = MonitorLogfile(container_name, labels)
-                if _mon.check_config() and not self._scheduler.get_job(container_name):
-                    self._scheduler.add_job(
-                        _mon.check,
-                        trigger="interval",
-                        seconds=labels.get("io.smclab.dockmon.monitoring.checkinterval", 60),
-                        id=container_name,
-                    )
-                    logging.info(
-                        _("MONITORSCHEDULER_ADDED_SCHEDULER_THREAD %s %d")
-                        % (
-                            container_name,
-                            labels.get("io.smclab.dockmon.monitoring.checkinterval", 60),
-                        )
+                detector = labels.get("io.smclab.dockmon.monitoring.logs.detector", "keywords")
+                _mon = self._log_detectors.get(detector, MonitorLogfile)(container_name, labels)
+                if not _mon.check_config():
+                    _mon = None
+                    configured = False
+
+            if configured:
+                self._fingerprints[container_name] = fingerprint
+            else:
+                self._fingerprints.pop(container_name, None)
+
+            # Stream mode follows the logs in a dedicated thread instead of an interval job
+            stream = _mon is not None and labels.get("io.smclab.dockmon.monitoring.logs.mode", "poll") == "stream"
+
+            # The stream of a changed container is restarted, its job is kept, unless the mode changed
+            self._stop_log_stream(container_name)
+            if not _mon or stream:
+                self._remove_job(container_name, reconfigure=True)
+
+            if not _mon:
+                return
+
+            if stream:
+                self._start_log_stream(container_name, _mon)
+
+            elif self._engine:
+                # Replaces the task of a changed container
+                interval = self._get_check_interval(container_name, _mon, labels)
+                self._engine.add(
+                    container_name,
+                    _mon,
+                    interval,
+                    self._adaptive.get(container_name),
+                    self.get_phase(container_name),
+                )
+                logging.info(_("MONITORSCHEDULER_ADDED_SCHEDULER_THREAD %s %d") % (container_name, interval))
+
+            elif job := self._scheduler.get_job(container_name):
+                # The job of a changed container keeps its schedule, unless the interval changed
+                interval = self._get_check_interval(container_name, _mon, labels)
+                self._scheduler.modify_job(container_name, func=_mon.run_check)
+                if job.trigger.interval != datetime.timedelta(seconds=interval):
+                    self._scheduler.reschedule_job(
+                        container_name, trigger=self._get_trigger(container_name, interval)
                     )
 
+            else:
+                interval = self._get_check_interval(container_name, _mon, labels)
+                self._scheduler.add_job(
+                    _mon.run_check,
+                    trigger=self._get_trigger(container_name, interval),
+                    id=container_name,
+                )
+                logging.info(_("MONITORSCHEDULER_ADDED_SCHEDULER_THREAD %s %d") % (container_name, interval))
+
+    @staticmethod
+    def get_phase(container_name: str) -> Optional[float]:
+        """Returns the phase of the checks of a container within their interval, if DOCKMON_CONFIG_SCHEDULE is
+        spread. It is derived from the name, so it is evenly distributed over all containers and stays the same across
+        restarts of DockMon and the container.
+
+        Args:
+            container_name (str): Container Name
+
+        Returns:
+            Optional[float]: Phase as a fraction of the interval in [0, 1), None if the schedule is fixed
+        """
+        if DOCKMON_CONFIG_SCHEDULE != "spread":
+            return None
+
+        return zlib.crc32(container_name.encode()) / 2 ** 32
+
+    def _get_trigger(self, container_name: str, interval: int) -> IntervalTrigger:
+        """Returns the trigger of the monitoring job of a container. With the spread schedule, the job runs at the
+        phase of the container within each interval, counted from _phase_epoch.
+
+        Args:
+            container_name (str): Container Name
+            interval (int): Check interval in seconds
+
+        Returns:
+            IntervalTrigger: Trigger of the job
+        """
+        if (phase := self.get_phase(container_name)) is None:
+            return IntervalTrigger(seconds=interval, timezone=self._scheduler.timezone)
+
+        return IntervalTrigger(
+            seconds=interval,
+            start_date=self._phase_epoch + datetime.timedelta(seconds=phase * interval),
+            timezone=self._scheduler.timezone,
+        )
+
+    def _get_check_interval(self, container_name: str, monitor: MonitorLogfile, labels: Dict[str, Any]) -> int:
+        """Returns the first check interval of a container. With the label checkinterval.adaptive, the interval
+        is adapted to the new log bytes of the checks afterwards.
+
+        Args:
+            container_name (str): Container Name
+            monitor (MonitorLogfile): Configured Monitor of the container
+            labels (Dict[str, Any]): Container Labels
+
+        Returns:
+            int: Check interval in seconds
+        """
+        interval = int(labels.get("io.smclab.dockmon.monitoring.checkinterval", 60))
+
+        if monitor.get_label_bool("io.smclab.dockmon.monitoring.checkinterval.adaptive", False):
+            adaptive = AdaptiveInterval(
+                container_name,
+                interval,
+                int(labels.get("io.smclab.dockmon.monitoring.checkinterval.min", 10)),
+                int(labels.get("io.smclab.dockmon.monitoring.checkinterval.max", 600)),
+            )
+            self._adaptive[container_name] = adaptive
+            return adaptive.interval
+
+        # The label may have been removed from a recreated container
+        if self._adaptive.pop(container_name, None):
+            AdaptiveInterval.forget(container_name)
+
+        return interval
+
+    def _adapt_check_interval(self, container_name: str):
+        """Reschedules the job of a container with an adaptive check interval after a run, if the interval changed
+
+        Args:
+            container_name (str): Container Name
+        """
+        if not (adaptive := self._adaptive.get(container_name)):
+            return
+
+        if interval := adaptive.next_interval():
+            try:
+                self._scheduler.reschedule_job(container_name, trigger=self._get_trigger(container_name, interval))
+            except JobLookupError:
+                pass
+
+    def _collect_metrics(self) -> List[Sample]:
+        """
+        Returns:
+            List[Sample]: Current check intervals of the containers with adaptive intervals
+        """
+        return [
+            ("dockmon_check_interval_seconds", {"container": container_name}, adaptive.interval)
+            for container_name, adaptive in list(self._adaptive.items())
+        ]
+
+    def _remove_container_monitoring(self, container_name: str, forget: bool = True):
+        """Removes all monitoring of a container
+
+        Args:
+            container_name (str): Container Name
+            forget (bool, optional): Also drop the state of the container, like its log cursor, templates, rate
+                                     counters and metrics. A stopped container keeps it for its restart.
+                                     Defaults to True.
+        """
+        with self._config_lock:
+            self._fingerprints.pop(container_name, None)
+            self._remove_job(container_name)
+            MonitorStats.forget(container_name)
+            self._stop_log_stream(container_name)
+            if not forget:
+                return
+
+            MonitorLogfile.forget(container_name)
+            MonitorLogTemplates.forget(container_name)
+            MonitorRate.forget(container_name)
+
+            # The series of the container would be rendered forever
+            metrics = Metrics.getInstance()
+            metrics.remove(container=container_name)
+            metrics.remove(job=container_name)
+
+    def _remove_missing_container(self, container_name: str):
+        """Removes the monitoring of a container, which is no longer running, but whose event was missed. Its state
+        is only dropped, if the container was removed.
+
+        Args:
+            container_name (str): Container Name
+        """
+        self._remove_container_monitoring(
+            container_name, forget=self._docker.get_container_obj_by_name(container_name) is None
+        )
+
+    def _remove_job(self, container_name: str, reconfigure: bool = False):
+        """Removes the interval job or the task of the asyncio engine of a container
+
+        Args:
+            container_name (str): Container Name
+            reconfigure (bool, optional): The container is still running, but its monitoring changed.
+                                          Defaults to False.
+        """
+        message = (
+            _("MONITORSCHEDULER_REMOVE_JOB_RECONFIGURE %s")
+            if reconfigure
+            else _("MONITORSCHEDULER_REMOVE_JOB_MISSING_CONTAINER %s")
+        )
+
+        if self._scheduler.get_job(container_name):
+            self._scheduler.remove_job(container_name)
+            logging.info(message % container_name)
+
+        if self._engine and self._engine.has(container_name):
+            self._engine.remove(container_name)
+            logging.info(message % container_name)
+
+        if self._adaptive.pop(container_name, None):
+            AdaptiveInterval.forget(container_name)
+
+    def _stop_log_stream(self, container_name: str):
+        """Stops the log stream of a container, if it is followed
+
+        Args:
+            container_name (str): Container Name
+        """
+        with self._streams_lock:
+            stream = self._streams.get(container_name)
+
+        if stream:
+            _thread, stop, monitor = stream
+            stop.set()
+            monitor.stop_follow()
+
+    def _start_log_stream(self, container_name: str, monitor: MonitorLogfile):
+        """Starts following the logs of a container, if it is not already followed.
+
+        Args:
+            container_name (str): Container Name
+            monitor (MonitorLogfile): Configured Monitor of the container
+        """
+        with self._streams_lock:
+            # The thread of a stopped stream may still be running, until its stream is closed
+            if (stream := self._streams.get(container_name)) and not stream[1].is_set():
+                return
+
+            stop = threading.Event()
+            thread = threading.Thread(
+                target=self._run_log_stream,
+                args=(container_name, monitor, stop),
+                name="dockmon_stream_%s" % container_name,
+                daemon=True,
+            )
+            self._streams[container_name] = (thread, stop, monitor)
+            thread.start()
+
+        logging.info(_("MONITORSCHEDULER_ADDED_STREAM_THREAD %s") % container_name)
+
+    def _run_log_stream(self, container_name: str, monitor: MonitorLogfile, stop: threading.Event):
+        """Thread target of a log stream. Alerts are handed to the same reporting path as the interval jobs.
+
+        Args:
+            container_name (str): Container Name
+            monitor (MonitorLogfile): Configured Monitor of the container
+            stop (threading.Event): Stops the stream, if set
+        """
+        try:
+            monitor.follow(lambda alert: self.report_alert(container_name, alert), stop)
+        finally:
+            with self._streams_lock:
+                if self._streams.get(container_name, (None,))[0] is threading.current_thread():
+                    del self._streams[container_name]
+            logging.info(_("MONITORSCHEDULER_REMOVE_JOB_MISSING_CONTAINER %s") % container_name)
+
+    def stop_log_streams(self):
+        """Stops all log streams, e.g. on shutdown"""
+        with self._streams_lock:
+            streams = list(self._streams.values())
+
+        for _thread, stop, monitor in streams:
+            stop.set()
+            monitor.stop_follow()
+
+    def report_alert(self, container_name: str, alert: Union[dict, List[dict]]):
+        """Reports an alert of a monitor via Slack
+
+        Args:
+            container_name (str): Container Name / Identifier
+            alert (Union[dict, List[dict]]): Alert or alerts as returned by Monitor.check()
+        """
+        alerts = alert if isinstance(alert, list) else [alert]
+
+        logging.info(_("MONITORSCHEDULER_ALERT_TRIGGER %s") % container_name)
+        start = time.perf_counter()
+        for alert in alerts:
+            self._slack.send_slack_info_report(
+                container_name,
+                alert.get("trigger", ""),
+                alert.get("data", ""),
+                alert.get("graceperiod"),
+            )
+
+        # Alerts of containers with the label logs.profile carry the marker
+        if alerts[0].get("profile"):
+            Metrics.getInstance().observe(
+                "dockmon_check_phase_seconds",
+                time.perf_counter() - start,
+                container=container_name,
+                phase="report",
+            )
+
     def _monitoring_job_return_listener(self, event: JobExecutionEvent):
         """APscheduler Return Listener. Will be executed when a Job is executed and returns data
 
@@ -135,16 +598,55 @@ class MonitorScheduler:
             if event.job_id == "dockmon_discovery":
                 self._handle_discovery_return_event(event)
 
+            # ... Resource usage of all containers with the label stats ?
+            elif event.job_id == "dockmon_stats":
+                for container_name, alerts in event.retval.items():
+                    self.report_alert(container_name, alerts)
+
             # ... actual Monitoring Event ?
-            else:
+            elif event.job_id not in self._internal_jobs:
                 # A Monitor reported a true value!
                 if event.retval:
-                    logging.info(_("MONITORSCHEDULER_ALERT_TRIGGER %s") % event.job_id)
-                    self._slack.send_slack_info_report(
-                        event.job_id,
-                        event.retval.get("trigger", ""),
-                        event.retval.get("data", ""),
-                    )
+                    self.report_alert(event.job_id, event.retval)
+
+                self._adapt_check_interval(event.job_id)
+
+    def _scheduler_metrics_listener(self, event: JobEvent):
+        """APScheduler Listener, which records the lag, and the missed, coalesced and skipped runs of all jobs
+
+        Args:
+            event (JobEvent): Job event of the apscheduler
+        """
+        metrics = Metrics.getInstance()
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        if event.code == EVENT_JOB_SUBMITTED:
+            submission: JobSubmissionEvent = event  # type: ignore
+            lag = (now - submission.scheduled_run_times[-1]).total_seconds()
+            metrics.observe("dockmon_scheduler_lag_seconds", lag)
+
+            # Coalescing leaves only the last of all due run times, the others are inferred from the interval
+            job = self._scheduler.get_job(event.job_id)
+            interval = getattr(job.trigger, "interval", None) if job else None
+            if interval and lag >= interval.total_seconds():
+                metrics.inc(
+                    "dockmon_scheduler_coalesced_runs_total",
+                    int(lag // interval.total_seconds()),
+                    job=event.job_id,
+                )
+
+        elif event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+            execution: JobExecutionEvent = event  # type: ignore
+            metrics.observe(
+                "dockmon_scheduler_completion_seconds",
+                (now - execution.scheduled_run_time).total_seconds(),
+            )
+
+        elif event.code == EVENT_JOB_MISSED:
+            metrics.inc("dockmon_scheduler_missed_runs_total", job=event.job_id)
+
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            metrics.inc("dockmon_scheduler_skipped_runs_total", job=event.job_id)
 
     def check_scheduler_status(self) -> bool:
         """Checks the if the scheduler is still running. Also, maybe even more important, checks if all running jobs still
@@ -156,11 +658,19 @@ class MonitorScheduler:
 
         # Check if all Monitoring Jobs have corresponding containers
         for job in self._scheduler.get_jobs():
-            if not job.id == "dockmon_discovery" and not self._docker.check_container_still_active(
+            if job.id not in self._internal_jobs and not self._docker.check_container_still_active(
                 job.id
             ):
-                self._scheduler.remove_job(job.id)
-                logging.info(_("MONITORSCHEDULER_REMOVE_JOB_MISSING_CONTAINER %s" % job.id))
+                self._remove_missing_container(job.id)
+
+        if self._engine:
+            for container_name in self._engine.get_container_names():
+                if not self._docker.check_container_still_active(container_name):
+                    self._remove_missing_container(container_name)
+
+        for container_name in MonitorStats.get_container_names():
+            if not self._docker.check_container_still_active(container_name):
+                self._remove_missing_container(container_name)
 
         return self._scheduler.running
 
@@ -172,12 +682,47 @@ class MonitorScheduler:
         self._scheduler.add_listener(
             self._monitoring_job_return_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
         )
+        self._scheduler.add_listener(
+            self._scheduler_metrics_listener,
+            EVENT_JOB_SUBMITTED
+            | EVENT_JOB_EXECUTED
+            | EVENT_JOB_ERROR
+            | EVENT_JOB_MISSED
+            | EVENT_JOB_MAX_INSTANCES,
+        )
+
+        # Current intervals of the containers with adaptive check intervals
+        Metrics.getInstance().add_collector(self._collect_metrics)
+
+        # Containers are added and removed by the Docker events of their start and stop
+        self._events.subscribe(["start", "die", "destroy", "rename"], self._handle_container_event)
 
-        # Starting Discovery Thread
+        # OOM kills, crashes, restart loops and failed health checks are alerted from the same event stream
+        self._events.subscribe(MonitorEvents.actions, self._handle_lifecycle_event)
+        self._events.start()
+
+        # Starting Discovery Thread. It runs once on startup and then reconciles missed events in a slow interval.
         self._scheduler.add_job(
             self._docker.get_containers_for_monitoring,
             trigger="interval",
-            seconds=10,
+            seconds=int(DOCKMON_CONFIG_DISCOVERY_INTERVAL),
+            next_run_time=datetime.datetime.now(datetime.timezone.utc),
             id="dockmon_discovery",
         )
         logging.info(_("MONITORSCHEDULER_STARTED_DISCOVERY_THREAD"))
+
+        # Save the log cursors, so a restart resumes where the checks stopped
+        self._scheduler.add_job(
+            MonitorLogfile.save_log_checkpoint,
+            trigger="interval",
+            seconds=int(DOCKMON_CONFIG_CHECKPOINT_INTERVAL),
+            id="dockmon_checkpoint",
+        )
+
+        # Sample the resource usage of the containers with the label stats
+        self._scheduler.add_job(
+            MonitorStats.collect,
+            trigger="interval",
+            seconds=int(DOCKMON_CONFIG_STATS_INTERVAL),
+            id="dockmon_stats",
+        )
@@ -0,0 +1,114 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+from array import array
+from typing import Dict, Iterable, Optional
+
+
+class SlidingCounter:
+    """
+    Counts events in a ring buffer of per-second buckets, so the number of events of any window up to the size of
+    the buffer can be summed. Memory is constant, adding events is O(1). Buckets of seconds without events are
+    cleared, when the counter advances past them.
+
+    A running total is kept for the whole buffer and for each window given to the constructor. The totals are
+    updated, when an event is added and when a bucket leaves the window, so these windows are summed in O(1).
+    Other windows are summed from their buckets.
+    """
+
+    def __init__(self, seconds: int, windows: Iterable[int] = ()):
+        """
+        Args:
+            seconds (int): Size of the ring buffer, the longest window that can be summed
+            windows (Iterable[int], optional): Windows, which are summed often. Defaults to ().
+        """
+        self.seconds = max(1, seconds)
+        self.started = int(time.time())  # First second, which may hold events
+        self._buckets = array("q", [0]) * self.seconds
+        self._current = self.started  # Second of the newest bucket
+
+        # Window in seconds -> events of the window up to the newest bucket
+        self._totals: Dict[int, int] = {w: 0 for w in windows if 0 < w < self.seconds}
+        self._totals[self.seconds] = 0
+
+    def _advance(self, now: int):
+        """Clears the buckets of the seconds since the last event and removes the buckets, which leave the windows,
+        from their totals
+
+        Args:
+            now (int): Current unix time in seconds
+        """
+        if now <= self._current:
+            return
+
+        if now - self._current >= self.seconds:
+            self._buckets = array("q", [0]) * self.seconds
+            for window in self._totals:
+                self._totals[window] = 0
+        else:
+            for second in range(self._current + 1, now + 1):
+                for window in self._totals:
+                    self._totals[window] -= self._buckets[(second - window) % self.seconds]
+                self._buckets[second % self.seconds] = 0
+        self._current = now
+
+    def add(self, count: int, now: Optional[float] = None):
+        """Adds events to the bucket of their second. Events older than the buffer are dropped.
+
+        Args:
+            count (int): Number of events
+            now (Optional[float], optional): Unix time of the events. Defaults to the current time.
+        """
+        second = int(time.time() if now is None else now)
+        self._advance(second)
+        if second <= self._current - self.seconds:
+            return
+
+        self._buckets[second % self.seconds] += count
+        for window in self._totals:
+            if second > self._current - window:
+                self._totals[window] += count
+        self.started = min(self.started, second)
+
+    def sum(self, seconds: int, now: Optional[float] = None) -> int:
+        """
+        Args:
+            seconds (int): Length of the window, at most the size of the buffer
+            now (Optional[float], optional): End of the window as unix time. Defaults to the current time.
+
+        Returns:
+            int: Number of events in the last seconds
+        """
+        self._advance(int(time.time() if now is None else now))
+        seconds = min(seconds, self.seconds)
+        if (total := self._totals.get(seconds)) is not None:
+            return total
+
+        end = self._current % self.seconds + 1
+        start = end - seconds
+        if start >= 0:
+            return sum(self._buckets[start:end])
+        return sum(self._buckets[start:]) + sum(self._buckets[:end])
+
+    def age(self, now: Optional[float] = None) -> int:
+        """
+        Returns:
+            int: Seconds since the first second, which may hold events
+        """
+        return int(time.time() if now is None else now) - self.started
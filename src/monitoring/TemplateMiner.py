@@ -0,0 +1,214 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+
+class LogTemplate:
+    """A template of log lines, e.g. b"Connection to <*> failed after <*> ms" """
+
+    __slots__ = ("id", "tokens", "example", "rate", "seen", "checks")
+
+    def __init__(self, template_id: int, tokens: List[bytes], example: bytes, check: int):
+        """
+        Args:
+            template_id (int): ID of the template in its miner
+            tokens (List[bytes]): Tokens of the template, variable tokens are <*>
+            example (bytes): First line of the template
+            check (int): Number of the check, which created the template
+        """
+        self.id = template_id
+        self.tokens = tokens
+        self.example = example
+        self.rate = 0.0  # Moving average of the lines per second
+        self.seen = check  # Number of the last check, which saw the template
+        self.checks = 0  # Number of checks, which saw the template
+
+    def __str__(self) -> str:
+        return b" ".join(self.tokens).decode(errors="replace")
+
+
+class TemplateMiner:
+    """
+    Mines log lines into templates online, similar to Drain: variable parts like numbers, IDs, addresses and
+    timestamps are masked first. Lines with the same masked text belong to the same template, which is a single
+    dictionary lookup for almost all lines. Only unknown masked lines are compared token by token with the templates
+    of the same length and first token. If enough tokens are equal, the differing tokens of the template become
+    variable, otherwise the line starts a new template.
+
+    The table of templates is bounded, the least recently seen template is dropped first.
+    """
+
+    # Variable parts of log lines: timestamps, UUIDs, IPv4 addresses, hex IDs and numbers
+    _variables: Pattern = re.compile(
+        rb"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+        rb"|\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?"
+        rb"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+        rb"|\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?"
+        rb"|\b(?:0x)?[0-9a-fA-F]{8,}\b"
+        rb"|\d+(?:\.\d+)*"
+    )
+
+    # Variable token of a template
+    _wildcard: bytes = b"<*>"
+
+    # Share of equal tokens, which merges a line into a template
+    _similarity: float = 0.5
+
+    # Weight of the last check in the moving average of the rate of a template
+    _rate_weight: float = 0.1
+
+    def __init__(self, max_templates: int):
+        """
+        Args:
+            max_templates (int): Maximum number of templates
+        """
+        self.max_templates = max_templates
+        self.lock = threading.Lock()
+
+        # Monotonic time of the creation and of the last check, which mined lines
+        self.started = time.monotonic()
+        self.last_check = self.started
+
+        self._templates: "OrderedDict[int, LogTemplate]" = OrderedDict()  # Least recently seen first
+        self._groups: Dict[Tuple[int, bytes], List[int]] = {}  # (number of tokens, first token) -> template IDs
+        self._aliases: Dict[bytes, int] = {}  # Masked line -> template ID
+        self._next_id = 0
+        self._check = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def mine(self, lines: List[bytes]) -> Tuple[List[LogTemplate], Dict[LogTemplate, int]]:
+        """Assigns the lines of a check to their templates
+
+        Args:
+            lines (List[bytes]): Log lines without newlines
+
+        Returns:
+            Tuple[List[LogTemplate], Dict[LogTemplate, int]]: New templates and the number of lines per template
+        """
+        self._check += 1
+        if not lines:
+            return [], {}
+
+        # One pass of the regex engine masks all lines at once
+        masked_lines = self._variables.sub(self._wildcard, b"\n".join(lines)).split(b"\n")
+
+        new: List[LogTemplate] = []
+        counts: Dict[int, int] = {}
+        for line, masked in zip(lines, masked_lines):
+            template_id = self._aliases.get(masked)
+            if template_id is None or template_id not in self._templates:
+                template, created = self._match(masked, line)
+                if created:
+                    new.append(template)
+                template_id = template.id
+            counts[template_id] = counts.get(template_id, 0) + 1
+
+        # New templates may have evicted templates of this check
+        result: Dict[LogTemplate, int] = {}
+        for template_id, count in counts.items():
+            if template := self._templates.get(template_id):
+                self._templates.move_to_end(template_id)
+                result[template] = count
+
+        return [template for template in new if template.id in self._templates], result
+
+    def update_rate(self, template: LogTemplate, rate: float) -> float:
+        """Adds the rate of the current check to the moving average of a template. Checks, which did not see the
+        template, count as a rate of 0. The first check of a template starts the average.
+
+        Args:
+            template (LogTemplate): Template seen by the current check
+            rate (float): Lines per second of the current check
+
+        Returns:
+            float: The moving average before the current check
+        """
+        previous = template.rate * (1 - self._rate_weight) ** max(0, self._check - template.seen - 1)
+        if template.checks:
+            template.rate = previous * (1 - self._rate_weight) + rate * self._rate_weight
+        else:
+            template.rate = rate
+        template.seen = self._check
+        template.checks += 1
+        return previous
+
+    def _match(self, masked: bytes, line: bytes) -> Tuple[LogTemplate, bool]:
+        """Finds the most similar template of an unknown masked line, or creates a new one
+
+        Args:
+            masked (bytes): Masked line
+            line (bytes): Original line
+
+        Returns:
+            Tuple[LogTemplate, bool]: Template and True, if it was created
+        """
+        tokens = masked.split()
+        group = (len(tokens), tokens[0] if tokens else b"")
+
+        best: Optional[LogTemplate] = None
+        best_similarity = self._similarity
+        for template_id in self._groups.get(group, ()):
+            template = self._templates[template_id]
+            equal = sum(1 for a, b in zip(template.tokens, tokens) if a == b)
+            similarity = equal / len(tokens) if tokens else 1.0
+            if similarity >= best_similarity:
+                best, best_similarity = template, similarity
+
+        created = best is None
+        if best:
+            best.tokens = [a if a == b else self._wildcard for a, b in zip(best.tokens, tokens)]
+        else:
+            best = self._add(tokens, group, line)
+
+        # The aliases are only a cache, they are dropped at once if they grow too large
+        if len(self._aliases) >= 4 * self.max_templates:
+            self._aliases.clear()
+        self._aliases[masked] = best.id
+
+        return best, created
+
+    def _add(self, tokens: List[bytes], group: Tuple[int, bytes], line: bytes) -> LogTemplate:
+        """Adds a new template and evicts the least recently seen ones, if the table is full
+
+        Args:
+            tokens (List[bytes]): Tokens of the masked line
+            group (Tuple[int, bytes]): Number of tokens and first token
+            line (bytes): Original line
+
+        Returns:
+            LogTemplate: New template
+        """
+        while len(self._templates) >= max(1, self.max_templates):
+            _template_id, evicted = self._templates.popitem(last=False)
+            evicted_group = (len(evicted.tokens), evicted.tokens[0] if evicted.tokens else b"")
+            self._groups[evicted_group].remove(evicted.id)
+            if not self._groups[evicted_group]:
+                del self._groups[evicted_group]
+
+        template = LogTemplate(self._next_id, tokens, line, self._check - 1)
+        self._next_id += 1
+        self._templates[template.id] = template
+        self._groups.setdefault(group, []).append(template.id)
+        return template
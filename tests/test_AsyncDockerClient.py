@@ -0,0 +1,160 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import docker
+import pytest
+from handler.AsyncDockerClient import AsyncDockerClient
+from typing import Awaitable, Callable, List
+
+
+class FakeDaemon:
+    """Answers the requests on a unix socket with the queued raw responses, and closes the connection after the
+    responses marked as last"""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.responses: List[bytes] = []
+        self.close_after: List[bool] = []
+        self.requests: List[bytes] = []
+        self.connections = 0
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while self.responses:
+                self.requests.append(await reader.readuntil(b"\r\n\r\n"))
+                writer.write(self.responses.pop(0))
+                await writer.drain()
+                if self.close_after.pop(0):
+                    break
+        except asyncio.IncompleteReadError:
+            pass
+        writer.close()
+
+    def respond(self, response: bytes, close: bool = False):
+        self.responses.append(response)
+        self.close_after.append(close)
+
+    def run(self, test: Callable[[AsyncDockerClient], Awaitable[None]]):
+        async def main():
+            server = await asyncio.start_unix_server(self._serve, self.socket_path)
+            client = AsyncDockerClient(self.socket_path, 2, timeout=5)
+            try:
+                await test(client)
+            finally:
+                await client.close()
+                server.close()
+
+        asyncio.run(main())
+
+
+@pytest.fixture
+def daemon(tmp_path) -> FakeDaemon:
+    return FakeDaemon(str(tmp_path / "docker.sock"))
+
+
+def frame(stream: int, payload: bytes) -> bytes:
+    return bytes([stream, 0, 0, 0]) + len(payload).to_bytes(4, "big") + payload
+
+
+def test_chunked_response(daemon):
+    daemon.respond(
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"5\r\nhello\r\n7;ext=1\r\n, world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+    )
+    daemon.respond(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+
+    async def test(client: AsyncDockerClient):
+        assert await client.get("/info", {}) == b"hello, world"
+        # The keep-alive connection is reused after the trailers
+        assert await client.info() == b"{}"
+
+    daemon.run(test)
+    assert daemon.connections == 1
+    assert daemon.requests[0].startswith(b"GET /v1.41/info? HTTP/1.1\r\n")
+
+
+def test_response_until_close(daemon):
+    daemon.respond(b"HTTP/1.1 200 OK\r\n\r\nuntil the end", close=True)
+    daemon.respond(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+
+    async def test(client: AsyncDockerClient):
+        assert await client.info() == b"until the end"
+        assert await client.info() == b"{}"
+
+    daemon.run(test)
+    assert daemon.connections == 2
+
+
+def test_closed_idle_connection(daemon):
+    # The daemon closes the connection after the response, although the client may keep it
+    daemon.respond(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}", close=True)
+    daemon.respond(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n[]")
+
+    async def test(client: AsyncDockerClient):
+        assert await client.info() == b"{}"
+        await asyncio.sleep(0.05)
+        assert await client.info() == b"[]"
+
+    daemon.run(test)
+    assert daemon.connections == 2
+
+
+def test_api_error(daemon):
+    daemon.respond(b"HTTP/1.1 404 Not Found\r\nContent-Length: 19\r\n\r\nno such container x")
+
+    async def test(client: AsyncDockerClient):
+        with pytest.raises(docker.errors.APIError):
+            await client.logs("x", 0)
+
+    daemon.run(test)
+
+
+def test_multiplexed_logs(daemon):
+    body = frame(1, b"2023-05-01T10:00:00.000000000Z out\n") + frame(2, b"2023-05-01T10:00:01.000000000Z err\n")
+    daemon.respond(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+    # Frames may be split across chunks
+    daemon.responses[-1] += b"%x\r\n%s\r\n%x\r\n%s\r\n0\r\n\r\n" % (10, body[:10], len(body) - 10, body[10:])
+
+    async def test(client: AsyncDockerClient):
+        assert await client.logs("id1", 1682935200) == (
+            b"2023-05-01T10:00:00.000000000Z out\n2023-05-01T10:00:01.000000000Z err\n"
+        )
+
+    daemon.run(test)
+    assert b"/containers/id1/logs?stdout=1&stderr=1&timestamps=1&since=1682935200 " in daemon.requests[0]
+
+
+def test_tty_logs(daemon):
+    body = b"2023-05-01T10:00:00.000000000Z tty\n"
+    daemon.respond(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+
+    async def test(client: AsyncDockerClient):
+        assert await client.logs("id1", 0) == body
+
+    daemon.run(test)
+
+
+def test_demultiplex():
+    client = AsyncDockerClient.__new__(AsyncDockerClient)
+
+    assert client._demultiplex(frame(1, b"a\n") + frame(2, b"") + frame(1, b"b\n")) == b"a\nb\n"
+    assert client._demultiplex(b"") == b""
+    # A truncated last frame keeps the received part of its payload
+    assert client._demultiplex(frame(1, b"a\n") + frame(1, b"bcd")[:-1]) == b"a\nbc"
@@ -0,0 +1,97 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+from handler.DockerEventHandler import DockerEventHandler
+from typing import Any, Dict, List, Optional
+
+
+def event(container_id: str, action: str, time_nano: int) -> Dict[str, Any]:
+    return {
+        "id": container_id,
+        "Action": action,
+        "time": time_nano // 1000000000,
+        "timeNano": time_nano,
+        "Actor": {"ID": container_id, "Attributes": {"name": container_id}},
+    }
+
+
+class FakeDocker:
+    """Returns the given event streams one after the other, the last one stops the handler"""
+
+    def __init__(self, handler: DockerEventHandler, streams: List[List[Dict[str, Any]]]):
+        self.handler = handler
+        self.streams = streams
+        self.since: List[Optional[int]] = []
+
+    def get_container_events(self, since: Optional[int] = None):
+        self.since.append(since)
+        events = self.streams.pop(0)
+        if not self.streams:
+            self.handler._stop.set()
+        yield from events
+        raise ConnectionError("stream broken")
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setattr(DockerEventHandler, "_instance", None)
+    monkeypatch.setattr(DockerEventHandler, "_reconnect_delay", 0)
+    return DockerEventHandler.getInstance()
+
+
+def run(handler: DockerEventHandler, docker: FakeDocker, monkeypatch) -> List[Dict[str, Any]]:
+    """Runs the event thread in the test until all streams are read
+
+    Returns:
+        List[Dict[str, Any]]: Dispatched events
+    """
+    monkeypatch.setattr(handler, "_dh", docker)
+
+    dispatched: List[Dict[str, Any]] = []
+    handler.subscribe(["start", "die"], dispatched.append)
+    handler._run()
+    return dispatched
+
+
+def test_dispatch(handler, monkeypatch):
+    events = [
+        event("a", "start", 10_100_000_000),
+        event("a", "kill", 10_200_000_000),
+        event("a", "die", 11_000_000_000),
+    ]
+
+    assert run(handler, FakeDocker(handler, [events]), monkeypatch) == [events[0], events[2]]
+
+
+def test_replayed_events_are_skipped(handler, monkeypatch):
+    first = [event("a", "start", 10_100_000_000), event("b", "start", 10_500_000_000)]
+    # Docker replays all events since the second of the last event
+    second = first + [event("a", "die", 10_700_000_000), event("b", "die", 11_000_000_000)]
+
+    docker = FakeDocker(handler, [first, second])
+
+    assert run(handler, docker, monkeypatch) == second
+    assert docker.since == [None, 10]
+
+
+def test_same_second_after_reconnect(handler, monkeypatch):
+    first = [event("a", "die", 9_000_000_000), event("a", "start", 10_100_000_000)]
+    second = [event("a", "start", 10_100_000_000), event("a", "die", 10_100_000_001)]
+
+    assert run(handler, FakeDocker(handler, [first, second]), monkeypatch) == first + second[1:]
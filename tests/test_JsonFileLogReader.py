@@ -0,0 +1,165 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import json
+import os
+import pytest
+from monitoring import JsonFileLogReader as reader_module
+from monitoring.JsonFileLogReader import JsonFileLogReader, parse_docker_timestamp
+
+
+def record(log: str, time: str) -> bytes:
+    """
+    Args:
+        log (str): Log line, including the newline unless it is a partial line
+        time (str): Timestamp of the record
+
+    Returns:
+        bytes: Record as written by the json-file log driver
+    """
+    return b'{"log":%s,"stream":"stdout","time":"%s"}\n' % (json.dumps(log).encode(), time.encode())
+
+
+@pytest.fixture
+def reader(tmp_path, monkeypatch):
+    monkeypatch.setattr(reader_module, "DOCKMON_CONFIG_DOCKER_ROOT", str(tmp_path))
+    monkeypatch.setattr(JsonFileLogReader, "_instance", None)
+    reader = JsonFileLogReader.getInstance()
+    os.makedirs(os.path.dirname(reader.get_path("c1")))
+    return reader
+
+
+def append(reader: JsonFileLogReader, *records: bytes, suffix: str = ""):
+    with open(reader.get_path("c1") + suffix, "ab") as f:
+        f.write(b"".join(records))
+
+
+def test_parse_docker_timestamp():
+    assert parse_docker_timestamp(b"1970-01-01T00:00:01.5Z") == 1500000000
+    assert parse_docker_timestamp(b"1970-01-01T00:00:02.123456789Z") == 2123456789
+    assert parse_docker_timestamp(b"1970-01-01T00:00:03Z") == 3000000000
+
+
+def test_read_only_new_records(reader):
+    append(reader, record("first\n", "2022-04-28T09:45:00.1Z"))
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:00.1Z first\n"
+
+    append(reader, record("second\n", "2022-04-28T09:45:01.1Z"))
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:01.1Z second\n"
+    assert reader.read("c1", 0) == b""
+
+
+def test_read_escaped_and_split_records(reader):
+    append(
+        reader,
+        record('say "hi"\n', "2022-04-28T09:45:00.1Z"),
+        record("long ", "2022-04-28T09:45:01.1Z"),
+    )
+    # The partial line is returned, once its last record is written
+    assert reader.read("c1", 0) == b'2022-04-28T09:45:00.1Z say "hi"\n'
+
+    append(reader, record("line\n", "2022-04-28T09:45:01.2Z"))
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:01.1Z long line\n"
+
+
+def test_read_incomplete_record(reader):
+    line = record("first\n", "2022-04-28T09:45:00.1Z")
+    append(reader, line[:10])
+    assert reader.read("c1", 0) == b""
+
+    append(reader, line[10:])
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:00.1Z first\n"
+
+
+def test_read_skips_corrupt_records(reader):
+    append(
+        reader,
+        record("first\n", "2022-04-28T09:45:00.1Z"),
+        b'{"log":"broken\n',
+        record("second\n", "2022-04-28T09:45:01.1Z"),
+    )
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:00.1Z first\n2022-04-28T09:45:01.1Z second\n"
+
+
+def test_read_since(reader):
+    append(reader, *(record("line %d\n" % i, "2022-04-28T09:45:%02d.5Z" % i) for i in range(50)))
+
+    since = parse_docker_timestamp(b"2022-04-28T09:45:40Z")
+    assert reader.read("c1", since) == b"".join(
+        b"2022-04-28T09:45:%02d.5Z line %d\n" % (i, i) for i in range(40, 50)
+    )
+
+
+def test_read_since_after_last_record(reader):
+    append(reader, record("old\n", "2022-04-28T09:45:00.1Z"))
+    assert reader.read("c1", parse_docker_timestamp(b"2022-04-28T09:46:00Z")) == b""
+
+    append(reader, record("new\n", "2022-04-28T09:46:01.1Z"))
+    assert reader.read("c1", 0) == b"2022-04-28T09:46:01.1Z new\n"
+
+
+def test_read_rotated(reader):
+    append(reader, record("first\n", "2022-04-28T09:45:00.1Z"))
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:00.1Z first\n"
+
+    # The rest of the rotated file comes before the new file
+    append(reader, record("second\n", "2022-04-28T09:45:01.1Z"))
+    os.rename(reader.get_path("c1"), reader.get_path("c1") + ".1")
+    append(reader, record("third\n", "2022-04-28T09:45:02.1Z"))
+
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:01.1Z second\n2022-04-28T09:45:02.1Z third\n"
+
+
+def test_read_rotated_twice(reader):
+    append(reader, record("first\n", "2022-04-28T09:45:00.1Z"))
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:00.1Z first\n"
+
+    append(reader, record("second\n", "2022-04-28T09:45:01.1Z"))
+    os.rename(reader.get_path("c1"), reader.get_path("c1") + ".2")
+    append(reader, record("third\n", "2022-04-28T09:45:02.1Z"), suffix=".1")
+    append(reader, record("fourth\n", "2022-04-28T09:45:03.1Z"))
+
+    assert reader.read("c1", 0) == (
+        b"2022-04-28T09:45:01.1Z second\n2022-04-28T09:45:02.1Z third\n2022-04-28T09:45:03.1Z fourth\n"
+    )
+
+
+def test_read_truncated(reader):
+    append(
+        reader,
+        record("first\n", "2022-04-28T09:45:00.1Z"),
+        record("second\n", "2022-04-28T09:45:01.1Z"),
+    )
+    assert reader.read("c1", 0)
+
+    with open(reader.get_path("c1"), "wb") as f:
+        f.write(record("third\n", "2022-04-28T09:45:02.1Z"))
+
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:02.1Z third\n"
+
+
+def test_read_unavailable(reader):
+    assert reader.read("missing", 0) is None
+
+
+def test_forget(reader):
+    append(reader, record("first\n", "2022-04-28T09:45:00.1Z"))
+    assert reader.read("c1", 0)
+
+    reader.forget("c1")
+    assert reader.read("c1", 0) == b"2022-04-28T09:45:00.1Z first\n"
@@ -0,0 +1,109 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import os
+import pytest
+import struct
+import time
+from monitoring import LogCheckpoint as checkpoint_module
+from monitoring.LogCheckpoint import LogCheckpoint
+
+CONTAINER_A = "a" * 64
+CONTAINER_B = "b" * 64
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    path = str(tmp_path / "LogCheckpoints.dat")
+    monkeypatch.setattr(checkpoint_module, "DOCKMON_CONFIG_CHECKPOINT_FILE", path)
+    monkeypatch.setattr(LogCheckpoint, "_instance", None)
+    return path
+
+
+def load() -> LogCheckpoint:
+    """
+    Returns:
+        LogCheckpoint: Checkpoints read from the file, like after a restart
+    """
+    LogCheckpoint._instance = None
+    return LogCheckpoint.getInstance()
+
+
+def test_format(path):
+    now = time.time_ns()
+    load().save([(CONTAINER_A, now)])
+
+    with open(path, "rb") as f:
+        assert f.read() == struct.pack("<64sq", CONTAINER_A.encode(), now)
+
+
+def test_save_and_load(path):
+    now = time.time_ns()
+    load().save([(CONTAINER_A, now), (CONTAINER_B, now - 1)])
+
+    checkpoint = load()
+    assert checkpoint.get(CONTAINER_A) == now
+    assert checkpoint.get(CONTAINER_B) == now - 1
+    assert checkpoint.get("c" * 64) is None
+
+
+def test_cursors_never_move_back(path):
+    now = time.time_ns()
+    checkpoint = load()
+    checkpoint.save([(CONTAINER_A, now)])
+    checkpoint.save([(CONTAINER_A, now - 1000)])
+
+    assert load().get(CONTAINER_A) == now
+
+
+def test_kept_until_catchup_limit(path, monkeypatch):
+    monkeypatch.setattr(checkpoint_module, "DOCKMON_CONFIG_CHECKPOINT_MAX_CATCHUP", 60)
+    now = time.time_ns()
+    checkpoint = load()
+    checkpoint.save([(CONTAINER_A, now), (CONTAINER_B, now - 120 * 1000000000)])
+
+    # A checkpoint older than the limit resumes at the limit, and is dropped with the next write
+    checkpoint = load()
+    assert now - 61 * 1000000000 < checkpoint.get(CONTAINER_B) <= time.time_ns() - 60 * 1000000000
+    checkpoint.save([(CONTAINER_A, now + 1)])
+
+    checkpoint = load()
+    assert checkpoint.get(CONTAINER_B) is None
+    assert checkpoint.get(CONTAINER_A) == now + 1
+
+
+def test_incomplete_record(path):
+    now = time.time_ns()
+    with open(path, "wb") as f:
+        f.write(struct.pack("<64sq", CONTAINER_A.encode(), now) + b"\0" * 10)
+
+    assert load().get(CONTAINER_A) == now
+
+
+def test_missing_file(path):
+    assert load().get(CONTAINER_A) is None
+    assert not os.path.exists(path)
+
+
+def test_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(checkpoint_module, "DOCKMON_CONFIG_CHECKPOINT_FILE", "")
+    monkeypatch.setattr(LogCheckpoint, "_instance", None)
+    monkeypatch.chdir(tmp_path)
+    LogCheckpoint.getInstance().save([(CONTAINER_A, time.time_ns())])
+
+    assert os.listdir(tmp_path) == []
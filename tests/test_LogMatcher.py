@@ -0,0 +1,91 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+import re
+from monitoring.LogMatcher import LogMatcher
+
+LOGS = b"INFO started\nERROR disk full\nWARN error in test\nerror: timeout\nFATAL crash\n"
+
+
+def test_match_lines():
+    matcher = LogMatcher(["ERROR", "FATAL"], [])
+
+    assert [LOGS[start:end] for start, end in matcher.match_lines(LOGS)] == [b"ERROR disk full", b"FATAL crash"]
+    assert matcher.matches(LOGS)
+    assert not matcher.matches(b"INFO started\n")
+
+
+def test_prefix_words():
+    matcher = LogMatcher(["err", "error", "errno", "fatal"], [])
+
+    assert matcher.select_lines(b"errno 5\nerrors\nfatal\nok\n") == [b"errno 5", b"errors", b"fatal"]
+
+
+def test_case_sensitive():
+    assert LogMatcher(["error"], []).select_lines(LOGS) == [b"WARN error in test", b"error: timeout"]
+    assert len(LogMatcher(["error"], [], case_sensitive=False).select_lines(LOGS)) == 3
+
+
+def test_regex():
+    matcher = LogMatcher([], [], regex=r"^error: \w+$")
+
+    assert matcher.select_lines(LOGS) == [b"error: timeout"]
+
+
+def test_regex_and_words():
+    matcher = LogMatcher(["FATAL"], [], regex=r"disk \w+")
+
+    assert matcher.select_lines(LOGS) == [b"ERROR disk full", b"FATAL crash"]
+
+
+def test_invalid_regex():
+    with pytest.raises(re.error):
+        LogMatcher([], [], regex="(")
+
+
+def test_exclude_only_suppresses_its_line():
+    matcher = LogMatcher(["error"], ["test"], case_sensitive=False)
+
+    assert matcher.select_lines(LOGS) == [b"ERROR disk full", b"error: timeout"]
+
+
+def test_without_includes():
+    matcher = LogMatcher([], ["INFO", "WARN"])
+
+    assert not matcher.matches(LOGS)
+    assert matcher.select_lines(LOGS) == [b"ERROR disk full", b"error: timeout", b"FATAL crash"]
+
+
+def test_last_line_without_newline():
+    matcher = LogMatcher(["crash"], [])
+
+    assert list(matcher.match_lines(b"ok\ncrash")) == [(3, 8)]
+
+
+def test_case_insensitive_non_ascii():
+    matcher = LogMatcher(["Übertragung"], ["größe"], case_sensitive=False)
+    logs = "ÜBERTRAGUNG fehlgeschlagen\nübertragung ok\nÜbertragung GRÖSSE\nÜbertragung Größe\n".encode()
+
+    assert matcher.select_lines(logs) == ["ÜBERTRAGUNG fehlgeschlagen".encode(), "übertragung ok".encode()]
+
+
+def test_invalid_utf8():
+    matcher = LogMatcher(["error"], [])
+
+    assert matcher.select_lines(b"\xff\xfe error\nok\n") == [b"\xff\xfe error"]
@@ -0,0 +1,119 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+import time
+from Config import _
+from monitoring.Modules.MonitorEvents import MonitorEvents
+from typing import Any, Dict, List
+
+LABELS = {
+    "io.smclab.dockmon.monitoring.events": "true",
+    "io.smclab.dockmon.monitoring.events.restarts": "3",
+    "io.smclab.dockmon.monitoring.events.restartwindow": "300",
+}
+
+START = int(time.time())
+
+
+@pytest.fixture(autouse=True)
+def state(monkeypatch):
+    monkeypatch.setattr(MonitorEvents, "_restarts", {})
+    monkeypatch.setattr(MonitorEvents, "_stopped", {})
+    monkeypatch.setattr(MonitorEvents, "_health", {})
+
+
+def event(action: str, second: float, **attributes: Any) -> Dict[str, Any]:
+    """
+    Args:
+        action (str): Action of the event
+        second (float): Seconds after START
+        attributes (Any): Attributes of the actor
+
+    Returns:
+        Dict[str, Any]: Decoded Docker event of the container web
+    """
+    return {
+        "Type": "container",
+        "Action": action,
+        "Actor": {"ID": "id1", "Attributes": dict(name="web", image="nginx", **attributes)},
+        "timeNano": int((START + second) * 1e9),
+    }
+
+
+def triggers(*events: Dict[str, Any], labels: Dict[str, str] = LABELS) -> List[str]:
+    """
+    Returns:
+        List[str]: Triggers of the alerts of the events
+    """
+    return [alert["trigger"] for event in events for alert in MonitorEvents("web", dict(labels)).handle(event)]
+
+
+def test_oom():
+    assert triggers(event("oom", 0), event("die", 1, exitCode="137")) == [_("MONITOREVENTS_TRIGGER_OOM")]
+
+
+def test_stopped_container():
+    assert triggers(event("kill", 0, signal="15"), event("die", 1, exitCode="143")) == []
+
+
+def test_kill_long_before_the_exit():
+    assert triggers(event("kill", 0), event("die", 61, exitCode="1")) == [_("MONITOREVENTS_TRIGGER_EXIT %d") % 1]
+
+
+def test_exit_code():
+    assert triggers(event("die", 0, exitCode="0")) == []
+    assert triggers(event("die", 10, exitCode="2")) == [_("MONITOREVENTS_TRIGGER_EXIT %d") % 2]
+
+
+def test_restart_limit():
+    restarts = _("MONITOREVENTS_TRIGGER_RESTARTS %d %d") % (3, 300)
+
+    assert triggers(event("die", 0, exitCode="0"), event("die", 100, exitCode="0")) == []
+    assert triggers(event("die", 200, exitCode="0")) == [restarts]
+
+    # Dies outside of the window are not counted
+    assert triggers(event("die", 350, exitCode="0")) == [restarts]
+    assert triggers(event("die", 560, exitCode="0")) == []
+
+
+def test_stopped_container_is_no_restart():
+    stops = [event(action, second, exitCode="0") for second in range(0, 50, 10) for action in ("kill", "die")]
+    assert triggers(*stops) == []
+
+
+def test_restart_limit_disabled():
+    labels = dict(LABELS, **{"io.smclab.dockmon.monitoring.events.restarts": "0"})
+    assert triggers(*[event("die", second, exitCode="0") for second in range(5)], labels=labels) == []
+
+
+def test_unhealthy():
+    unhealthy = _("MONITOREVENTS_TRIGGER_UNHEALTHY")
+
+    assert triggers(event("health_status: healthy", 0)) == []
+    assert triggers(event("health_status: unhealthy", 10), event("health_status: unhealthy", 20)) == [unhealthy]
+    assert triggers(event("health_status: healthy", 30), event("health_status: unhealthy", 40)) == [unhealthy]
+
+
+def test_destroy_forgets_the_container():
+    triggers(event("die", 0, exitCode="0"), event("die", 10, exitCode="0"), event("health_status: unhealthy", 20))
+    assert triggers(event("kill", 30), event("destroy", 40)) == []
+
+    assert "web" not in MonitorEvents._restarts
+    assert "web" not in MonitorEvents._stopped
+    assert "web" not in MonitorEvents._health
@@ -0,0 +1,190 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+import time
+from Config import _
+from monitoring import LogCheckpoint as checkpoint_module
+from monitoring.LogCheckpoint import LogCheckpoint
+from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+from types import SimpleNamespace
+from typing import List, Tuple
+
+LABELS = {
+    "io.smclab.dockmon.monitoring.logs": "true",
+    "io.smclab.dockmon.monitoring.logs.include": "error",
+    "io.smclab.dockmon.monitoring.logs.exclude": "",
+}
+
+
+def timestamp(time_nano: int) -> bytes:
+    """
+    Args:
+        time_nano (int): Unix time in nanoseconds
+
+    Returns:
+        bytes: Timestamp, as Docker prefixes it to the lines
+    """
+    return b"%s.%09dZ" % (
+        time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(time_nano // 1000000000)).encode(),
+        time_nano % 1000000000,
+    )
+
+
+class FakeDocker:
+    """A running container, whose logs are returned like by the logs API with timestamps=True"""
+
+    def __init__(self):
+        self.container = SimpleNamespace(id="id1")
+        self.lines: List[Tuple[int, bytes]] = []
+        self.since: List[int] = []
+
+    def log(self, time_nano: int, line: str):
+        self.lines.append((time_nano, line.encode()))
+
+    def check_container_still_active(self, container_name: str) -> bool:
+        return True
+
+    def get_container_obj_by_name(self, container_name: str):
+        return self.container
+
+    def get_container_logs(self, container, timestamps: bool, since: int) -> bytes:
+        # The since parameter of Docker only has a resolution of seconds
+        self.since.append(since)
+        return b"".join(
+            b"%s %s\n" % (timestamp(time_nano), line) for time_nano, line in self.lines if time_nano >= since * 1e9
+        )
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    docker = FakeDocker()
+    monkeypatch.setattr(MonitorLogfile, "_dh", docker)
+    monkeypatch.setattr(MonitorLogfile, "_cursors", {})
+    monkeypatch.setattr(checkpoint_module, "DOCKMON_CONFIG_CHECKPOINT_FILE", "")
+    monkeypatch.setattr(LogCheckpoint, "_instance", None)
+    return docker
+
+
+def test_lines_are_checked_once(docker):
+    monitor = MonitorLogfile("web", dict(LABELS))
+    now = time.time_ns()
+    docker.log(now - 2_000_000_000, "error 1")
+    docker.log(now - 1_000_000_000, "error 2")
+
+    assert monitor.check()["data"] == "error 1\nerror 2"
+    assert monitor.check() is False
+
+    # Docker returns the lines of the second of the cursor again, only the new line is checked
+    docker.log(now - 999_999_999, "error 3")
+    assert monitor.check()["data"] == "error 3"
+    assert docker.since[-1] == (now - 1_000_000_000) // 1000000000
+
+
+def test_first_check_reads_the_since_window(docker):
+    monitor = MonitorLogfile("web", dict(LABELS, **{"io.smclab.dockmon.monitoring.logs.since": "60"}))
+    now = time.time_ns()
+    docker.log(now - 120_000_000_000, "error old")
+    docker.log(now - 10_000_000_000, "error new")
+
+    assert monitor.check()["data"] == "error new"
+
+
+def test_container_without_logs(docker):
+    monitor = MonitorLogfile("web", dict(LABELS))
+    assert monitor.check() is False
+
+    # The cursor is set to the time of the fetch, so the next check reads the lines written since
+    cursor = MonitorLogfile._cursors["web"][1]
+    docker.log(cursor - 1, "error before")
+    docker.log(cursor + 1, "error after")
+    assert monitor.check()["data"] == "error after"
+
+
+def test_recreated_container(docker):
+    monitor = MonitorLogfile("web", dict(LABELS))
+    now = time.time_ns()
+    docker.log(now - 1_000_000_000, "error 1")
+    assert monitor.check()
+
+    # A recreated container has a new ID and does not inherit the cursor
+    docker.container = SimpleNamespace(id="id2")
+    assert monitor.check()["data"] == "error 1"
+
+
+def test_cursor_never_moves_back(docker):
+    monitor = MonitorLogfile("web", dict(LABELS))
+    monitor._set_log_cursor("id1", 200)
+    monitor._set_log_cursor("id1", 100)
+
+    assert monitor._get_log_cursor("id1") == 200
+
+
+def test_forget(docker):
+    monitor = MonitorLogfile("web", dict(LABELS))
+    monitor._set_log_cursor("id1", 200)
+    MonitorLogfile.forget("web")
+
+    assert monitor._get_log_cursor("id1") is None
+
+
+def excerpt(labels: dict, *lines: str) -> str:
+    """
+    Args:
+        labels (dict): Labels in addition to the default labels
+        lines (str): Log lines
+
+    Returns:
+        str: Excerpt of the alert, empty if there was no alert
+    """
+    alert = MonitorLogfile("web", dict(LABELS, **labels))._evaluate("".join(line + "\n" for line in lines).encode())
+    return alert["data"] if alert else ""
+
+
+def test_excerpt_context(docker):
+    labels = {"io.smclab.dockmon.monitoring.logs.context": "1"}
+    lines = ["a", "b", "error 1", "c", "d", "e", "error 2", "f"]
+
+    assert excerpt(labels, *lines) == "b\nerror 1\nc\n[...]\ne\nerror 2\nf"
+
+
+def test_excerpt_overlapping_context(docker):
+    labels = {"io.smclab.dockmon.monitoring.logs.context": "1"}
+
+    assert excerpt(labels, "a", "error 1", "b", "error 2", "error 3", "c", "d") == "a\nerror 1\nb\nerror 2\nerror 3\nc"
+
+
+def test_excerpt_without_context(docker):
+    labels = {"io.smclab.dockmon.monitoring.logs.context": "0"}
+
+    assert excerpt(labels, "error 1", "a", "error 2") == "error 1\n[...]\nerror 2"
+    assert excerpt(labels, "error 1", "error 2") == "error 1\nerror 2"
+    assert excerpt(labels, "a", "b") == ""
+
+
+def test_excerpt_max_lines(docker):
+    labels = {"io.smclab.dockmon.monitoring.logs.context": "0", "io.smclab.dockmon.monitoring.logs.maxlines": "3"}
+    lines = ["error %d" % number for number in range(10)]
+
+    assert excerpt(labels, *lines) == "error 0\nerror 1\nerror 2\n[...]"
+
+
+def test_excerpt_trigger(docker):
+    alert = MonitorLogfile("web", dict(LABELS))._evaluate(b"error\n")
+
+    assert alert["trigger"] == _("MONITORLOG_TRIGGER_WORD_INCLUDE")
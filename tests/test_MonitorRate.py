@@ -0,0 +1,105 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+import time
+from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+from monitoring.Modules.MonitorRate import MonitorRate
+from typing import Any, Dict, List
+
+LABELS = {
+    "io.smclab.dockmon.monitoring.logs.exclude": "debug",
+    "io.smclab.dockmon.monitoring.logs.rate.timeout.pattern": "timed out",
+    "io.smclab.dockmon.monitoring.logs.rate.timeout.window": "60",
+    "io.smclab.dockmon.monitoring.logs.rate.timeout.threshold": "5",
+}
+
+
+def line(second: float, text: str) -> bytes:
+    """
+    Args:
+        second (float): Unix time of the line
+        text (str): Log line
+
+    Returns:
+        bytes: Line as returned by the logs API with timestamps=True
+    """
+    return b"%s.%09dZ %s\n" % (
+        time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second)).encode(),
+        int(second % 1 * 1e9),
+        text.encode(),
+    )
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monkeypatch.setattr(MonitorRate, "_counters", {})
+    monkeypatch.setattr(MonitorLogfile, "_cursors", {})
+    return MonitorRate("web", dict(LABELS))
+
+
+def evaluate(monitor: MonitorRate, lines: List[bytes]) -> List[Dict[str, Any]]:
+    """Passes the lines through the cursor like a check
+
+    Returns:
+        List[Dict[str, Any]]: Alerts
+    """
+    return monitor._evaluate(monitor._consume_new_lines("id1", b"".join(lines))) or []
+
+
+def test_threshold(monitor):
+    now = int(time.time())
+    alerts = evaluate(monitor, [line(now - 10 + i, "request timed out") for i in range(6)])
+
+    assert len(alerts) == 1
+    assert "timeout" in alerts[0]["trigger"]
+    assert "request timed out" in alerts[0]["data"]
+
+
+def test_matches_are_counted_at_their_line(monitor):
+    now = int(time.time())
+
+    # The lines of a long check interval, which are older than the window, do not count towards it
+    lines = [line(now - 300 + i, "request timed out") for i in range(10)]
+    lines += [line(now - 5, "request timed out"), line(now - 1, "ok")]
+    assert evaluate(monitor, lines) == []
+
+    assert monitor._counters["web"]["timeout"].sum(60, now) == 1
+
+
+def test_excluded_lines(monitor):
+    now = int(time.time())
+    assert evaluate(monitor, [line(now - 10 + i, "debug: request timed out") for i in range(6)]) == []
+
+
+def test_counts_carry_across_checks(monitor):
+    now = int(time.time())
+    assert evaluate(monitor, [line(now - 20 + i, "request timed out") for i in range(3)]) == []
+
+    # Lines, which were already seen, are not counted again
+    lines = [line(now - 20 + i, "request timed out") for i in range(3)]
+    lines += [line(now - 10 + i, "request timed out") for i in range(3)]
+    assert len(evaluate(monitor, lines)) == 1
+    assert monitor._counters["web"]["timeout"].sum(60, now) == 6
+
+
+def test_split_seconds(monitor):
+    lines = [line(100.1, "a"), line(100.5, "b"), line(101.2, "c"), line(103.0, "d"), line(103.9, "e")]
+
+    assert list(monitor._split_seconds(b"".join(lines))) == [(100, b"a\nb\n"), (101, b"c\n"), (103, b"d\ne\n")]
+    assert list(monitor._split_seconds(b"".join(lines)[:-1])) == [(100, b"a\nb\n"), (101, b"c\n"), (103, b"d\ne")]
@@ -0,0 +1,163 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+from monitoring.Modules.MonitorBase import Monitor
+from monitoring.Modules.MonitorLogFiles import MonitorLogfile
+from monitoring.Modules.MonitorStats import MonitorStats
+from monitoring.MonitorScheduler import MonitorScheduler
+from types import SimpleNamespace
+from typing import Any, Dict
+
+LABELS = {
+    "io.smclab.dockmon.enabled": "true",
+    "io.smclab.dockmon.monitoring.logs": "true",
+    "io.smclab.dockmon.monitoring.logs.include": "error",
+    "io.smclab.dockmon.monitoring.logs.exclude": "",
+}
+
+
+class FakeDocker:
+    """Answers the container lookups of the scheduler and the monitors"""
+
+    def __init__(self):
+        self.containers: Dict[str, SimpleNamespace] = {}
+
+    def get_container_obj_by_name(self, container_name: str):
+        return self.containers.get(container_name)
+
+    def check_container_still_active(self, container_name: str) -> bool:
+        return container_name in self.containers
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    docker = FakeDocker()
+    monkeypatch.setattr(Monitor, "_dh", docker)
+    monkeypatch.setattr(MonitorScheduler, "_docker", docker)
+    return docker
+
+
+@pytest.fixture
+def scheduler(docker, monkeypatch):
+    scheduler = MonitorScheduler.getInstance()
+    monkeypatch.setattr(MonitorScheduler, "_fingerprints", {})
+    yield scheduler
+    scheduler._scheduler.remove_all_jobs()
+
+
+def test_add_container(scheduler, docker):
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    scheduler._add_container_monitoring("web", LABELS, "id1")
+
+    assert scheduler._scheduler.get_job("web")
+    assert scheduler._fingerprints["web"][0] == "id1"
+
+
+def test_unchanged_container_is_skipped(scheduler, docker, monkeypatch):
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    scheduler._add_container_monitoring("web", LABELS, "id1")
+
+    # An unchanged container is not configured again, so its monitor is not even created
+    monkeypatch.setitem(scheduler._log_detectors, "keywords", None)
+    scheduler._add_container_monitoring("web", dict(LABELS), "id1")
+
+    assert scheduler._scheduler.get_job("web")
+
+
+def test_failed_configuration_is_retried(scheduler, docker):
+    # The container lookup of the configuration fails once
+    scheduler._add_container_monitoring("web", LABELS, "id1")
+    assert scheduler._scheduler.get_job("web") is None
+    assert "web" not in scheduler._fingerprints
+
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    scheduler._add_container_monitoring("web", LABELS, "id1")
+    assert scheduler._scheduler.get_job("web")
+
+
+def test_invalid_reconfiguration_removes_the_job(scheduler, docker):
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    scheduler._add_container_monitoring("web", LABELS, "id1")
+
+    labels = dict(LABELS, **{"io.smclab.dockmon.monitoring.logs.regex": "("})
+    scheduler._add_container_monitoring("web", labels, "id1")
+    assert scheduler._scheduler.get_job("web") is None
+    assert "web" not in scheduler._fingerprints
+
+    scheduler._add_container_monitoring("web", LABELS, "id1")
+    assert scheduler._scheduler.get_job("web")
+
+
+@pytest.mark.parametrize("value, collected", [("true", True), ("false", False), ("0", False)])
+def test_stats_label(scheduler, docker, value, collected):
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    labels = {"io.smclab.dockmon.monitoring.stats": value, "io.smclab.dockmon.monitoring.stats.cpu": "90"}
+    try:
+        scheduler._add_container_monitoring("web", labels, "id1")
+        assert ("web" in MonitorStats.get_container_names()) == collected
+    finally:
+        MonitorStats.forget("web")
+
+
+def container_event(action: str, name: str = "web", container_id: str = "id1") -> Dict[str, Any]:
+    return {
+        "id": container_id,
+        "Action": action,
+        "Actor": {"ID": container_id, "Attributes": dict(LABELS, name=name)},
+    }
+
+
+def test_events_add_and_remove(scheduler, docker, monkeypatch):
+    monkeypatch.setattr(MonitorLogfile, "_cursors", {})
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    scheduler._handle_container_event(container_event("start"))
+    assert scheduler._scheduler.get_job("web")
+
+    # A stopped container keeps its log cursor for its restart
+    MonitorLogfile._cursors["web"] = ("id1", 42)
+    del docker.containers["web"]
+    scheduler._handle_container_event(container_event("die"))
+    assert scheduler._scheduler.get_job("web") is None
+    assert MonitorLogfile._cursors["web"] == ("id1", 42)
+
+    docker.containers["web"] = SimpleNamespace(id="id1")
+    scheduler._handle_container_event(container_event("start"))
+    assert scheduler._scheduler.get_job("web")
+
+    del docker.containers["web"]
+    scheduler._handle_container_event(container_event("die"))
+    scheduler._handle_container_event(container_event("destroy"))
+    assert "web" not in MonitorLogfile._cursors
+
+
+def test_missed_events(scheduler, docker, monkeypatch):
+    monkeypatch.setattr(MonitorLogfile, "_cursors", {})
+    for name in ("stopped", "removed"):
+        docker.containers[name] = SimpleNamespace(id=name, status="running")
+        scheduler._add_container_monitoring(name, LABELS, name)
+        MonitorLogfile._cursors[name] = (name, 42)
+
+    # The stopped container still exists, but is no longer running
+    monkeypatch.setattr(docker, "check_container_still_active", lambda container_name: False)
+    del docker.containers["removed"]
+    scheduler.check_scheduler_status()
+
+    assert scheduler._scheduler.get_job("stopped") is None
+    assert scheduler._scheduler.get_job("removed") is None
+    assert list(MonitorLogfile._cursors) == ["stopped"]
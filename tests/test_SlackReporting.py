@@ -0,0 +1,217 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import json
+import pytest
+import requests
+import threading
+import time
+from handler import SlackReporting as slack_module
+from handler.SlackReporting import SlackReport
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+
+def response(status_code: int = 200, ok: bool = True, headers: Dict[str, str] = {}) -> SimpleNamespace:
+    """
+    Args:
+        status_code (int, optional): HTTP status. Defaults to 200.
+        ok (bool, optional): Result of the Slack API. Defaults to True.
+        headers (Dict[str, str], optional): HTTP headers. Defaults to {}.
+
+    Returns:
+        SimpleNamespace: Response of the Slack API
+    """
+    return SimpleNamespace(status_code=status_code, headers=headers, text="", json=lambda: {"ok": ok})
+
+
+class FakeSession:
+    """Returns the queued responses, or raises them, and ok afterwards. Posts wait while the session is blocked."""
+
+    def __init__(self):
+        self.responses: List[Any] = []
+        self.posts: List[Dict[str, Any]] = []
+        self.posted = threading.Semaphore(0)
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def post(self, url: str, data: Dict[str, Any], timeout: Any):
+        self.posts.append(data)
+        self.posted.release()
+        self.unblocked.wait(5)
+        result = self.responses.pop(0) if self.responses else response()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def wait_for_post(self):
+        assert self.posted.acquire(timeout=5)
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    sleeps: List[float] = []
+    monkeypatch.setattr(
+        slack_module, "time", SimpleNamespace(time=time.time, monotonic=time.monotonic, sleep=sleeps.append)
+    )
+    return sleeps
+
+
+@pytest.fixture
+def slack(monkeypatch, sleeps):
+    monkeypatch.setattr(SlackReport, "_instance", None)
+    monkeypatch.setattr(SlackReport, "_grace_periods", {})
+    monkeypatch.setattr(SlackReport, "_grace_heap", [])
+    monkeypatch.setattr(SlackReport, "_in_flight", set())
+    monkeypatch.setattr(SlackReport, "_min_post_interval", 0.0)
+    report = SlackReport.getInstance()
+    report._session = FakeSession()
+    yield report
+    report._session.unblocked.set()
+    report.stop(1)
+
+
+def wait_for_delivery(slack: SlackReport, container: str, trigger: str):
+    deadline = time.monotonic() + 5
+    while (container, trigger) in slack._in_flight:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def attachments(post: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return json.loads(post["attachments"])
+
+
+def test_alert_is_sent(slack):
+    assert slack.send_slack_info_report("web", "logs", "error", 60)
+    slack._session.wait_for_post()
+    slack.stop()
+
+    assert [attachment["fields"][1]["value"] for attachment in attachments(slack._session.posts[0])] == ["logs"]
+    assert slack._grace_periods[("web", "logs")] == pytest.approx(time.time() + 60, abs=5)
+    assert not slack._in_flight
+
+
+def test_grace_period(slack):
+    assert slack.send_slack_info_report("web", "logs", "error")
+    slack._session.wait_for_post()
+    slack.stop()
+
+    assert not slack.send_slack_info_report("web", "logs", "error")
+    assert slack.send_slack_info_report("web", "stats", "error")
+    assert slack.send_slack_info_report("db", "logs", "error")
+
+
+def test_alert_in_flight(slack):
+    slack._session.unblocked.clear()
+    assert slack.send_slack_info_report("web", "logs", "error")
+    slack._session.wait_for_post()
+
+    # The alert is on its way, so it is suppressed although its grace period did not start yet
+    assert ("web", "logs") in slack._in_flight
+    assert ("web", "logs") not in slack._grace_periods
+    assert not slack.send_slack_info_report("web", "logs", "error")
+
+
+def test_failed_alert_is_sent_again(slack):
+    slack._session.responses = [response(ok=False), RuntimeError("broken")]
+    for _attempt in range(3):
+        assert slack.send_slack_info_report("web", "logs", "error")
+        slack._session.wait_for_post()
+        wait_for_delivery(slack, "web", "logs")
+
+    # Only the last delivery succeeded and started the grace period
+    assert len(slack._session.posts) == 3
+    assert list(slack._grace_periods) == [("web", "logs")]
+
+
+def test_queue_full(slack, monkeypatch):
+    slack._session.unblocked.clear()
+    assert slack.send_slack_info_report("web", "logs", "error")
+    slack._session.wait_for_post()
+
+    monkeypatch.setattr(slack, "_queue", slack_module.queue.Queue(maxsize=1))
+    assert slack.send_slack_info_report("web", "stats", "error")
+    assert not slack.send_slack_info_report("web", "rate", "error")
+    assert ("web", "rate") not in slack._in_flight
+
+
+def test_digest(slack):
+    # The alerts, which arrive while a message is sent, are sent together in the next message
+    slack._session.unblocked.clear()
+    assert slack.send_slack_info_report("web", "logs", "error")
+    slack._session.wait_for_post()
+    for container in ("db", "cache", "proxy"):
+        assert slack.send_slack_info_report(container, "logs", "error")
+    slack._session.unblocked.set()
+    slack.stop()
+
+    assert [len(attachments(post)) for post in slack._session.posts] == [1, 3]
+    assert "text" not in slack._session.posts[0]
+    assert "3" in slack._session.posts[1]["text"]
+    assert len(slack._grace_periods) == 4
+
+
+def test_rate_limit_is_retried(slack, sleeps):
+    slack._session.responses = [response(429, headers={"Retry-After": "3"})]
+
+    assert slack._post([{"container": "web", "trigger": "logs", "report": "error", "ts": 0}])
+    assert len(slack._session.posts) == 2
+    assert sleeps == [3.0]
+
+
+def test_connection_error_is_retried(slack, sleeps, monkeypatch):
+    monkeypatch.setattr(SlackReport, "_max_retries", 2)
+    slack._session.responses = [requests.ConnectionError("refused")] * 3
+
+    assert not slack._post([{"container": "web", "trigger": "logs", "report": "error", "ts": 0}])
+    assert len(slack._session.posts) == 3
+    assert sleeps == [1.0, 2.0, 4.0]
+
+
+def test_grace_periods_expire(slack):
+    slack._delivered([{"container": "web", "trigger": "logs", "graceperiod": 10}], True)
+    slack._delivered([{"container": "db", "trigger": "logs", "graceperiod": 20}], True)
+    now = time.time()
+
+    slack._expire_grace_periods(now + 15)
+    assert list(slack._grace_periods) == [("db", "logs")]
+    assert len(slack._grace_heap) == 1
+
+    slack._expire_grace_periods(now + 25)
+    assert not slack._grace_periods
+    assert not slack._grace_heap
+
+
+def test_renewed_grace_period(slack):
+    slack._delivered([{"container": "web", "trigger": "logs", "graceperiod": 10}], True)
+    slack._delivered([{"container": "web", "trigger": "logs", "graceperiod": 20}], True)
+    now = time.time()
+
+    # The outdated entry of the heap does not remove the renewed grace period
+    slack._expire_grace_periods(now + 15)
+    assert list(slack._grace_periods) == [("web", "logs")]
+
+    slack._expire_grace_periods(now + 25)
+    assert not slack._grace_periods
+
+
+def test_expired_alert_is_sent_again(slack):
+    slack._delivered([{"container": "web", "trigger": "logs", "graceperiod": 0}], True)
+
+    assert slack.send_slack_info_report("web", "logs", "error")
@@ -0,0 +1,130 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import random
+from monitoring.SlidingCounter import SlidingCounter
+from typing import List, Tuple
+
+
+def test_sum_window():
+    counter = SlidingCounter(60)
+    now = counter.started
+    counter.add(1, now)
+    counter.add(2, now + 10)
+    counter.add(3, now + 20)
+
+    assert counter.sum(60, now + 20) == 6
+    assert counter.sum(11, now + 20) == 5
+    assert counter.sum(1, now + 20) == 3
+
+
+def test_events_leave_the_window():
+    counter = SlidingCounter(60)
+    now = counter.started
+    counter.add(1, now)
+    counter.add(2, now + 30)
+
+    assert counter.sum(60, now + 59) == 3
+    assert counter.sum(60, now + 60) == 2
+    assert counter.sum(60, now + 90) == 0
+
+
+def test_wrap_around():
+    counter = SlidingCounter(10)
+    now = counter.started
+    for second in range(25):
+        counter.add(1, now + second)
+
+    assert counter.sum(10, now + 24) == 10
+    assert counter.sum(5, now + 24) == 5
+
+
+def test_gap_longer_than_buffer():
+    counter = SlidingCounter(10)
+    now = counter.started
+    counter.add(5, now)
+    counter.add(1, now + 100)
+
+    assert counter.sum(10, now + 100) == 1
+
+
+def test_window_limited_to_buffer():
+    counter = SlidingCounter(10)
+    now = counter.started
+    counter.add(1, now)
+    counter.add(1, now + 5)
+
+    assert counter.sum(3600, now + 5) == 2
+
+
+def test_old_events_are_ignored():
+    counter = SlidingCounter(10)
+    now = counter.started
+    counter.add(1, now + 20)
+    counter.add(1, now)
+    counter.add(1, now + 15)
+
+    assert counter.sum(10, now + 20) == 2
+
+
+def test_age():
+    counter = SlidingCounter(10)
+    assert counter.age(counter.started + 42) == 42
+
+
+class ReferenceCounter:
+    """Keeps all events, to check the buckets and totals of the SlidingCounter"""
+
+    def __init__(self, seconds: int, started: int):
+        self.seconds = seconds
+        self.newest = started
+        self.events: List[Tuple[int, int]] = []
+
+    def add(self, count: int, second: int):
+        self.newest = max(self.newest, second)
+        if second > self.newest - self.seconds:
+            self.events.append((second, count))
+
+    def sum(self, seconds: int, now: int) -> int:
+        self.newest = max(self.newest, now)
+        return sum(count for second, count in self.events if second > self.newest - min(seconds, self.seconds))
+
+
+def test_running_totals():
+    counter = SlidingCounter(100, windows=[10, 60])
+    reference = ReferenceCounter(100, counter.started)
+    now = counter.started
+    generator = random.Random(1)
+    for _ in range(2000):
+        now += generator.choice((0, 0, 1, 1, 2, 5, 30, 150))
+        second = now - generator.randrange(0, 120)
+        count = generator.randrange(1, 5)
+        counter.add(count, second)
+        reference.add(count, second)
+
+        for window in (10, 30, 60, 100):
+            assert counter.sum(window, now) == reference.sum(window, now)
+
+
+def test_events_before_the_start():
+    counter = SlidingCounter(60)
+    now = counter.started
+    counter.add(1, now - 30)
+
+    assert counter.age(now) == 30
+    assert counter.sum(60, now) == 1
@@ -0,0 +1,96 @@
+"""
+    This File is part of DockMon - See README for further information.
+    Copyright (C) 2020  Hendrik Adam <hendrik.adam@sciencemediacenter.de>
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import pytest
+from monitoring.TemplateMiner import TemplateMiner
+
+
+def test_variables_are_masked():
+    miner = TemplateMiner(10)
+    new, counts = miner.mine(
+        [
+            b"2023-05-01T10:00:00.123Z request 42 from 10.0.0.1:8080 took 12.5 ms",
+            b"2023-05-01T10:00:01.456Z request 43 from 10.0.0.2:8080 took 7 ms",
+        ]
+    )
+
+    assert [str(template) for template in new] == ["<*> request <*> from <*> took <*> ms"]
+    assert list(counts.values()) == [2]
+    assert new[0].example.startswith(b"2023-05-01T10:00:00.123Z")
+
+
+def test_similar_lines_are_merged():
+    miner = TemplateMiner(10)
+    new, _counts = miner.mine([b"user alice logged in", b"user bob logged in"])
+
+    assert [str(template) for template in new] == ["user <*> logged in"]
+
+
+def test_different_lines_start_new_templates():
+    miner = TemplateMiner(10)
+    new, counts = miner.mine([b"user alice logged in", b"disk full on sda", b"user alice logged out now"])
+
+    assert len(new) == 3
+    assert sorted(counts.values()) == [1, 1, 1]
+
+
+def test_known_templates_are_not_new():
+    miner = TemplateMiner(10)
+    miner.mine([b"job 1 done"])
+    new, counts = miner.mine([b"job 2 done", b"job 3 done"])
+
+    assert new == []
+    assert [(str(template), count) for template, count in counts.items()] == [("job <*> done", 2)]
+
+
+def test_least_recently_seen_template_is_evicted():
+    miner = TemplateMiner(2)
+    miner.mine([b"first line"])
+    miner.mine([b"second line here"])
+    miner.mine([b"first line"])
+    new, _counts = miner.mine([b"third line is here now"])
+
+    assert len(miner) == 2
+    assert sorted(str(template) for template in miner._templates.values()) == [
+        "first line",
+        "third line is here now",
+    ]
+    assert miner._groups == {(2, b"first"): [0], (5, b"third"): [2]}
+
+    # The evicted template is new again, if it shows up again
+    new, _counts = miner.mine([b"second line here"])
+    assert [str(template) for template in new] == ["second line here"]
+
+
+def test_moving_average_rate():
+    miner = TemplateMiner(10)
+    _new, counts = miner.mine([b"tick"])
+    template = next(iter(counts))
+
+    assert miner.update_rate(template, 10.0) == 0.0
+    assert template.rate == 10.0
+
+    miner.mine([b"tick"])
+    assert miner.update_rate(template, 20.0) == 10.0
+    assert template.rate == pytest.approx(11.0)
+
+    # Checks, which did not see the template, count as a rate of 0
+    miner.mine([])
+    miner.mine([b"tick"])
+    assert miner.update_rate(template, 11.0) == pytest.approx(9.9)
+    assert template.rate == pytest.approx(10.01)